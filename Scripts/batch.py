@@ -0,0 +1,426 @@
+import argparse
+import glob
+import importlib.util
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from converter import CSV2FBXConverter
+from csv_cache import CsvCache
+from instrumentation import ConversionProfile, cprofile_hook, write_report
+from manifest import DEFAULT_MANIFEST, Manifest, fingerprint_files, input_fingerprint, resolve_options
+from fbx_session import get_session
+from mesh_builder import OUTPUT_FORMATS
+
+DEFAULT_SUMMARY = "csv2fbx_summary.json"
+
+# 每个工作进程一份转换器（SDK 后端下还有进程内共享的 FbxSession）
+_worker = None
+
+
+class HeadlessConverter(CSV2FBXConverter):
+    """Converter used by batch workers: collects log lines"""
+
+    def __init__(self, backend):
+        super().__init__()
+        self.lines = []
+        if backend == "sdk" and importlib.util.find_spec("fbx"):
+            # 在工作进程启动时就创建 FbxManager，而不是在第一个文件上
+            get_session()
+
+    def log_message(self, message):
+        self.lines.append(message)
+
+
+def mapping_keys():
+    """csv_to_fbx 接受的关键字参数"""
+    parameters = inspect.signature(CSV2FBXConverter.csv_to_fbx).parameters
+    return [name for name in parameters if name not in ("self", "csv_path", "fbx_path")]
+
+
+def load_mapping(config_path):
+    """Load a JSON column-mapping / export-options file of csv_to_fbx keyword arguments"""
+    if not config_path:
+        return {}
+    with open(config_path, "r", encoding="utf-8") as config_file:
+        mapping = json.load(config_file)
+    unknown = sorted(set(mapping) - set(mapping_keys()))
+    if unknown:
+        raise ValueError(f"Unknown options in {config_path}: {', '.join(unknown)}")
+    return mapping
+
+
+def expand_inputs(inputs, recursive=False):
+    """Expand files, glob patterns and directories into a sorted list of CSV paths"""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*.csv") if recursive else os.path.join(item, "*.csv")
+            found.extend(glob.glob(pattern, recursive=recursive))
+        elif glob.has_magic(item):
+            found.extend(path for path in glob.glob(item, recursive=recursive) if os.path.isfile(path))
+        else:
+            found.append(item)
+    return sorted(set(os.path.abspath(path) for path in found))
+
+
+def output_path_for(csv_path, output_dir=None, extension=".fbx"):
+    name = os.path.splitext(os.path.basename(csv_path))[0] + extension
+    return os.path.join(output_dir or os.path.dirname(csv_path), name)
+
+
+def output_extension(options):
+    """File extension of the output_format in csv_to_fbx options"""
+    output_format = options.get("output_format", "fbx")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}' (expected one of {', '.join(OUTPUT_FORMATS)})")
+    return OUTPUT_FORMATS[output_format]
+
+
+def _init_worker(backend):
+    global _worker
+    _worker = HeadlessConverter(backend)
+
+
+def convert_one(csv_path, fbx_path, options, profile_stage=None, fingerprint=False, verify=None):
+    """
+    Run one conversion in a worker process and return its result record.
+
+    With profile_stage set, that stage runs under cProfile and the stats are
+    written next to the output as <output>.<stage>.prof. With fingerprint set,
+    the input and output are hashed here (in parallel across workers) for the
+    manifest, and the record gets a "fingerprint" entry. With verify set, the
+    written file is read back and that fraction of its triangles (all at 1.0)
+    compared with the CSV; a mismatch fails the file.
+    """
+    _worker.lines = []
+    files = input_fingerprint(csv_path) if fingerprint else None
+    profile = ConversionProfile()
+    if profile_stage:
+        profile.add_hook(profile_stage, cprofile_hook(f"{fbx_path}.{profile_stage}.prof"))
+    start = time.perf_counter()
+    try:
+        ok = _worker.csv_to_fbx(csv_path, fbx_path, profile=profile, **options)
+    except Exception as e:
+        _worker.log_message(f"Error converting CSV to FBX: {str(e)}")
+        ok = False
+    report = None
+    if ok and verify:
+        report = _worker.verify_export(csv_path, fbx_path, verify if verify < 1 else None, **options)
+        ok = report is not None and report.ok
+    errors = [line for line in _worker.lines if line.startswith(("Error", "Warning"))]
+    result = {
+        "input": csv_path,
+        "output": fbx_path,
+        "ok": bool(ok),
+        "seconds": round(time.perf_counter() - start, 3),
+        "messages": errors,
+        "stages": profile.to_dict()["stages"],
+    }
+    if _worker.last_validation is not None:
+        result["validation"] = _worker.last_validation.to_dict()
+    if report is not None:
+        result["verify"] = report.to_dict()
+    if ok and files is not None and os.path.exists(fbx_path):
+        result["fingerprint"] = fingerprint_files(csv_path, fbx_path, files)
+    return result
+
+
+def run_batch(csv_paths, options, output_dir=None, jobs=None, on_result=None, profile_stage=None,
+              fingerprint=False, verify=None):
+    """
+    Convert csv_paths on a process pool, one converter per worker process.
+
+    Returns the list of per-file result records in input order.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    backend = options.get("backend", "sdk")
+    extension = output_extension(options)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(csv_paths)))
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(backend,)) as executor:
+        futures = {executor.submit(convert_one, path, output_path_for(path, output_dir, extension), options,
+                                   profile_stage, fingerprint, verify): path
+                   for path in csv_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # 工作进程崩溃（如被系统杀掉）时也要记录该文件
+                result = {"input": path, "output": output_path_for(path, output_dir, extension), "ok": False,
+                          "seconds": None, "messages": [f"Error: worker failed: {e}"], "stages": []}
+            results[path] = result
+            if on_result is not None:
+                on_result(result)
+    return [results[path] for path in csv_paths]
+
+
+def skipped_result(csv_path, fbx_path):
+    return {"input": csv_path, "output": fbx_path, "ok": True, "skipped": True,
+            "seconds": 0.0, "messages": [], "stages": []}
+
+
+def write_summary(results, summary_path, elapsed):
+    summary = {
+        "total": len(results),
+        "succeeded": sum(1 for result in results if result["ok"]),
+        "failed": sum(1 for result in results if not result["ok"]),
+        "skipped": sum(1 for result in results if result.get("skipped")),
+        "seconds": round(elapsed, 3),
+        "files": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+    with open(summary_path, "w", encoding="utf-8") as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    return summary
+
+
+def stage_rows(results):
+    """Flatten per-file stage timings into report rows"""
+    return [dict(input=result["input"], **stats) for result in results for stats in result["stages"]]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="csv2fbx", description="Convert CSV mesh captures to FBX without the GUI")
+    parser.add_argument("inputs", nargs="+", help="CSV files, glob patterns or directories")
+    parser.add_argument("-c", "--config", help="JSON file with csv_to_fbx column mapping / export options")
+    parser.add_argument("-o", "--output-dir", help="Directory for the output files (default: next to each CSV)")
+    parser.add_argument("-j", "--jobs", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively")
+    parser.add_argument("--backend", choices=("sdk", "native"), help="Export backend")
+    parser.add_argument("--binary", action="store_true", help="Write binary instead of ASCII FBX")
+    parser.add_argument("--format", choices=tuple(OUTPUT_FORMATS), help="Output format (default fbx)")
+    parser.add_argument("--gltf-layout", choices=("interleaved", "planar"),
+                        help="GLB vertex buffers: one interleaved buffer or one per attribute")
+    parser.add_argument("--stream", action="store_true", help="Read CSVs in chunks to bound memory")
+    parser.add_argument("--weld", choices=("vtx_id", "attributes"), help="Deduplicate vertices")
+    parser.add_argument("--validate", choices=("fail", "drop", "clamp", "zero", "off"),
+                        help="What to do with bad rows found before building (default fail)")
+    parser.add_argument("--optimize", choices=("vertex_cache", "overdraw"),
+                        help="Reorder triangles for the GPU vertex cache (and overdraw)")
+    parser.add_argument("--cache-stats", action="store_true",
+                        help="With --optimize, log ACMR/ATVR before and after (simulates the cache twice)")
+    parser.add_argument("--derive-normals", choices=("missing", "always"),
+                        help="Compute smooth normals when the column is off (missing) or untrusted (always)")
+    parser.add_argument("--derive-tangents", choices=("missing", "always"),
+                        help="Compute MikkTSpace-style tangents from positions, normals and UV0")
+    parser.add_argument("--hard-edge-angle", type=float, help="Split derived normals at sharper edges (degrees)")
+    parser.add_argument("--lods", type=int, help="Extra LOD meshes to generate (written as <name>_LOD1..)")
+    parser.add_argument("--lod-ratio", type=float, help="Triangle ratio between LOD levels (default 0.5)")
+    parser.add_argument("--dedup-layers", action="store_true",
+                        help="Write UV/normal/tangent/color layers as unique values plus an index array")
+    parser.add_argument("--dedup-tolerance", type=float, help="Quantization step for --dedup-layers")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the parsed-CSV cache")
+    parser.add_argument("--clear-cache", action="store_true", help="Empty the parsed-CSV cache before converting")
+    parser.add_argument("--cache-dir", help="Parsed-CSV cache directory")
+    parser.add_argument("--cache-size-mb", type=int, help="Evict cache entries beyond this size")
+    parser.add_argument("--report", help="Write per-stage timings of every file to this .json or .csv file")
+    parser.add_argument("--profile-stage", help="Run cProfile over one stage (e.g. save_scene) of every file")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Convert in one process, parsing the next files while the current one is exported")
+    parser.add_argument("--read-ahead", type=int, default=2, help="Parsed files the pipeline may hold (default 2)")
+    parser.add_argument("--export-depth", type=int, default=2,
+                        help="Built scenes that may wait for export in the pipeline (default 2)")
+    parser.add_argument("--merge", metavar="OUTPUT",
+                        help="Write the meshes of all inputs into this one scene file instead of one file each")
+    parser.add_argument("--no-instancing", action="store_true",
+                        help="With --merge, write every mesh even when its geometry repeats an earlier one")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and convert CSVs that appear or change in the input directories")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="Seconds a watched file must stay unchanged before it is converted (default 2)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between directory scans (default 1)")
+    parser.add_argument("--status-file", help="Write the watch counters (queue, throughput, latency) to this JSON file")
+    parser.add_argument("--verify", type=float, nargs="?", const=1.0, metavar="FRACTION",
+                        help="Read every written file back and compare it with its CSV (optionally only this "
+                             "fraction of the triangles, e.g. 0.05)")
+    parser.add_argument("--summary", help=f"Where to write the per-file results (default: {DEFAULT_SUMMARY} "
+                                          f"in the output directory, or the current directory)")
+    parser.add_argument("--manifest", help=f"Incremental build manifest (default: {DEFAULT_MANIFEST} "
+                                           f"in the output directory, or the current directory)")
+    parser.add_argument("--no-manifest", action="store_true", help="Convert every input and keep no manifest")
+    parser.add_argument("--force", action="store_true", help="Reconvert up-to-date inputs too")
+    parser.add_argument("--verify-hashes", action="store_true",
+                        help="Hash inputs and outputs even when their size and mtime are unchanged")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        options = load_mapping(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if args.backend:
+        options["backend"] = args.backend
+    if args.binary:
+        options["as_ascii"] = False
+    if args.format:
+        options["output_format"] = args.format
+    if args.gltf_layout:
+        options["gltf_layout"] = args.gltf_layout
+    if args.stream:
+        options["stream"] = True
+    if args.weld:
+        options["weld"] = args.weld
+    if args.validate:
+        options["validate"] = None if args.validate == "off" else args.validate
+    if args.optimize:
+        options["optimize"] = args.optimize
+    if args.cache_stats:
+        options["cache_stats"] = True
+    if args.derive_normals:
+        options["derive_normals"] = args.derive_normals
+    if args.derive_tangents:
+        options["derive_tangents"] = args.derive_tangents
+    if args.hard_edge_angle is not None:
+        options["hard_edge_angle"] = args.hard_edge_angle
+    if args.lods:
+        options["lod_count"] = args.lods
+    if args.lod_ratio:
+        options["lod_ratio"] = args.lod_ratio
+    if args.dedup_layers:
+        options["dedup_layers"] = True
+    if args.dedup_tolerance:
+        options["dedup_tolerance"] = args.dedup_tolerance
+    # 命令行批量转换默认使用解析缓存，库调用和界面默认不写磁盘
+    if args.no_cache:
+        options["use_cache"] = False
+    else:
+        options.setdefault("use_cache", True)
+
+    # 工作进程通过环境变量继承缓存设置
+    if args.cache_dir:
+        os.environ["CSV2FBX_CACHE_DIR"] = args.cache_dir
+    if args.cache_size_mb:
+        os.environ["CSV2FBX_CACHE_MAX_MB"] = str(args.cache_size_mb)
+    if args.clear_cache:
+        CsvCache().clear()
+    try:
+        extension = output_extension(options)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if args.verify is not None:
+        if not 0 < args.verify <= 1:
+            print("Error: --verify takes a fraction between 0 and 1", file=sys.stderr)
+            return 2
+        if args.watch or args.pipeline or args.merge:
+            print("Error: --verify works with plain batch conversion only (not --watch, --pipeline or --merge)",
+                  file=sys.stderr)
+            return 2
+
+    def report(result):
+        status = "OK  " if result["ok"] else "FAIL"
+        print(f"[{status}] {result['input']} ({result['seconds']}s)")
+        for message in result["messages"]:
+            print(f"       {message}")
+
+    if args.watch:
+        from watch import FolderWatcher, WatchedDirectory  # 只有守护模式才需要
+
+        missing = [path for path in args.inputs if not os.path.isdir(path)]
+        if missing:
+            print(f"Error: --watch needs directories: {', '.join(missing)}", file=sys.stderr)
+            return 2
+        manifests = {}
+        try:
+            directories = [WatchedDirectory(path, options, args.output_dir, args.recursive, not args.no_manifest,
+                                            manifests)
+                           for path in args.inputs]
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        watcher = FolderWatcher(directories, args.jobs, args.settle, args.poll_interval,
+                                on_result=report)
+        watcher.run(status_path=args.status_file)
+        return 0
+
+    # 汇总与清单放在同一位置：有 -o 时写入输出目录
+    if args.summary is None:
+        args.summary = os.path.join(args.output_dir or ".", DEFAULT_SUMMARY)
+
+    csv_paths = expand_inputs(args.inputs, args.recursive)
+    if not csv_paths:
+        print("Error: no CSV files matched the inputs", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    if args.merge:
+        # 合并成一个场景：在本进程中依次转换，重复的几何只写一次
+        converter = HeadlessConverter(options.get("backend", "sdk"))
+        os.makedirs(os.path.dirname(os.path.abspath(args.merge)), exist_ok=True)
+        ok = converter.merge_to_scene(csv_paths, args.merge, not args.no_instancing, **options)
+        messages = [line for line in converter.lines if line.startswith(("Error", "Warning"))]
+        result = {"input": csv_paths, "output": args.merge, "ok": ok,
+                  "seconds": round(time.perf_counter() - start, 3), "messages": messages, "stages": []}
+        if converter.last_merge is not None:
+            result.update(converter.last_merge)
+            print(f"{converter.last_merge['nodes']} nodes sharing {converter.last_merge['meshes']} meshes")
+        for message in messages:
+            print(f"       {message}")
+        write_summary([result], args.summary, time.perf_counter() - start)
+        print(f"{'Merged' if ok else 'Failed to merge'} {len(csv_paths)} files into {args.merge} "
+              f"in {result['seconds']}s, summary written to {args.summary}")
+        return 0 if ok else 1
+
+    manifest = None
+    if not args.no_manifest:
+        manifest_path = args.manifest or os.path.join(args.output_dir or ".", DEFAULT_MANIFEST)
+        try:
+            manifest = Manifest.load(manifest_path, args.verify_hashes)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable manifest {manifest_path}: {e}", file=sys.stderr)
+            manifest = Manifest(manifest_path, args.verify_hashes)
+
+    # 清单中输入、选项、工具版本和输出都未变化的文件直接跳过
+    results = {}
+    stale = csv_paths
+    if manifest is not None:
+        resolved = resolve_options(CSV2FBXConverter, options)
+        stale = []
+        for path in csv_paths:
+            fbx_path = output_path_for(path, args.output_dir, extension)
+            if not args.force and manifest.is_up_to_date(path, fbx_path, resolved):
+                results[path] = skipped_result(path, fbx_path)
+            else:
+                stale.append(path)
+
+    if stale:
+        if args.pipeline:
+            from pipeline import run_pipeline  # pipeline 依赖本模块，延迟导入
+
+            converted = run_pipeline(stale, options, args.output_dir, report, args.profile_stage,
+                                     manifest is not None, args.read_ahead, args.export_depth)
+        else:
+            converted = run_batch(stale, options, args.output_dir, args.jobs, report, args.profile_stage,
+                                  fingerprint=manifest is not None, verify=args.verify)
+        for result in converted:
+            results[result["input"]] = result
+            if manifest is not None:
+                if result["ok"] and "fingerprint" in result:
+                    manifest.record(result["input"], result["output"], resolved, result.pop("fingerprint"))
+                else:
+                    manifest.forget(result["output"])
+    results = [results[path] for path in csv_paths]
+
+    summary = write_summary(results, args.summary, time.perf_counter() - start)
+    if manifest is not None:
+        manifest.save()
+        print(f"Manifest {manifest.path}: {summary['skipped']} up to date, {len(stale)} reconverted")
+    if args.report:
+        write_report(stage_rows(results), args.report)
+    print(f"{summary['succeeded']}/{summary['total']} converted in {summary['seconds']}s, "
+          f"summary written to {args.summary}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,460 @@
+"""
+Benchmarks for csv_to_fbx.
+
+    python bench.py generate capture.csv --vertices 1000000 --tangent --color --uv2
+    python bench.py run --sizes 10000 100000 1000000 --backends memory native sdk-standin
+    python bench.py compare --threshold 0.1
+    python bench.py startup --budget-ms 400
+
+"run" generates (or reuses) synthetic RenderDoc-style captures, converts each
+one with every requested backend and appends the per-stage timings to a JSON
+history file. "compare" diffs two runs of that history and exits with status 1
+when any stage got slower than the threshold allows. "startup" times a fresh
+interpreter importing the converter and running a no-op conversion, and
+fails when that exceeds the budget or pulls in tkinter or the FBX SDK.
+"""
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from converter import CSV2FBXConverter
+from instrumentation import ConversionProfile
+from mesh_builder import SdkMeshBuilder
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_HISTORY = "bench_history.json"
+_WRITE_ROWS = 100_000
+
+
+def available_backends():
+    """Backends that can run here; sdk-standin drives SdkMeshBuilder with sdk_standin"""
+    backends = ["memory", "native", "sdk-standin"]
+    if importlib.util.find_spec("fbx"):
+        backends.append("sdk")
+    return backends
+
+
+class BenchConverter(CSV2FBXConverter):
+    """Quiet converter that also knows the sdk-standin backend"""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def create_mesh_builder(self, backend, output_format="fbx", gltf_layout="interleaved"):
+        if backend == "sdk-standin" and output_format == "fbx":
+            import sdk_standin
+            return SdkMeshBuilder(self.log_message, sdk=sdk_standin)
+        return super().create_mesh_builder(backend, output_format, gltf_layout)
+
+    def log_message(self, message):
+        self.lines.append(message)
+
+
+# ===== Synthetic captures =====
+
+def capture_columns(tangent=False, color=False, uv2=False):
+    """Header names of a RenderDoc mesh-viewer export with the requested attributes"""
+    columns = ["VTX", "IDX"]
+    columns += [f"in_POSITION0.{c}" for c in "xyzw"]
+    columns += [f"in_NORMAL0.{c}" for c in "xyzw"]
+    if tangent:
+        columns += [f"in_TANGENT0.{c}" for c in "xyzw"]
+    if color:
+        columns += [f"in_COLOR0.{c}" for c in "xyzw"]
+    columns += [f"in_TEXCOORD0.{c}" for c in "xy"]
+    if uv2:
+        columns += [f"in_TEXCOORD1.{c}" for c in "xy"]
+    return columns
+
+
+def capture_mapping(tangent=False, color=False, uv2=False):
+    """csv_to_fbx column mapping for a capture written by generate_capture"""
+    columns = capture_columns(tangent, color, uv2)
+    return {
+        "vtx_id": columns.index("VTX"),
+        "vertex_id": columns.index("in_POSITION0.x"),
+        "normal_id": columns.index("in_NORMAL0.x"),
+        "uv_id": columns.index("in_TEXCOORD0.x"),
+        "tangent_id": columns.index("in_TANGENT0.x") if tangent else None,
+        "color_id": columns.index("in_COLOR0.x") if color else None,
+        "uv2_id": columns.index("in_TEXCOORD1.x") if uv2 else None,
+    }
+
+
+def grid_triangles(triangle_count):
+    """Index buffer of a square grid with at least triangle_count triangles, and its side length"""
+    side = int(np.ceil(np.sqrt(max(triangle_count, 1) / 2.0))) + 1
+    row, col = np.divmod(np.arange((side - 1) ** 2), side - 1)
+    corner = row * side + col
+    quads = np.stack([corner, corner + side, corner + 1,
+                      corner + 1, corner + side, corner + side + 1], axis=1)
+    return quads.reshape(-1, 3)[:triangle_count].ravel(), side
+
+
+def capture_rows(indices, side, tangent=False, color=False, uv2=False):
+    """Per-row attribute table (IDX first) for an index buffer into a side x side grid"""
+    row, col = np.divmod(indices, side)
+    u = col / (side - 1)
+    v = row / (side - 1)
+    height = 0.1 * np.sin(u * 12.0) * np.cos(v * 9.0)
+    ones = np.ones_like(u)
+    zeros = np.zeros_like(u)
+
+    columns = [indices, u * 10.0, height, v * 10.0, ones]
+    normal = np.stack([-1.2 * np.cos(u * 12.0) * np.cos(v * 9.0), ones,
+                       0.9 * np.sin(u * 12.0) * np.sin(v * 9.0)], axis=1)
+    normal /= np.linalg.norm(normal, axis=1, keepdims=True)
+    columns += [normal[:, 0], normal[:, 1], normal[:, 2], zeros]
+    if tangent:
+        columns += [ones, zeros, zeros, ones]
+    if color:
+        columns += [u, v, 0.5 + height, ones]
+    columns += [u, v]
+    if uv2:
+        columns += [u * 0.5, v * 0.5 + 0.5]
+    return np.stack(columns, axis=1)
+
+
+def generate_capture(path, vertex_count, tangent=False, color=False, uv2=False):
+    """
+    Write a RenderDoc-style CSV of a triangulated grid with vertex_count rows.
+
+    Rows are unwelded (one per triangle corner, like a real capture), IDX is
+    the shared grid vertex so welding has work to do. vertex_count is rounded
+    down to whole triangles. Returns the csv_to_fbx column mapping.
+    """
+    indices, side = grid_triangles(vertex_count // 3)
+    columns = capture_columns(tangent, color, uv2)
+    row_format = "%d, %d, " + ", ".join(["%.6f"] * (len(columns) - 2)) + "\n"
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", newline="") as csvfile:
+        csvfile.write(", ".join(columns) + "\n")
+        for start in range(0, len(indices), _WRITE_ROWS):
+            block = capture_rows(indices[start:start + _WRITE_ROWS], side, tangent, color, uv2)
+            vtx = range(start, start + len(block))
+            csvfile.write("".join(row_format % (i, *row) for i, row in zip(vtx, block.tolist())))
+    os.replace(temp_path, path)
+    return capture_mapping(tangent, color, uv2)
+
+
+def capture_name(vertex_count, tangent=False, color=False, uv2=False):
+    extras = [name for name, enabled in (("tangent", tangent), ("color", color), ("uv2", uv2)) if enabled]
+    return "_".join([f"capture_{vertex_count}"] + extras) + ".csv"
+
+
+def ensure_capture(data_dir, vertex_count, tangent=False, color=False, uv2=False):
+    """Path of a generated capture in data_dir, generating it on first use"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, capture_name(vertex_count, tangent, color, uv2))
+    if not os.path.exists(path):
+        print(f"Generating {path}")
+        generate_capture(path, vertex_count, tangent, color, uv2)
+    return path
+
+
+# ===== Running =====
+
+def run_case(csv_path, backend, options, repeat=1):
+    """
+    Convert csv_path repeat times and keep the fastest time of every stage.
+
+    Returns a result record with per-stage wall seconds, or the error message
+    of the first failed conversion.
+    """
+    best = None
+    with tempfile.TemporaryDirectory() as output_dir:
+        fbx_path = os.path.join(output_dir, "bench.fbx")
+        for _ in range(repeat):
+            converter = BenchConverter()
+            profile = ConversionProfile()
+            ok = converter.csv_to_fbx(csv_path, fbx_path, backend=backend, profile=profile, **options)
+            if not ok:
+                errors = [line for line in converter.lines if line.startswith("Error")]
+                return {"backend": backend, "ok": False, "error": errors[-1] if errors else "failed"}
+            run = {stats.name: stats.wall_seconds for stats in profile.stages.values()}
+            run["total"] = profile.total_seconds
+            if best is None:
+                best = run
+            else:
+                best = {stage: min(seconds, run.get(stage, seconds)) for stage, seconds in best.items()}
+    return {"backend": backend, "ok": True,
+            "stages": {stage: round(seconds, 6) for stage, seconds in best.items()}}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, backends, data_dir, tangent=False, color=False, uv2=False,
+                   repeat=1, options=None, label=None):
+    """Benchmark every size with every backend and return the history record of the run"""
+    options = dict(options or {})
+    options.setdefault("as_ascii", False)
+    options.setdefault("use_cache", False)
+    mapping = capture_mapping(tangent, color, uv2)
+    # 不同转换选项的结果不能互相比较，所以选项也计入用例名
+    modes = [key if value is True else f"{key}={value}"
+             for key, value in sorted(options.items()) if value and key not in ("as_ascii", "use_cache")]
+
+    results = []
+    for vertex_count in sizes:
+        csv_path = ensure_capture(data_dir, vertex_count, tangent, color, uv2)
+        case = "+".join([os.path.splitext(capture_name(vertex_count, tangent, color, uv2))[0]] + modes)
+        for backend in backends:
+            result = run_case(csv_path, backend, dict(mapping, **options), repeat)
+            result.update(case=case, vertices=vertex_count)
+            results.append(result)
+            if result["ok"]:
+                print(f"{case:<40}{backend:<14}{result['stages']['total']:>10.3f}s")
+            else:
+                print(f"{case:<40}{backend:<14}{'FAILED':>10}  {result['error']}")
+    return run_record(results, repeat, options, label)
+
+
+def run_record(results, repeat=1, options=None, label=None):
+    """History record of one benchmark run"""
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "label": label,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "options": options,
+        "results": results,
+    }
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as history_file:
+        return json.load(history_file)
+
+
+def append_history(path, run):
+    history = load_history(path)
+    history.append(run)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as history_file:
+        json.dump(history, history_file, indent=2)
+    os.replace(temp_path, path)
+    return len(history) - 1
+
+
+# ===== Startup =====
+
+# 在全新的解释器中执行：导入转换器并做一次不写文件的转换
+_STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from converter import CSV2FBXConverter
+imported = time.perf_counter()
+converter = CSV2FBXConverter()
+converter.log_message = lambda message: None
+ok = converter.csv_to_fbx(sys.argv[1], sys.argv[2], backend="memory", use_cache=False, **json.loads(sys.argv[3]))
+done = time.perf_counter()
+print(json.dumps({"ok": ok, "import": imported - start, "convert": done - imported,
+                  "heavy_modules": sorted(name for name in ("tkinter", "fbx") if name in sys.modules)}))
+"""
+
+
+def measure_startup(repeat=5):
+    """
+    Median wall times of a fresh interpreter importing the converter and
+    converting a three-triangle capture with the memory backend. "total"
+    includes interpreter startup, which is what a short per-file job pays.
+    """
+    runs = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_path = os.path.join(work_dir, "startup.csv")
+        mapping = generate_capture(csv_path, 9)
+        command = [sys.executable, "-c", _STARTUP_SCRIPT, csv_path, os.path.join(work_dir, "startup.fbx"),
+                   json.dumps(mapping)]
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = subprocess.run(command, capture_output=True, text=True, check=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+            total = time.perf_counter() - start
+            runs.append(dict(json.loads(output.strip().splitlines()[-1]), total=total))
+
+    def median(key):
+        return round(statistics.median(run[key] for run in runs), 6)
+
+    return {"ok": all(run["ok"] for run in runs),
+            "heavy_modules": sorted({name for run in runs for name in run["heavy_modules"]}),
+            "stages": {"import": median("import"), "convert": median("convert"), "total": median("total")}}
+
+
+# ===== Comparing =====
+
+def select_run(history, selector):
+    """A run by index (negative counts from the end) or by label"""
+    try:
+        return history[int(selector)]
+    except ValueError:
+        for run in reversed(history):
+            if run.get("label") == selector:
+                return run
+    except IndexError:
+        pass
+    raise ValueError(f"No benchmark run '{selector}' in the history")
+
+
+def compare_runs(baseline, candidate, threshold=0.1, min_seconds=0.005):
+    """
+    Per-stage comparison of two history runs.
+
+    Returns rows (case, backend, stage, before, after, ratio, regressed). A
+    stage regresses when it is more than threshold slower and the difference
+    exceeds min_seconds, so sub-millisecond noise is never flagged.
+    """
+    before = {(r["case"], r["backend"]): r for r in baseline["results"] if r["ok"]}
+    rows = []
+    for result in candidate["results"]:
+        old = before.get((result["case"], result["backend"]))
+        if old is None or not result["ok"]:
+            continue
+        for stage, after in result["stages"].items():
+            prior = old["stages"].get(stage)
+            if prior is None:
+                continue
+            ratio = after / prior if prior > 0 else float("inf")
+            regressed = after > prior * (1.0 + threshold) and after - prior > min_seconds
+            rows.append((result["case"], result["backend"], stage, prior, after, ratio, regressed))
+    return rows
+
+
+def format_comparison(rows):
+    lines = [f"{'Case':<36}{'Backend':<14}{'Stage':<24}{'Before s':>10}{'After s':>10}{'Change':>9}"]
+    for case, backend, stage, before, after, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        lines.append(f"{case:<36}{backend:<14}{stage:<24}{before:>10.3f}{after:>10.3f}"
+                     f"{(ratio - 1.0) * 100:>8.1f}%{flag}")
+    return "\n".join(lines)
+
+
+def compare_history(history_path, baseline="-2", candidate="-1", threshold=0.1, min_seconds=0.005):
+    """Print the comparison of two runs and return the number of regressed stages"""
+    history = load_history(history_path)
+    if len(history) < 2 and baseline == "-2":
+        raise ValueError(f"{history_path} needs at least two runs to compare")
+    rows = compare_runs(select_run(history, baseline), select_run(history, candidate),
+                        threshold, min_seconds)
+    print(format_comparison(rows))
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"{regressions} regression(s) beyond {threshold * 100:.0f}%")
+    return regressions
+
+
+# ===== Command line =====
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bench", description="Benchmark CSV to FBX conversion")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_attribute_options(command):
+        command.add_argument("--tangent", action="store_true", help="Include tangent columns")
+        command.add_argument("--color", action="store_true", help="Include vertex color columns")
+        command.add_argument("--uv2", action="store_true", help="Include a second UV set")
+
+    generate = commands.add_parser("generate", help="Write one synthetic capture")
+    generate.add_argument("output", help="CSV file to write")
+    generate.add_argument("--vertices", type=int, default=100_000, help="Rows to write (10k to 10M)")
+    add_attribute_options(generate)
+
+    run = commands.add_parser("run", help="Benchmark conversions and append them to the history")
+    run.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Vertex counts")
+    run.add_argument("--backends", nargs="+", help="Backends to time (default: all available)")
+    run.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is kept")
+    run.add_argument("--stream", action="store_true", help="Benchmark streaming mode")
+    run.add_argument("--weld", choices=("vtx_id", "attributes"), help="Benchmark with welding")
+    run.add_argument("--cache", action="store_true", help="Allow the parsed-CSV cache (off by default)")
+    run.add_argument("--label", help="Name for this run in the history")
+    run.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "csv2fbx_bench"),
+                     help="Where generated captures are kept between runs")
+    run.add_argument("--history", default=DEFAULT_HISTORY, help="JSON history file")
+    add_attribute_options(run)
+
+    compare = commands.add_parser("compare", help="Flag stages that got slower between two runs")
+    compare.add_argument("--history", default=DEFAULT_HISTORY, help="JSON history file")
+    compare.add_argument("--baseline", default="-2", help="Run index or label to compare against")
+    compare.add_argument("--candidate", default="-1", help="Run index or label to check")
+    compare.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown (0.1 = 10%%)")
+    compare.add_argument("--min-seconds", type=float, default=0.005,
+                         help="Ignore differences smaller than this")
+
+    startup = commands.add_parser("startup", help="Check import plus no-op conversion against a time budget")
+    startup.add_argument("--budget-ms", type=float, default=400.0,
+                         help="Allowed median wall time including interpreter startup")
+    startup.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to time")
+    startup.add_argument("--history", help="Also append the measurement to this JSON history file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == "generate":
+        mapping = generate_capture(args.output, args.vertices, args.tangent, args.color, args.uv2)
+        print(json.dumps({key: value for key, value in mapping.items() if value is not None}))
+        return 0
+
+    if args.command == "run":
+        backends = args.backends or available_backends()
+        unknown = sorted(set(backends) - set(available_backends()))
+        if unknown:
+            print(f"Error: backend(s) not available here: {', '.join(unknown)}", file=sys.stderr)
+            return 2
+        options = {"stream": args.stream, "weld": args.weld, "use_cache": args.cache}
+        run = run_benchmarks(args.sizes, backends, args.data_dir, args.tangent, args.color, args.uv2,
+                             args.repeat, options, args.label)
+        index = append_history(args.history, run)
+        print(f"Recorded run {index} in {args.history}")
+        return 0 if all(result["ok"] for result in run["results"]) else 1
+
+    if args.command == "startup":
+        result = measure_startup(args.repeat)
+        stages = result["stages"]
+        print(f"import {stages['import'] * 1000:.0f} ms, no-op convert {stages['convert'] * 1000:.0f} ms, "
+              f"total with interpreter startup {stages['total'] * 1000:.0f} ms (budget {args.budget_ms:.0f} ms)")
+        if args.history:
+            result.update(case="startup", backend="memory")
+            append_history(args.history, run_record([result], args.repeat))
+        failed = not result["ok"] or stages["total"] * 1000 > args.budget_ms
+        if result["heavy_modules"]:
+            print(f"Error: headless conversion imported {', '.join(result['heavy_modules'])}", file=sys.stderr)
+            failed = True
+        elif failed:
+            print("Error: startup budget exceeded" if result["ok"] else "Error: no-op conversion failed",
+                  file=sys.stderr)
+        return 1 if failed else 0
+
+    try:
+        regressions = compare_history(args.history, args.baseline, args.candidate,
+                                      args.threshold, args.min_seconds)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
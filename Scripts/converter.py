@@ -0,0 +1,693 @@
+"""
+Conversion core: CSV2FBXConverter without any GUI dependency.
+
+Importing this module loads NumPy and the small helper modules only; tkinter
+is imported by gui.py and the FBX SDK only when the "sdk" backend builds a
+scene, so headless jobs start quickly.
+"""
+import contextlib
+import inspect
+import os
+import traceback
+import numpy as np
+from csv_cache import content_hash, get_default_cache
+from csv_ingest import (ID_ATTRIBUTES, build_column_map, count_rows, iter_csv_chunks, read_csv_columns,
+                        read_csv_columns_streamed)
+from gltf import LAYOUTS
+from grouping import partition_rows
+from instancing import InstancingRecorder
+from instrumentation import ConversionProfile
+from memory_guard import MemoryGuard
+from mesh_builder import OUTPUT_FORMATS, create_mesh_builder
+from validation import ValidationReport, validate_columns
+from weld import dedup_values, max_deviation, weld_by_attributes, weld_by_vertex_id
+
+
+def csv_column_map(vtx_id, vertex_id, normal_id, uv_id, tangent_id, color_id, uv2_id,
+                   use_vtx_id, use_normal, use_uv1, group_id, **_):
+    """The columns csv_to_fbx reads, from its keyword arguments (other options are ignored)"""
+    return build_column_map(
+        vtx_id=vtx_id if use_vtx_id else None,
+        vertex_id=vertex_id,
+        normal_id=normal_id if use_normal else None,
+        uv_id=uv_id if use_uv1 else None,
+        tangent_id=tangent_id,
+        color_id=color_id,
+        uv2_id=uv2_id,
+        group_id=group_id)
+
+
+class CSV2FBXConverter:
+    def __init__(self):
+        # 最近一次 csv_to_fbx 的分阶段计时结果 (ConversionProfile)
+        self.last_profile = None
+        # progress_callback(stage, rows_done, total_rows)，GUI 用它接收真实进度
+        self.progress_callback = None
+        # 最近一次 csv_to_fbx 的校验报告 (ValidationReport)，未校验时为 None
+        self.last_validation = None
+        # 合并模式下收集所有文件网格的 InstancingRecorder，csv_to_fbx 不再各自保存
+        self.collector = None
+        # 最近一次 merge_to_scene 的统计：文件、节点和实际写出的网格数
+        self.last_merge = None
+
+    def stage(self, name, count=None):
+        """Time a stage into the current conversion profile (no-op outside csv_to_fbx)"""
+        if self.last_profile is None:
+            return contextlib.nullcontext()
+        return self.last_profile.stage(name, count)
+
+    def report_progress(self, stage, done, total):
+        if self.progress_callback is not None:
+            self.progress_callback(stage, done, total)
+
+    def read_csv_columns(self, file_path, column_map, use_cache=False, tolerant=False):
+        """
+        只读取列映射中用到的列，返回 CsvColumns；use_cache 时优先从解析缓存加载，
+        tolerant 时坏单元格读为 NaN 并记录在 issues 中，交给校验阶段处理
+        """
+        # 有进度监听时分块解析，每块报告一次进度
+        on_chunk = None
+        if self.progress_callback is not None:
+            on_chunk = lambda done, total: self.report_progress("parse", done, total)
+        try:
+            cache = get_default_cache() if use_cache else None
+            if cache is not None:
+                return cache.read(file_path, column_map, on_chunk, tolerant)
+            return read_csv_columns(file_path, column_map, on_chunk, tolerant=tolerant)
+        except Exception as e:
+            self.log_message(f"Error reading CSV file: {str(e)}")
+            return None
+
+    def validate_capture(self, csv_data, policy):
+        """Check and sanitize the parsed rows; returns the data to build, or None when policy "fail" found errors"""
+        with self.stage("validate", len(csv_data)):
+            csv_data, report = validate_columns(csv_data, policy)
+        self.last_validation = report
+        if report.issues or report.dropped_rows:
+            for line in report.describe():
+                self.log_message(line)
+        if not report.ok and policy == "fail":
+            self.log_message("Error: Validation failed; nothing was built")
+            return None
+        return csv_data
+
+    def set_mesh_point_at(self, positions, builder, offset=0):
+        with self.stage("set_mesh_point_at", len(positions)):
+            builder.set_control_points(positions, offset)
+
+    def set_mesh_polygon(self, indices, builder):
+        """按索引缓冲写入三角形，末尾不足三个的索引被丢弃"""
+        with self.stage("set_mesh_polygon", len(indices) // 3):
+            builder.set_polygons(indices)
+
+    def set_mesh_uv(self, uvs, builder, uv_name="uv0", offset=0, indices=None):
+        """设置 UV 坐标 (支持多组 UV)；indices 为按多边形顶点的索引数组"""
+        with self.stage("set_mesh_uv", len(uvs)):
+            builder.set_uvs(uvs, uv_name, offset, indices)
+
+    def set_mesh_normal(self, normals, builder, offset=0, index=None):
+        """设置法线数据；index 为每个顶点指向去重后法线的索引"""
+        with self.stage("set_mesh_normal", len(normals)):
+            builder.set_normals(normals, offset, index)
+
+    def set_mesh_tangent(self, tangents, builder, offset=0, index=None):
+        """设置切线数据"""
+        with self.stage("set_mesh_tangent", len(tangents)):
+            builder.set_tangents(tangents, offset, index)
+
+    def set_mesh_vertex_color(self, colors, builder, offset=0, index=None):
+        """设置顶点颜色数据（没有透明度列时 alpha 已在读取时补 1.0）"""
+        with self.stage("set_mesh_vertex_color", len(colors)):
+            builder.set_colors(colors, offset, index)
+
+    def dedup_layer(self, name, values, tolerance=None):
+        """(unique values, per-vertex index) of one layer element"""
+        with self.stage("dedup_layers", len(values)):
+            result = dedup_values(values, tolerance)
+        self.log_message(f"{name}: {len(values)} values -> {result.vertex_count} unique")
+        return values[result.source_rows], result.indices
+
+    def set_mesh_attributes(self, csv_data, builder, offset=0, uv_indices=None,
+                            dedup=False, dedup_tolerance=None):
+        """
+        写入 csv_data 中存在的全部顶点属性。
+
+        dedup=True 时每个图层元素只写入去重后的值和真正的索引数组（需要整块写入，
+        uv_indices 为多边形顶点到 csv_data 行的索引）。
+        """
+        def layer(name, per_polygon_vertex=False):
+            values = csv_data.get(name)
+            if not dedup:
+                return values, uv_indices if per_polygon_vertex else None
+            values, index = self.dedup_layer(name, values, dedup_tolerance)
+            # UV 按多边形顶点映射：把顶点索引换成去重后 UV 的索引
+            return values, index[uv_indices] if per_polygon_vertex else index
+
+        self.set_mesh_point_at(csv_data.position, builder, offset)
+        if csv_data.uv0 is not None:
+            uvs, index = layer("uv0", True)
+            self.set_mesh_uv(uvs, builder, "uv0", offset, index)
+        if csv_data.normal is not None:
+            normals, index = layer("normal")
+            self.set_mesh_normal(normals, builder, offset, index)
+        if csv_data.tangent is not None:
+            tangents, index = layer("tangent")
+            self.set_mesh_tangent(tangents, builder, offset, index)
+        if csv_data.color is not None:
+            colors, index = layer("color")
+            self.set_mesh_vertex_color(colors, builder, offset, index)
+        if csv_data.uv1 is not None:
+            uvs, index = layer("uv1", True)
+            self.set_mesh_uv(uvs, builder, "uv1", offset, index)
+
+    def weld_vertices(self, csv_data, weld, tolerance):
+        """
+        Deduplicate CSV rows into shared vertices.
+
+        weld="vtx_id" keys on the Vertex ID column, weld="attributes" hashes the
+        quantized attribute tuples. Returns (welded CsvColumns, index buffer).
+        """
+        if weld == "vtx_id":
+            if csv_data.vtx_id is None:
+                raise ValueError("Vertex ID welding needs the Vertex ID column to be enabled")
+            result = weld_by_vertex_id(csv_data.vtx_id)
+        elif weld == "attributes":
+            arrays = [values for name, values in csv_data.arrays.items() if name not in ID_ATTRIBUTES]
+            result = weld_by_attributes(arrays, tolerance)
+        else:
+            raise ValueError(f"Unknown weld mode: {weld}")
+
+        self.log_message(result.describe())
+        if weld == "vtx_id":
+            deviation = max_deviation(csv_data.position, result)
+            if deviation > tolerance:
+                self.log_message(f"Warning: rows sharing a Vertex ID differ in position by up to {deviation:g}")
+        return csv_data.take(result.source_rows), result.indices
+
+    def split_groups(self, csv_data, mesh_name, weld=None, tolerance=1e-6, jobs=None):
+        """
+        Partition rows by the grouping column and prepare one mesh per group.
+
+        The rows are partitioned in a single pass, then every group's attribute
+        arrays are gathered (and welded, if requested) on a thread pool; NumPy
+        releases the GIL for the copies and sorts, so groups build concurrently.
+        Returns [(node name, CsvColumns, index buffer)] in group key order.
+        """
+        groups = partition_rows(csv_data.group)
+        self.log_message(f"Split {len(csv_data)} rows into {len(groups)} groups")
+
+        def prepare(group):
+            if len(group) % 3:
+                self.log_message(f"Warning: group {group.key} has {len(group)} rows, "
+                                 f"which is not a whole number of triangles")
+            data = csv_data.take(group.rows)
+            if weld:
+                data, indices = self.weld_vertices(data, weld, tolerance)
+            else:
+                indices = np.arange(len(data))
+            return f"{mesh_name}_{group.key}", data, indices
+
+        from concurrent.futures import ThreadPoolExecutor  # 只有分组转换才需要线程池
+
+        workers = max(1, min(jobs or os.cpu_count() or 1, len(groups)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(prepare, groups))
+
+    def derive_attributes(self, parts, normals=None, tangents=None, weighting="angle", hard_angle=None):
+        """
+        Compute normals and/or tangents from the geometry of every part.
+
+        normals / tangents are "missing" (only when the column is not mapped)
+        or "always" (replace captured values that cannot be trusted). Vertices
+        are split where a hard edge or mirrored UVs give one vertex two values,
+        so every part comes back with new vertex rows and a new index buffer.
+        """
+        for mode in (normals, tangents):
+            if mode not in (None, "missing", "always"):
+                raise ValueError(f"Unknown derive mode: {mode}")
+        from derive import compute_normals, compute_tangents  # 只有需要推导属性时才加载
+
+        derived = []
+        for name, data, indices in parts:
+            if normals == "always" or (normals == "missing" and data.normal is None):
+                rows, values, indices = compute_normals(data.position, indices, weighting, hard_angle)
+                data = data.take(rows)
+                data.arrays["normal"] = values.astype(np.float32)
+                self.log_message(f"{name}: derived {weighting}-weighted normals for {len(rows)} vertices")
+            if tangents == "always" or (tangents == "missing" and data.tangent is None):
+                if data.uv0 is None or data.normal is None:
+                    self.log_message(f"Warning: {name}: tangents need UVs and normals; not derived")
+                else:
+                    rows, values, indices = compute_tangents(data.position, data.normal, data.uv0, indices)
+                    data = data.take(rows)
+                    data.arrays["tangent"] = values.astype(np.float32)
+                    self.log_message(f"{name}: derived tangents for {len(rows)} vertices")
+            derived.append((name, data, indices))
+        return derived
+
+    def generate_lod_parts(self, parts, count, ratio=0.5):
+        """
+        Follow every part with count decimated copies, each with ratio times
+        the triangles of the one before, as sibling nodes <name>_LOD1.. while
+        the original becomes <name>_LOD0 (the naming Unity groups into LODs).
+        """
+        from lod import generate_lods  # 只有生成 LOD 时才需要
+        from vertex_cache import remap_vertices
+
+        result = []
+        for name, data, indices in parts:
+            result.append((f"{name}_LOD0", data, indices))
+            for level, lod_indices in enumerate(generate_lods(data.position, indices, count, ratio), 1):
+                vertex_order, lod_indices = remap_vertices(lod_indices)
+                self.log_message(f"{name}_LOD{level}: {len(lod_indices) // 3} triangles, "
+                                 f"{len(vertex_order)} vertices")
+                result.append((f"{name}_LOD{level}", data.take(vertex_order), lod_indices))
+        return result
+
+    def optimize_parts(self, parts, mode, cache_size=16, measure=False):
+        """
+        Reorder every part's triangles for the post-transform vertex cache
+        (Tipsify), plus a cluster sort against overdraw with mode="overdraw",
+        then renumber the vertices in first-use order. With measure set, logs
+        ACMR/ATVR before and after for each part (two extra cache simulations).
+        """
+        if mode not in ("vertex_cache", "overdraw"):
+            raise ValueError(f"Unknown optimize mode: {mode}")
+        from vertex_cache import optimize_triangle_order  # 只有开启优化时才需要
+
+        optimized = []
+        for name, data, indices in parts:
+            vertex_order, indices, before, after = optimize_triangle_order(
+                indices, data.position, cache_size, overdraw=mode == "overdraw", measure=measure)
+            if measure:
+                self.log_message(f"{name}: {before.describe()} -> {after.describe()} "
+                                 f"(cache size {cache_size}, {mode})")
+            else:
+                self.log_message(f"{name}: reordered {len(indices) // 3} triangles ({mode})")
+            optimized.append((name, data.take(vertex_order), indices))
+        return optimized
+
+    def build_meshes(self, parts, builder, indexed, chunk_rows=65536, dedup=False, dedup_tolerance=None):
+        """
+        Write each (name, CsvColumns, index buffer) part as its own mesh node.
+
+        Builders are not thread-safe, so the meshes are filled one after
+        another. Unindexed parts are written in chunks of chunk_rows rows to
+        report progress; indexed (welded) parts carry per-polygon-vertex UV
+        indices and are written whole, as are parts with deduplicated layers.
+        """
+        total = sum(len(data) for _, data, _ in parts)
+        done = 0
+        for name, data, indices in parts:
+            count = len(data)
+            builder.begin_mesh(name, count)
+            if indexed or dedup:
+                # UV 按多边形顶点索引，无法分块写入
+                self.set_mesh_attributes(data, builder, 0, indices, dedup, dedup_tolerance)
+            else:
+                # 分块写入以便报告进度，每块写到各自的偏移处
+                for start in range(0, count, chunk_rows):
+                    self.set_mesh_attributes(data.take(slice(start, start + chunk_rows)), builder, start)
+                    self.report_progress("build", done + min(start + chunk_rows, count), total)
+            self.set_mesh_polygon(indices, builder)
+            builder.end_mesh()
+            done += count
+            self.report_progress("build", done, total)
+
+    def stream_mesh_data(self, csv_path, column_map, builder, mesh_name, chunk_rows, guard, validation=None):
+        """
+        Fill control points and layer elements chunk by chunk.
+
+        The mesh is sized up front from a newline count, then each chunk of
+        chunk_rows rows is parsed, written at its row offset and dropped, so
+        only the mesh buffers grow with the input. Returns the row count.
+
+        With a validation policy ("fail", "clamp" or "zero") every chunk is
+        checked before it is written; triangle checks need the whole capture
+        and are skipped.
+        """
+        with self.stage("parse"):
+            count = count_rows(csv_path)
+        if count == 0:
+            return 0
+
+        builder.begin_mesh(mesh_name, count)
+        offset = 0
+        chunks = iter_csv_chunks(csv_path, column_map, chunk_rows, tolerant=bool(validation))
+        report = self.last_validation = ValidationReport(validation) if validation else None
+        while True:
+            with self.stage("parse") as stats:
+                chunk = next(chunks, None)
+                stats.elements += len(chunk) if chunk is not None else 0
+            if chunk is None:
+                break
+            if offset + len(chunk) > count:
+                raise ValueError(f"CSV file has more rows than the {count} counted")
+            if report is not None:
+                with self.stage("validate", len(chunk)):
+                    chunk, _ = validate_columns(chunk, validation, False, offset, report)
+                if not report.ok and validation == "fail":
+                    for line in report.describe():
+                        self.log_message(line)
+                    raise ValueError(f"Validation failed in rows {offset}..{offset + len(chunk) - 1}")
+            self.set_mesh_attributes(chunk, builder, offset)
+            offset += len(chunk)
+            guard.check(f"streaming rows {offset}/{count}")
+            self.report_progress("stream", offset, count)
+
+        if offset != count:
+            raise ValueError(f"Read {offset} rows but counted {count}; blank lines inside the data "
+                             f"are not supported in streaming mode")
+        if report is not None:
+            report.add("incomplete_triangle", np.arange(count // 3 * 3, count))
+            if report.issues:
+                for line in report.describe():
+                    self.log_message(line)
+        return count
+
+    def create_mesh_builder(self, backend, output_format="fbx", gltf_layout="interleaved"):
+        return create_mesh_builder(backend, self.log_message, None, output_format, gltf_layout)
+
+    def csv_to_fbx(self, csv_path, fbx_path,
+                   vtx_id=0, vertex_id=2, normal_id=6, uv_id=18,
+                   tangent_id=None, color_id=None, uv2_id=None,
+                   as_ascii=True,
+                   use_vtx_id=True, use_position=True, use_normal=True, use_uv1=True,
+                   stream=False, chunk_rows=65536, memory_limit_mb=None,
+                   weld=None, weld_tolerance=1e-6, backend="sdk", use_cache=False,
+                   profile=None, group_id=None, group_jobs=None,
+                   optimize=None, cache_size=16, dedup_layers=False, dedup_tolerance=None,
+                   lod_count=0, lod_ratio=0.5, derive_normals=None, derive_tangents=None,
+                   normal_weighting="angle", hard_edge_angle=None, validate="fail",
+                   output_format="fbx", gltf_layout="interleaved", cache_stats=False):
+        """
+        Convert CSV data to FBX format with extended support for tangents, vertex colors and UV2
+        
+        Parameters:
+        csv_path (str): Path to the CSV file
+        fbx_path (str): Path to save the FBX file
+        vtx_id (int): Column index for vertex ID
+        vertex_id (int): Starting column index for vertex position (x,y,z)
+        normal_id (int): Starting column index for normal vectors (x,y,z)
+        uv_id (int): Starting column index for UV coordinates (u,v)
+        tangent_id (int, optional): Starting column index for tangent vectors (x,y,z)
+        color_id (int, optional): Starting column index for vertex colors (r,g,b,a)
+        uv2_id (int, optional): Starting column index for second UV set (u,v)
+        as_ascii (bool): Whether to save as ASCII format (readable) or binary
+        use_vtx_id (bool): Whether to use vertex ID
+        use_position (bool): Whether to use position data
+        use_normal (bool): Whether to use normal data
+        use_uv1 (bool): Whether to use primary UV data
+        stream (bool): Read the CSV in chunks of chunk_rows rows instead of all at once
+        chunk_rows (int): Rows per chunk in streaming mode
+        memory_limit_mb (float, optional): Abort the conversion when process memory exceeds this
+        weld (str, optional): Deduplicate vertices by "vtx_id" or by quantized "attributes"
+        weld_tolerance (float): Quantization step used by attribute welding
+        backend (str): Mesh builder backend: "sdk" (Autodesk FBX SDK), "native" (binary FBX writer
+            without the SDK) or "memory" (keeps the arrays in memory, nothing is written)
+        use_cache (bool): Load parsed columns from / store them in the on-disk parse cache (up to
+            2 GB under ~/.cache/csv2fbx by default; the batch CLI turns it on)
+        profile (ConversionProfile, optional): Collects per-stage timings; a new one is created
+            when omitted. Either way it is available as self.last_profile afterwards
+        group_id (int, optional): Column index of a draw / material / submesh ID; every distinct
+            value becomes its own mesh node named <file>_<id>
+        group_jobs (int, optional): Threads used to prepare the groups (default: CPU count)
+        optimize (str, optional): Reorder triangles and vertices before writing: "vertex_cache"
+            for post-transform cache locality, "overdraw" to also sort triangle clusters outside-in
+        cache_size (int): Simulated vertex cache size used by optimize and its ACMR/ATVR report
+        cache_stats (bool): With optimize, simulate the vertex cache before and after and log the
+            ACMR/ATVR of every part (costs about as much again as a vertex_cache reorder)
+        dedup_layers (bool): Write every UV / normal / tangent / color layer as its unique values
+            plus an index array instead of one value per vertex (with stream, the rows are read in
+            chunks into the whole arrays first)
+        dedup_tolerance (float, optional): Quantization step for dedup_layers; exact match when omitted
+        lod_count (int): Extra levels of detail to generate by quadric edge collapse; the meshes are
+            written as sibling nodes <name>_LOD0..<name>_LOD<lod_count>. Implies weld="attributes"
+            when no weld mode is given
+        lod_ratio (float): Triangle count of each LOD relative to the previous one
+        derive_normals (str, optional): Compute smooth normals from the geometry: "missing" when no
+            normal column is mapped, "always" to replace the captured normals
+        derive_tangents (str, optional): Compute MikkTSpace-style tangents (with handedness) from
+            positions, normals and UV0: "missing" or "always", like derive_normals
+        normal_weighting (str): "angle" or "area" weighting of face normals for derive_normals
+        hard_edge_angle (float, optional): Faces meeting at more than this many degrees do not share
+            derived normals (the vertices are split); smooth everywhere when omitted
+        validate (str, optional): Check the parsed rows before anything is built. Short rows,
+            non-numeric or non-finite cells and invalid IDs are errors: "fail" stops with a report,
+            "drop" removes the triangles using them (and degenerate or incomplete triangles),
+            "clamp" / "zero" repair the values. None parses strictly and skips the checks
+        output_format (str): "fbx", or "glb" to write binary glTF 2.0 straight from the arrays (backend
+            and as_ascii then do not apply); fbx_path is used as given
+        gltf_layout (str): GLB vertex buffers: "interleaved" (one buffer per mesh) or "planar"
+            (one buffer per attribute)
+        """
+        guard = MemoryGuard(memory_limit_mb)
+        self.last_profile = profile if profile is not None else ConversionProfile()
+        self.last_validation = None
+        builder = None
+        try:
+            # Validate required parameters
+            if not use_position:
+                self.log_message("Error: Position data is required for FBX conversion")
+                return False
+            if output_format not in OUTPUT_FORMATS:
+                self.log_message(f"Error: Unknown output format '{output_format}'")
+                return False
+            if output_format == "glb" and gltf_layout not in LAYOUTS:
+                self.log_message(f"Error: Unknown glTF buffer layout '{gltf_layout}'")
+                return False
+
+            column_map = csv_column_map(vtx_id, vertex_id, normal_id, uv_id, tangent_id, color_id, uv2_id,
+                                        use_vtx_id, use_normal, use_uv1, group_id)
+
+            if lod_count and not weld:
+                self.log_message("LOD generation needs shared vertices; welding by attributes")
+                weld = "attributes"
+
+            mesh_name = os.path.splitext(os.path.basename(csv_path))[0]
+
+            derive = derive_normals or derive_tangents
+            if (stream and not weld and group_id is None and not optimize and not derive and not dedup_layers
+                    and validate != "drop"):
+                self.log_message("Creating FBX scene")
+                builder = self.collector or self.create_mesh_builder(backend, output_format, gltf_layout)
+                self.log_message(f"Streaming CSV file: {csv_path} ({chunk_rows} rows per chunk)")
+                count = self.stream_mesh_data(csv_path, column_map, builder, mesh_name, chunk_rows, guard,
+                                              validate)
+                if count == 0:
+                    self.log_message("Error: CSV file is empty or has invalid format")
+                    return False
+                self.log_message(f"Streamed {count} rows")
+                self.set_mesh_polygon(np.arange(count), builder)
+                builder.end_mesh()
+            else:
+                if stream:
+                    # 焊接、分组、三角形重排和图层去重需要完整数组：分块读入预分配的最终缓冲区
+                    self.log_message(f"Streaming CSV file: {csv_path} ({chunk_rows} rows per chunk)")
+                    def on_chunk(done, total):
+                        guard.check(f"streaming rows {done}/{total}")
+                        self.report_progress("parse", done, total)
+
+                    with self.stage("parse") as stats:
+                        csv_data = read_csv_columns_streamed(csv_path, column_map, chunk_rows, on_chunk,
+                                                             tolerant=bool(validate))
+                        stats.elements += len(csv_data)
+                else:
+                    # Read only the mapped columns
+                    self.log_message(f"Reading CSV file: {csv_path}")
+                    with self.stage("parse") as stats:
+                        csv_data = self.read_csv_columns(csv_path, column_map, use_cache, tolerant=bool(validate))
+                        stats.elements += len(csv_data) if csv_data else 0
+
+                if not csv_data:
+                    self.log_message("Error: CSV file is empty or has invalid format")
+                    return False
+                guard.check("CSV parsing")
+
+                # 在创建场景之前校验，坏文件不做任何 SDK 工作就失败
+                if validate:
+                    self.report_progress("validate", 0, 1)
+                    csv_data = self.validate_capture(csv_data, validate)
+                    if csv_data is None:
+                        return False
+                    if not csv_data:
+                        self.log_message("Error: No valid rows left after validation")
+                        return False
+                    self.report_progress("validate", 1, 1)
+
+                # Set mesh data
+                self.log_message(f"Processing {len(csv_data)} vertices")
+
+                if group_id is not None:
+                    self.report_progress("group", 0, len(csv_data))
+                    with self.stage("group", len(csv_data)):
+                        parts = self.split_groups(csv_data, mesh_name, weld, weld_tolerance, group_jobs)
+                    self.report_progress("group", 1, 1)
+                elif weld:
+                    self.report_progress("weld", 0, len(csv_data))
+                    with self.stage("weld", len(csv_data)):
+                        csv_data, indices = self.weld_vertices(csv_data, weld, weld_tolerance)
+                    self.report_progress("weld", 1, 1)
+                    parts = [(mesh_name, csv_data, indices)]
+                else:
+                    parts = [(mesh_name, csv_data, np.arange(len(csv_data)))]
+
+                if derive:
+                    self.report_progress("derive", 0, 1)
+                    with self.stage("derive", sum(len(indices) // 3 for _, _, indices in parts)):
+                        parts = self.derive_attributes(parts, derive_normals, derive_tangents, normal_weighting,
+                                                       hard_edge_angle)
+                    self.report_progress("derive", 1, 1)
+
+                if lod_count:
+                    self.report_progress("lod", 0, 1)
+                    with self.stage("lod", sum(len(indices) // 3 for _, _, indices in parts)):
+                        parts = self.generate_lod_parts(parts, lod_count, lod_ratio)
+                    self.report_progress("lod", 1, 1)
+
+                if optimize:
+                    if not weld:
+                        self.log_message("Note: without welding every row is its own vertex; "
+                                         "only the triangle order can change")
+                    self.report_progress("optimize", 0, len(csv_data))
+                    with self.stage("optimize", len(csv_data)):
+                        parts = self.optimize_parts(parts, optimize, cache_size, cache_stats)
+                    self.report_progress("optimize", 1, 1)
+
+                # 原始列数据已拆分到各个部分，写入 mesh 后即可释放
+                csv_data = None
+                self.log_message("Creating FBX scene")
+                builder = self.collector or self.create_mesh_builder(backend, output_format, gltf_layout)
+                self.build_meshes(parts, builder, bool(weld), chunk_rows, dedup_layers, dedup_tolerance)
+                parts = None
+            guard.check("mesh building")
+
+            # Save FBX file
+            if builder is self.collector:
+                # 合并模式：网格留在收集器中，所有文件处理完后一起写出
+                self.log_message(f"Collected the meshes of {mesh_name}")
+            else:
+                self.log_message(f"Saving {output_format.upper()} file: {fbx_path}")
+                self.report_progress("save", 0, 1)
+                with self.stage("save_scene"):
+                    builder.save(fbx_path, as_ascii)
+                self.report_progress("save", 1, 1)
+                guard.check("saving")
+
+            self.last_profile.finish()
+            self.log_message("Stage timings:\n" + self.last_profile.format_table())
+            self.log_message(f"Peak memory: {guard.peak_mb:.0f} MB" if guard.peak_mb else
+                             "Peak memory: unavailable")
+            self.log_message("Conversion completed successfully")
+            return True
+
+        except Exception as e:
+            self.log_message(f"Error converting CSV to FBX: {str(e)}")
+            traceback.print_exc()
+            return False
+
+        finally:
+            # 无论成功、提前返回还是出错都释放场景
+            if builder is not None:
+                builder.close()
+
+    def merge_to_scene(self, csv_paths, fbx_path, instance=True, **options):
+        """
+        Convert every CSV of csv_paths with the csv_to_fbx options and write
+        all their meshes into one scene at fbx_path (one node per mesh, named
+        like the single-file outputs).
+
+        With instance set, meshes whose attribute arrays hash the same are
+        written once and shared by several nodes, and a CSV with the same
+        content as an earlier one is not parsed again. Stops at the first file
+        that fails. The counts end up in self.last_merge.
+        """
+        defaults = inspect.signature(self.csv_to_fbx).parameters
+        backend, as_ascii, output_format, gltf_layout = (
+            options.get(name, defaults[name].default) for name in ("backend", "as_ascii", "output_format",
+                                                                    "gltf_layout"))
+        self.last_merge = None
+        recorder = InstancingRecorder(self.log_message, instance)
+        # 文件内容哈希 -> 该文件生成的 (节点名后缀, 网格编号)
+        seen = {}
+        self.collector = recorder
+        try:
+            for number, csv_path in enumerate(csv_paths, 1):
+                mesh_name = os.path.splitext(os.path.basename(csv_path))[0]
+                digest = content_hash(csv_path) if instance else None
+                if digest in seen:
+                    for suffix, mesh in seen[digest]:
+                        recorder.add_instance(mesh_name + suffix, mesh)
+                    self.log_message(f"[{number}/{len(csv_paths)}] {csv_path}: same content as an earlier file")
+                    continue
+                self.log_message(f"[{number}/{len(csv_paths)}] {csv_path}")
+                start = len(recorder.nodes)
+                if not self.csv_to_fbx(csv_path, fbx_path, **options):
+                    self.log_message(f"Error: Merging stopped at {csv_path}")
+                    return False
+                if digest is not None:
+                    # 组 / LOD 节点名都以文件名开头，内容相同的文件换上自己的文件名
+                    seen[digest] = [(name[len(mesh_name):], mesh) for name, mesh in recorder.nodes[start:]]
+        finally:
+            self.collector = None
+
+        self.last_merge = {"files": len(csv_paths), "nodes": len(recorder.nodes), "meshes": len(recorder.meshes)}
+        self.log_message(f"Merged {len(csv_paths)} files into {len(recorder.nodes)} nodes sharing "
+                         f"{len(recorder.meshes)} meshes")
+        builder = None
+        try:
+            builder = self.create_mesh_builder(backend, output_format, gltf_layout)
+            recorder.replay(builder)
+            recorder = None
+            self.log_message(f"Saving {output_format.upper()} file: {fbx_path}")
+            builder.save(fbx_path, as_ascii)
+            return True
+        except Exception as e:
+            self.log_message(f"Error writing merged scene: {str(e)}")
+            traceback.print_exc()
+            return False
+        finally:
+            if builder is not None:
+                builder.close()
+
+    def verify_export(self, csv_path, fbx_path, sample=None, seed=0, reader="native", tolerances=None, **options):
+        """
+        Read fbx_path (.fbx or .glb) back and compare it with csv_path parsed
+        with the csv_to_fbx options that wrote it. sample checks only that
+        fraction of the triangles (picked with seed); reader "sdk" loads FBX
+        through the FBX SDK instead of our binary reader; tolerances overrides
+        per-attribute entries of verify.DEFAULT_TOLERANCES. Returns the
+        VerifyReport, or None when either file could not be read.
+        """
+        from verify import read_exported, verify_scene  # 只有校验输出时才需要
+
+        parameters = inspect.signature(self.csv_to_fbx).parameters
+        options = {name: options.get(name, parameter.default) for name, parameter in parameters.items()
+                   if parameter.default is not inspect.Parameter.empty}
+        self.log_message(f"Verifying {fbx_path} against {csv_path}")
+        try:
+            meshes, nodes = read_exported(fbx_path, reader)
+        except Exception as e:
+            self.log_message(f"Error reading {fbx_path}: {str(e)}")
+            return None
+
+        csv_data = self.read_csv_columns(csv_path, csv_column_map(**options), options["use_cache"],
+                                         tolerant=bool(options["validate"]))
+        if not csv_data:
+            self.log_message("Error: CSV file is empty or has invalid format")
+            return None
+        if options["validate"]:
+            # 与转换时相同的校验策略，丢弃 / 修复的行与写出的文件一致
+            csv_data, _ = validate_columns(csv_data, options["validate"])
+
+        mesh_name = os.path.splitext(os.path.basename(csv_path))[0]
+        unit_vectors = os.path.splitext(fbx_path)[1].lower() == ".glb"
+        report = verify_scene(csv_data, meshes, nodes, mesh_name, options, fbx_path, sample, seed, tolerances,
+                              unit_vectors)
+        for line in report.describe():
+            self.log_message(line)
+        return report
+
+    def log_message(self, message):
+        # This will be overridden by the GUI class
+        print(message)
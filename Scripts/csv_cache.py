@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+from csv_ingest import concat_issues, count_rows, gather_columns, parse_rows, parse_table, plan_columns, read_header
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+_HASH_BLOCK = 1 << 22
+
+
+def default_cache_dir():
+    if os.environ.get("CSV2FBX_CACHE_DIR"):
+        return os.environ["CSV2FBX_CACHE_DIR"]
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "csv2fbx", "parsed")
+
+
+def content_hash(file_path):
+    """Hex digest of the file content (SHA-1 is hardware accelerated on most CPUs)"""
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as csvfile:
+        for block in iter(lambda: csvfile.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CsvCache:
+    """
+    On-disk cache of parsed CSV columns.
+
+    Each CSV file gets an entry directory keyed by its path, size, mtime and
+    content hash. Every parsed CSV column is stored as its own float64 .npy
+    file, so a later run with a different column mapping reuses the columns it
+    shares and only parses the rest. Hits are memory-mapped and every mapped
+    column is copied once into its attribute array (in the same dtypes as a
+    fresh parse), so a hit still reads all the columns the mapping uses, but only
+    those. Entries are evicted least-recently-used once the cache grows past
+    max_bytes.
+
+    csv_to_fbx only uses the cache with use_cache=True; the batch CLI turns it
+    on (unless --no-cache), library and GUI callers write nothing to disk.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, verify_content=False):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.verify_content = verify_content
+        self.hits = 0
+        self.misses = 0
+
+    def _stat_index_path(self, stat_key):
+        return os.path.join(self.cache_dir, "index", stat_key + ".json")
+
+    def entry_key(self, file_path):
+        """Return the entry key for file_path, hashing its content only when needed"""
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        stat_key = hashlib.blake2b(f"{file_path}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8"),
+                                   digest_size=16).hexdigest()
+        index_path = self._stat_index_path(stat_key)
+
+        digest = None
+        if not self.verify_content and os.path.exists(index_path):
+            # 路径、大小、修改时间都没变时直接复用记录的内容哈希
+            try:
+                with open(index_path, "r", encoding="utf-8") as index_file:
+                    digest = json.load(index_file)["content_hash"]
+            except (OSError, ValueError, KeyError):
+                digest = None
+        if digest is None:
+            digest = content_hash(file_path)
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            self._write_json(index_path, {"path": file_path, "content_hash": digest})
+        return hashlib.blake2b(f"{stat_key}|{digest}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, "entries", key)
+
+    @staticmethod
+    def _write_json(path, data):
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as temp_file:
+            json.dump(data, temp_file)
+        os.replace(temp_path, path)
+
+    def load_columns(self, key, columns):
+        """Return {column: memmapped array} for the cached subset of columns"""
+        entry_dir = self._entry_dir(key)
+        found = {}
+        for column in columns:
+            path = os.path.join(entry_dir, f"col_{column:04d}.npy")
+            if os.path.exists(path):
+                try:
+                    found[column] = np.load(path, mmap_mode="r")
+                except (OSError, ValueError):
+                    pass
+        if found:
+            # 用目录的修改时间记录最近使用时间，供 LRU 淘汰
+            os.utime(entry_dir)
+        return found
+
+    def store_columns(self, key, columns):
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        for column, values in columns.items():
+            path = os.path.join(entry_dir, f"col_{column:04d}.npy")
+            temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(temp_path, "wb") as temp_file:
+                np.save(temp_file, np.ascontiguousarray(values, dtype=np.float64))
+            # 多个批处理进程可能同时写同一条目，os.replace 保证原子替换
+            os.replace(temp_path, path)
+        os.utime(entry_dir)
+        self.evict()
+
+    def read(self, file_path, column_map, on_chunk=None, tolerant=False):
+        """
+        Cached equivalent of csv_ingest.read_csv_columns: columns already in the
+        cache are memory-mapped and copied into the attribute arrays, the rest
+        are parsed once and added. on_chunk
+        reports parse progress as in read_csv_columns. With tolerant set, bad
+        cells are parsed as NaN and listed in the result's issues; such files
+        are not cached, so their issues are found again on the next read.
+        """
+        header = read_header(file_path)
+        usecols, layout = plan_columns(column_map, len(header))
+        key = self.entry_key(file_path)
+
+        cached = self.load_columns(key, usecols)
+        missing = tuple(column for column in usecols if column not in cached)
+        issues = {} if tolerant else None
+        if missing:
+            self.misses += 1
+            with open(file_path, "r") as csvfile:
+                next(csvfile)  # Skip header row
+                if on_chunk is not None or tolerant:
+                    table = parse_table(csvfile, missing, count_rows(file_path), on_chunk=on_chunk, issues=issues)
+                else:
+                    table = parse_rows(csvfile, missing)
+            parsed = {column: table[:, i] for i, column in enumerate(missing)}
+            if not issues:
+                self.store_columns(key, parsed)
+            cached.update(parsed)
+        else:
+            self.hits += 1
+
+        data = gather_columns(cached, usecols, layout)
+        if issues:
+            data.issues = concat_issues(issues)
+        return data
+
+    def entries(self):
+        """(last_used, size_bytes, path) for every cache entry, oldest first"""
+        root = os.path.join(self.cache_dir, "entries")
+        if not os.path.isdir(root):
+            return []
+        found = []
+        for name in os.listdir(root):
+            entry_dir = os.path.join(root, name)
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_dir) if entry.is_file())
+                found.append((os.stat(entry_dir).st_mtime, size, entry_dir))
+            except OSError:
+                continue
+        return sorted(found)
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry_dir in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Process-wide cache; disabled (None) when CSV2FBX_NO_CACHE is set"""
+    global _default_cache
+    if os.environ.get("CSV2FBX_NO_CACHE"):
+        return None
+    if _default_cache is None:
+        max_mb = os.environ.get("CSV2FBX_CACHE_MAX_MB")
+        _default_cache = CsvCache(max_bytes=int(max_mb) * 1024 * 1024 if max_mb else DEFAULT_MAX_BYTES)
+    return _default_cache
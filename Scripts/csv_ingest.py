@@ -0,0 +1,368 @@
+import itertools
+import warnings
+
+import numpy as np
+
+# 属性名 -> (分量数, dtype)
+ATTRIBUTES = {
+    "vtx_id": (1, np.int64),
+    "position": (3, np.float64),
+    "normal": (3, np.float32),
+    "uv0": (2, np.float32),
+    "tangent": (3, np.float32),
+    "color": (4, np.float32),
+    "uv1": (2, np.float32),
+    "group": (1, np.int64),
+}
+
+# 单列整数编号属性，读取为一维数组，不参与属性焊接
+ID_ATTRIBUTES = ("vtx_id", "group")
+
+# 宽松解析记录的问题类型
+PARSE_ISSUES = ("short_row", "non_numeric")
+
+
+def build_column_map(vtx_id=None, vertex_id=None, normal_id=None, uv_id=None,
+                     tangent_id=None, color_id=None, uv2_id=None, group_id=None):
+    """把 csv_to_fbx 的列参数转换为 {属性名: 起始列}，None 表示不读取该属性"""
+    column_map = {
+        "vtx_id": vtx_id,
+        "position": vertex_id,
+        "normal": normal_id,
+        "uv0": uv_id,
+        "tangent": tangent_id,
+        "color": color_id,
+        "uv1": uv2_id,
+        "group": group_id,
+    }
+    return {name: start for name, start in column_map.items() if start is not None}
+
+
+def read_header(file_path):
+    """读取表头，返回列名列表"""
+    with open(file_path, "r") as csvfile:
+        line = csvfile.readline()
+    return [name.strip() for name in line.rstrip("\r\n").split(",")]
+
+
+def plan_columns(column_map, column_count):
+    """
+    Work out which CSV columns to parse and where each attribute lands.
+
+    Returns (usecols, layout): usecols is the sorted tuple of CSV columns handed
+    to the parser, layout maps attribute name -> (offset into usecols, width).
+    The colour alpha channel is optional: when the file has no column for it,
+    the colour is read as RGB and alpha is filled with 1.0 later.
+    """
+    wanted = {}
+    for name, start in column_map.items():
+        width = ATTRIBUTES[name][0]
+        if name == "color" and start + 3 >= column_count:
+            width = 3
+        if start < 0 or start + width > column_count:
+            raise ValueError(f"Columns {start}..{start + width - 1} for '{name}' are out of range "
+                             f"(the file has {column_count} columns)")
+        wanted[name] = (start, width)
+
+    usecols = sorted({start + k for start, width in wanted.values() for k in range(width)})
+    position = {col: i for i, col in enumerate(usecols)}
+    layout = {name: (position[start], width) for name, (start, width) in wanted.items()}
+    return tuple(usecols), layout
+
+
+def parse_rows(lines, usecols):
+    """Parse an iterable of CSV text lines into a (rows, len(usecols)) float64 table"""
+    with warnings.catch_warnings():
+        # loadtxt 在没有数据行时会发出警告，空表由调用方处理
+        warnings.simplefilter("ignore", UserWarning)
+        return np.loadtxt(lines, delimiter=",", usecols=usecols, dtype=np.float64,
+                          ndmin=2, comments=None)
+
+
+def parse_rows_tolerant(lines, usecols):
+    """
+    Like parse_rows, but missing and non-numeric cells become NaN instead of
+    raising. Returns (table, issues) where issues maps "short_row" /
+    "non_numeric" to the table rows affected.
+
+    The fast parser is tried first; only a block it rejects is parsed again
+    line by line.
+    """
+    lines = list(lines)
+    try:
+        return parse_rows(lines, usecols), {}
+    except ValueError:
+        pass
+
+    needed = max(usecols) + 1 if usecols else 0
+    rows = []
+    issues = {kind: [] for kind in PARSE_ISSUES}
+    for line in lines:
+        # 与 loadtxt 一致：跳过空行
+        if not line.strip():
+            continue
+        cells = line.rstrip("\r\n").split(",")
+        row = np.full(len(usecols), np.nan)
+        bad_cell = False
+        for i, column in enumerate(usecols):
+            if column < len(cells):
+                try:
+                    row[i] = float(cells[column])
+                except ValueError:
+                    bad_cell = True
+        if len(cells) < needed:
+            issues["short_row"].append(len(rows))
+        elif bad_cell:
+            issues["non_numeric"].append(len(rows))
+        rows.append(row)
+
+    table = np.array(rows, dtype=np.float64).reshape(len(rows), len(usecols))
+    return table, {kind: np.asarray(found, dtype=np.int64) for kind, found in issues.items() if found}
+
+
+def merge_issues(issues, found, offset):
+    """Add the rows in found (relative to offset) to the per-kind lists in issues"""
+    for kind, rows in found.items():
+        issues.setdefault(kind, []).append(rows + offset)
+
+
+def concat_issues(issues):
+    return {kind: np.concatenate(rows) for kind, rows in issues.items()}
+
+
+def parse_table(csvfile, usecols, total, chunk_rows=65536, on_chunk=None, issues=None):
+    """
+    Parse the remaining lines of csvfile into a preallocated table of at most
+    total rows, chunk_rows lines at a time, calling on_chunk(rows_done, total)
+    after every chunk. Blank lines inside the data make the table shorter.
+
+    With an issues dict, bad cells are parsed as NaN (see parse_rows_tolerant)
+    and the rows are collected in issues as kind -> list of row arrays.
+    """
+    table = np.empty((total, len(usecols)), dtype=np.float64)
+    offset = 0
+    while True:
+        lines = list(itertools.islice(csvfile, chunk_rows))
+        if not lines:
+            break
+        if issues is None:
+            chunk = parse_rows(lines, usecols)
+        else:
+            chunk, found = parse_rows_tolerant(lines, usecols)
+            merge_issues(issues, found, offset)
+        if offset + len(chunk) > total:
+            raise ValueError(f"CSV file has more rows than the {total} counted")
+        table[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+        if on_chunk is not None:
+            on_chunk(offset, total)
+    return table[:offset]
+
+
+def split_columns(table, layout):
+    """Slice the parsed table into one contiguous array per attribute"""
+    arrays = {}
+    for name, (offset, width) in layout.items():
+        dtype = ATTRIBUTES[name][1]
+        if name in ID_ATTRIBUTES:
+            # NaN 转整数得到负数，由校验阶段报告
+            with np.errstate(invalid="ignore"):
+                arrays[name] = table[:, offset].astype(dtype)
+            continue
+        values = np.ascontiguousarray(table[:, offset:offset + width], dtype=dtype)
+        if name == "color" and width == 3:
+            alpha = np.ones((len(values), 1), dtype=dtype)
+            values = np.hstack([values, alpha])
+        arrays[name] = values
+    return CsvColumns(arrays, len(table))
+
+
+def gather_columns(columns, usecols, layout):
+    """
+    Like split_columns, but from {CSV column: 1-D array} (e.g. memory-mapped
+    cache files): each column is copied once, straight into its attribute
+    array, without building the float64 table first.
+    """
+    count = len(next(iter(columns.values()))) if columns else 0
+    arrays = {}
+    for name, (offset, width) in layout.items():
+        dtype = ATTRIBUTES[name][1]
+        if name in ID_ATTRIBUTES:
+            with np.errstate(invalid="ignore"):
+                arrays[name] = np.asarray(columns[usecols[offset]]).astype(dtype)
+            continue
+        values = np.empty((count, 4 if name == "color" else width), dtype=dtype)
+        for k in range(width):
+            values[:, k] = columns[usecols[offset + k]]
+        if name == "color" and width == 3:
+            values[:, 3] = 1.0
+        arrays[name] = values
+    return CsvColumns(arrays, count)
+
+
+def read_csv_columns(file_path, column_map, on_chunk=None, chunk_rows=65536, tolerant=False):
+    """
+    Read only the mapped columns of a CSV file into NumPy arrays.
+
+    The first row is treated as a header and skipped. Raises ValueError when a
+    mapped column is out of range or a mapped cell is not numeric. With
+    on_chunk set the rows are parsed chunk_rows at a time and on_chunk(rows_done,
+    total) reports progress after every chunk. With tolerant set, short rows
+    and non-numeric cells are read as NaN and listed in the result's issues.
+    """
+    header = read_header(file_path)
+    usecols, layout = plan_columns(column_map, len(header))
+    chunked = on_chunk is not None or tolerant
+    total = count_rows(file_path) if chunked else None
+    issues = {} if tolerant else None
+    with open(file_path, "r") as csvfile:
+        next(csvfile)  # Skip header row
+        if chunked:
+            table = parse_table(csvfile, usecols, total, chunk_rows, on_chunk, issues)
+        else:
+            table = parse_rows(csvfile, usecols)
+    data = split_columns(table, layout)
+    if issues:
+        data.issues = concat_issues(issues)
+    return data
+
+
+def count_rows(file_path, block_size=1 << 24):
+    """
+    Count data rows (excluding the header) without parsing them.
+
+    Counts newlines block by block and ignores trailing blank lines, so it costs
+    one sequential read of the file and constant memory.
+    """
+    newlines = 0
+    tail = b""
+    with open(file_path, "rb") as csvfile:
+        while True:
+            block = csvfile.read(block_size)
+            if not block:
+                break
+            newlines += block.count(b"\n")
+            tail = (tail + block)[-4096:]
+    stripped = tail.rstrip(b"\r\n\t ")
+    if not stripped:
+        return 0
+    # 文件末尾的空行不计入，最后一行没有换行符时补一行
+    lines = newlines - tail[len(stripped):].count(b"\n") + 1
+    return max(lines - 1, 0)
+
+
+def iter_csv_chunks(file_path, column_map, chunk_rows=65536, tolerant=False):
+    """
+    Stream the mapped columns of a CSV file as CsvColumns chunks of at most
+    chunk_rows rows. Only one chunk is alive at a time, so memory stays bounded
+    regardless of file size. With tolerant set, each chunk carries the issues
+    of its own rows (numbered from the start of the chunk).
+    """
+    header = read_header(file_path)
+    usecols, layout = plan_columns(column_map, len(header))
+    with open(file_path, "r") as csvfile:
+        next(csvfile)  # Skip header row
+        while True:
+            lines = itertools.islice(csvfile, chunk_rows)
+            issues = {}
+            if tolerant:
+                table, issues = parse_rows_tolerant(lines, usecols)
+            else:
+                table = parse_rows(lines, usecols)
+            if not len(table):
+                break
+            chunk = split_columns(table, layout)
+            chunk.issues = issues
+            yield chunk
+
+
+def read_csv_columns_streamed(file_path, column_map, chunk_rows=65536, on_chunk=None, tolerant=False):
+    """
+    Read the mapped columns chunk by chunk into preallocated arrays.
+
+    Peak memory is the final arrays plus one chunk. on_chunk(rows_done, total)
+    is called after every chunk, e.g. to enforce a memory ceiling. tolerant is
+    passed on to iter_csv_chunks.
+    """
+    total = count_rows(file_path)
+    arrays = {}
+    for name in column_map:
+        width, dtype = ATTRIBUTES[name]
+        arrays[name] = np.empty(total if name in ID_ATTRIBUTES else (total, width), dtype=dtype)
+
+    offset = 0
+    issues = {}
+    for chunk in iter_csv_chunks(file_path, column_map, chunk_rows, tolerant):
+        if offset + len(chunk) > total:
+            raise ValueError(f"CSV file has more rows than the {total} counted")
+        for name, values in chunk.arrays.items():
+            arrays[name][offset:offset + len(chunk)] = values
+        merge_issues(issues, chunk.issues, offset)
+        offset += len(chunk)
+        if on_chunk is not None:
+            on_chunk(offset, total)
+
+    if offset != total:
+        raise ValueError(f"Read {offset} rows but counted {total}; blank lines inside the data "
+                         f"are not supported in streaming mode")
+    return CsvColumns(arrays, total, concat_issues(issues))
+
+
+class CsvColumns:
+    """
+    Parsed attribute columns of a capture; missing attributes are None.
+
+    issues maps a PARSE_ISSUES kind to the rows a tolerant parse read as NaN.
+    """
+
+    def __init__(self, arrays, count, issues=None):
+        self.arrays = arrays
+        self.count = count
+        self.issues = issues or {}
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    def get(self, name):
+        return self.arrays.get(name)
+
+    @property
+    def vtx_id(self):
+        return self.arrays.get("vtx_id")
+
+    @property
+    def group(self):
+        return self.arrays.get("group")
+
+    @property
+    def position(self):
+        return self.arrays.get("position")
+
+    @property
+    def normal(self):
+        return self.arrays.get("normal")
+
+    @property
+    def uv0(self):
+        return self.arrays.get("uv0")
+
+    @property
+    def tangent(self):
+        return self.arrays.get("tangent")
+
+    @property
+    def color(self):
+        return self.arrays.get("color")
+
+    @property
+    def uv1(self):
+        return self.arrays.get("uv1")
+
+    def take(self, rows):
+        """返回只包含指定行（索引数组或切片）的新 CsvColumns"""
+        arrays = {name: values[rows] for name, values in self.arrays.items()}
+        count = len(next(iter(arrays.values()))) if arrays else 0
+        return CsvColumns(arrays, count)
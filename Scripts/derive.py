@@ -0,0 +1,165 @@
+"""
+Derived vertex attributes: smooth normals and MikkTSpace-style tangents
+computed from positions, UVs and the index buffer with NumPy only.
+
+Both work per triangle corner and then split vertices whose corners ended up
+with different values (hard edges, mirrored UVs), so they return new vertex
+rows and a new index buffer along with the attribute.
+"""
+import numpy as np
+
+from weld import weld_by_attributes
+
+NORMAL_WEIGHTINGS = ("angle", "area")
+# 每个位置最多分出的硬边簇数，其余的角合成一簇平滑（如堆在原点的剔除顶点）
+MAX_HARD_EDGE_CLUSTERS = 8
+
+
+def _corner_geometry(positions, triangles):
+    """Unnormalized face normals (length = 2 * area) and the interior angle of every corner"""
+    corners = positions[triangles]
+    face_normal = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    angles = np.empty(triangles.shape, dtype=np.float64)
+    for corner in range(3):
+        a = corners[:, (corner + 1) % 3] - corners[:, corner]
+        b = corners[:, (corner + 2) % 3] - corners[:, corner]
+        cosine = np.einsum("ij,ij->i", a, b) / np.maximum(
+            np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1), 1e-30)
+        angles[:, corner] = np.arccos(np.clip(cosine, -1.0, 1.0))
+    return face_normal, angles
+
+
+def _normalize(vectors):
+    length = np.linalg.norm(vectors, axis=1)
+    return vectors / np.where(length > 1e-30, length, 1.0)[:, None]
+
+
+def _split_vertices(corner_vertex, corner_values, tolerance=1e-5):
+    """
+    One vertex per distinct (original vertex, value) pair of the corners.
+
+    Returns (corner each new vertex was taken from, index buffer into the new
+    vertices).
+    """
+    # 顶点编号除以 tolerance 后仍是互不相同的整数，不会被量化合并
+    result = weld_by_attributes([corner_vertex.astype(np.float64), corner_values], tolerance)
+    return result.source_rows, result.indices
+
+
+def corner_normals(positions, indices, weighting="angle", hard_angle=None, position_tolerance=1e-6):
+    """
+    Smooth normal of every triangle corner.
+
+    Corners at the same position (within position_tolerance, so UV seams
+    still smooth) average the normals of the faces around them, weighted by
+    corner angle or face area. With hard_angle (degrees), the corners at one
+    position are first split into clusters: each round takes the first
+    unclustered corner as representative and gathers the corners whose face
+    is within hard_angle of its face, so the work stays linear in the corner
+    count. Corners left after MAX_HARD_EDGE_CLUSTERS rounds are smoothed
+    together. Normals are averaged within a cluster only.
+    """
+    if weighting not in NORMAL_WEIGHTINGS:
+        raise ValueError(f"Unknown normal weighting: {weighting}")
+    positions = np.asarray(positions, dtype=np.float64)
+    triangles = np.asarray(indices, dtype=np.int64)[:len(indices) // 3 * 3].reshape(-1, 3)
+    face_normal, angles = _corner_geometry(positions, triangles)
+    unit_normal = _normalize(face_normal)
+    if weighting == "angle":
+        weighted = unit_normal[:, None, :] * angles[:, :, None]
+    else:
+        weighted = np.repeat(face_normal[:, None, :] * 0.5, 3, axis=1)
+    weighted = weighted.reshape(-1, 3)
+
+    # 同一位置的角共享法线
+    position_id = weld_by_attributes([positions], position_tolerance).indices[triangles.ravel()]
+    group_count = int(position_id.max()) + 1 if len(position_id) else 0
+
+    if hard_angle is None:
+        sums = np.stack([np.bincount(position_id, weighted[:, k], minlength=group_count) for k in range(3)],
+                        axis=1)
+        return _normalize(sums[position_id])
+
+    # 硬边：每轮以各位置第一个未分簇的角为代表，面法线夹角在阈值内的角并入其簇
+    corner_face_normal = np.repeat(unit_normal, 3, axis=0)
+    cosine = np.cos(np.radians(hard_angle))
+    cluster = np.empty(len(position_id), dtype=np.int64)
+    # 按位置排好序，同一位置的角相邻
+    pending = np.argsort(position_id, kind="stable")
+    for _ in range(MAX_HARD_EDGE_CLUSTERS):
+        if not len(pending):
+            break
+        groups = position_id[pending]
+        starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+        representative = np.repeat(pending[starts], np.diff(np.append(starts, len(pending))))
+        join = (np.einsum("ij,ij->i", corner_face_normal[pending], corner_face_normal[representative]) >= cosine)
+        # 退化三角形的面法线为 0，代表自己总是入簇
+        join |= pending == representative
+        cluster[pending[join]] = representative[join]
+        pending = pending[~join]
+    # 剩下的角按位置合成一簇，簇号排在角编号之后
+    cluster[pending] = len(position_id) + position_id[pending]
+
+    size = len(position_id) + group_count
+    sums = np.stack([np.bincount(cluster, weighted[:, k], minlength=size) for k in range(3)], axis=1)
+    return _normalize(sums[cluster])
+
+
+def compute_normals(positions, indices, weighting="angle", hard_angle=None, position_tolerance=1e-6):
+    """
+    Per-vertex normals for a mesh: (source vertex rows, normals, new indices).
+
+    Vertices whose corners get different normals across a hard edge are
+    split; without hard_angle no vertex is split unless two of its corners
+    sit at different positions (which cannot happen).
+    """
+    indices = np.asarray(indices, dtype=np.int64)[:len(indices) // 3 * 3]
+    normals = corner_normals(positions, indices, weighting, hard_angle, position_tolerance)
+    corners, new_indices = _split_vertices(indices, normals)
+    return indices[corners], normals[corners], new_indices
+
+
+def compute_tangents(positions, normals, uvs, indices, tolerance=1e-6):
+    """
+    MikkTSpace-style tangents with handedness: (source vertex rows, (N, 4) tangents, new indices).
+
+    Every triangle's tangent and bitangent come from its UV derivatives; per
+    corner they are projected onto the plane of the corner normal, weighted by
+    the corner angle and summed over all corners with the same position,
+    normal, UV and handedness (so unwelded captures smooth too). Corners of
+    one vertex with opposite handedness (mirrored UVs) get their own vertex.
+    The fourth component is the handedness sign.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    normals = np.asarray(normals, dtype=np.float64)
+    uvs = np.asarray(uvs, dtype=np.float64)
+    indices = np.asarray(indices, dtype=np.int64)[:len(indices) // 3 * 3]
+    triangles = indices.reshape(-1, 3)
+    _, angles = _corner_geometry(positions, triangles)
+
+    p = positions[triangles]
+    t = uvs[triangles]
+    edge1, edge2 = p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]
+    du1, dv1 = t[:, 1, 0] - t[:, 0, 0], t[:, 1, 1] - t[:, 0, 1]
+    du2, dv2 = t[:, 2, 0] - t[:, 0, 0], t[:, 2, 1] - t[:, 0, 1]
+    det = du1 * dv2 - du2 * dv1
+    # UV 面积为 0 的三角形不贡献切线
+    scale = np.divide(1.0, det, out=np.zeros_like(det), where=np.abs(det) > 1e-20)
+    face_tangent = (edge1 * dv2[:, None] - edge2 * dv1[:, None]) * scale[:, None]
+    face_bitangent = (edge2 * du1[:, None] - edge1 * du2[:, None]) * scale[:, None]
+
+    corner_normal = _normalize(normals[indices])
+    tangent = np.repeat(face_tangent, 3, axis=0)
+    bitangent = np.repeat(face_bitangent, 3, axis=0)
+    tangent = tangent - corner_normal * np.einsum("ij,ij->i", tangent, corner_normal)[:, None]
+    handedness = np.where(np.einsum("ij,ij->i", np.cross(corner_normal, tangent), bitangent) < 0, -1.0, 1.0)
+    weighted = _normalize(tangent) * angles.reshape(-1, 1)
+
+    # 按 (位置, 法线, UV, 手性) 累加；同一顶点手性不同时拆分
+    group = weld_by_attributes([positions[indices], corner_normal, uvs[indices], handedness], tolerance).indices
+    sums = np.stack([np.bincount(group, weighted[:, k]) for k in range(3)], axis=1)
+    corners, new_indices = _split_vertices(indices, handedness[:, None], 0.5)
+    tangent = sums[group[corners]]
+    normal = corner_normal[corners]
+    tangent -= normal * np.einsum("ij,ij->i", tangent, normal)[:, None]
+    return indices[corners], np.hstack([_normalize(tangent), handedness[corners, None]]), new_indices
@@ -0,0 +1,492 @@
+import struct
+import zlib
+
+import numpy as np
+
+FBX_VERSION = 7400
+
+_HEAD_MAGIC = b"Kaydara FBX Binary  \x00\x1a\x00"
+_NULL_RECORD = b"\x00" * 13
+# FBX SDK 会校验 FileId / CreationTime 与时间戳的对应关系，这里使用固定的一组值
+_FILE_ID = b"\x28\xb3\x2a\xeb\xb6\x24\xcc\xc2\xbf\xc8\xb0\x2a\xa9\x2b\xfc\xf1"
+_TIME_ID = "1970-01-01 10:00:00:000"
+_FOOT_ID = b"\xfa\xbc\xab\x09\xd0\xc8\xd4\x66\xb1\x76\xfb\x83\x1c\xf7\x26\x7e"
+_FOOT_MAGIC = b"\xf8\x5a\x8c\x6a\xde\xf5\xd9\x7e\xec\xe9\x0c\xe3\x75\x8f\x29\x0b"
+
+_ARRAY_CODES = {
+    np.dtype(np.float32): b"f",
+    np.dtype(np.float64): b"d",
+    np.dtype(np.int32): b"i",
+    np.dtype(np.int64): b"l",
+    np.dtype(np.bool_): b"b",
+}
+
+# 小于该字节数的数组不压缩，压缩收益抵不过开销
+COMPRESS_THRESHOLD = 1024
+
+
+class FbxElement:
+    """One node record of an FBX document: a name, typed properties and children"""
+
+    def __init__(self, name, *props):
+        self.name = name
+        self.props = list(props)
+        self.children = []
+
+    def add(self, name, *props):
+        child = FbxElement(name, *props)
+        self.children.append(child)
+        return child
+
+    def add_p(self, name, type_name, label, flags, *values):
+        """Append a Properties70 'P' entry"""
+        return self.add("P", name, type_name, label, flags, *values)
+
+    def find(self, name):
+        for child in self.children:
+            if child.name == name:
+                return child
+        return None
+
+
+class _EncodedArray:
+    def __init__(self, code, count, encoding, payload):
+        self.code = code
+        self.count = count
+        self.encoding = encoding
+        self.payload = payload
+
+
+def _encode_array(values, compress_level):
+    values = np.ascontiguousarray(values)
+    code = _ARRAY_CODES[values.dtype]
+    payload = values.astype(values.dtype.newbyteorder("<"), copy=False).tobytes()
+    if len(payload) >= COMPRESS_THRESHOLD and compress_level:
+        return _EncodedArray(code, values.size, 1, zlib.compress(payload, compress_level))
+    return _EncodedArray(code, values.size, 0, payload)
+
+
+def _encode_property(value):
+    if isinstance(value, _EncodedArray):
+        return (value.code + struct.pack("<III", value.count, value.encoding, len(value.payload))
+                + value.payload)
+    if isinstance(value, (bool, np.bool_)):
+        return b"C" + struct.pack("<?", bool(value))
+    if isinstance(value, np.int16):
+        return b"Y" + struct.pack("<h", value)
+    if isinstance(value, np.int64):
+        return b"L" + struct.pack("<q", value)
+    if isinstance(value, int):
+        return b"I" + struct.pack("<i", value)
+    if isinstance(value, np.float32):
+        return b"F" + struct.pack("<f", value)
+    if isinstance(value, float):
+        return b"D" + struct.pack("<d", value)
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+        return b"S" + struct.pack("<I", len(data)) + data
+    if isinstance(value, bytes):
+        return b"R" + struct.pack("<I", len(value)) + value
+    raise TypeError(f"Unsupported FBX property type: {type(value).__name__}")
+
+
+def _collect_arrays(element, found):
+    for i, value in enumerate(element.props):
+        if isinstance(value, np.ndarray):
+            found.append((element, i))
+    for child in element.children:
+        _collect_arrays(child, found)
+    return found
+
+
+def _write_element(out, element):
+    start = len(out)
+    out += b"\x00" * 12  # EndOffset / NumProperties / PropertyListLen，写完后回填
+    name = element.name.encode("ascii")
+    out += struct.pack("<B", len(name)) + name
+
+    props_start = len(out)
+    for value in element.props:
+        out += _encode_property(value)
+    props_length = len(out) - props_start
+
+    for child in element.children:
+        _write_element(out, child)
+    if element.children or not element.props:
+        out += _NULL_RECORD
+
+    struct.pack_into("<III", out, start, len(out), len(element.props), props_length)
+
+
+def encode_document(elements, compress_level=6, workers=None):
+    """
+    Serialize top-level elements into binary FBX bytes.
+
+    Every NumPy array property is deflated first; the arrays are compressed on a
+    thread pool because zlib releases the GIL, so large meshes use all cores.
+    """
+    from concurrent.futures import ThreadPoolExecutor  # 延迟导入，缩短无界面模式的启动时间
+
+    arrays = []
+    for element in elements:
+        _collect_arrays(element, arrays)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        encoded = list(executor.map(lambda slot: _encode_array(slot[0].props[slot[1]], compress_level),
+                                    arrays))
+    for (element, i), value in zip(arrays, encoded):
+        element.props[i] = value
+
+    out = bytearray(_HEAD_MAGIC)
+    out += struct.pack("<I", FBX_VERSION)
+    for element in elements:
+        _write_element(out, element)
+    out += _NULL_RECORD
+
+    out += _FOOT_ID
+    padding = ((len(out) + 15) & ~15) - len(out)
+    out += b"\x00" * (padding or 16)
+    out += struct.pack("<I", FBX_VERSION)
+    out += b"\x00" * 120
+    out += _FOOT_MAGIC
+    return bytes(out)
+
+
+class LayerData:
+    """
+    Values of one layer element.
+
+    mapping is "ByVertice" (one value per control point) or "ByPolygonVertex"
+    (one value per polygon corner). When index is given the element is written
+    IndexToDirect, otherwise Direct.
+    """
+
+    def __init__(self, values, mapping="ByVertice", index=None, name=""):
+        self.values = values
+        self.mapping = mapping
+        self.index = index
+        self.name = name
+
+    @property
+    def reference(self):
+        return "Direct" if self.index is None else "IndexToDirect"
+
+    def at_corners(self, indices, corners=None):
+        """Values at the polygon corners (positions in the index buffer indices; all when None)"""
+        corners = np.arange(len(indices)) if corners is None else corners
+        rows = indices[corners] if self.mapping == "ByVertice" else corners
+        if self.index is not None:
+            rows = np.asarray(self.index)[rows]
+        return np.asarray(self.values)[rows]
+
+
+def polygon_vertex_index(indices):
+    """Triangle index buffer -> FBX PolygonVertexIndex (last corner of each polygon is ~index)"""
+    triangles = np.asarray(indices, dtype=np.int32)[:len(indices) // 3 * 3].reshape(-1, 3).copy()
+    triangles[:, 2] = ~triangles[:, 2]
+    return triangles.ravel()
+
+
+class BinaryFbxWriter:
+    """
+    SDK-independent writer for binary FBX 7.4 scenes of static meshes.
+
+    add_geometry() / add_model() build the Objects and Connections sections
+    from in-memory arrays; save() encodes the document and writes it out.
+    """
+
+    def __init__(self, creator="CSV2FBX_Tool", compress_level=6, workers=None):
+        self.creator = creator
+        self.compress_level = compress_level
+        self.workers = workers
+        self.objects = FbxElement("Objects")
+        self.connections = FbxElement("Connections")
+        self.geometry_count = 0
+        self.model_count = 0
+        self._next_id = 1000000
+
+    def _new_id(self):
+        self._next_id += 1
+        return np.int64(self._next_id)
+
+    def _add_layer_element(self, geometry, element_name, data_name, layer, typed_index, component_count,
+                           index_name=None):
+        element = geometry.add(element_name, typed_index)
+        element.add("Version", 101)
+        element.add("Name", layer.name)
+        element.add("MappingInformationType", layer.mapping)
+        element.add("ReferenceInformationType", layer.reference)
+        values = np.asarray(layer.values, dtype=np.float64)
+        element.add(data_name, np.ascontiguousarray(values[:, :component_count]).ravel())
+        if layer.index is not None:
+            element.add(index_name, np.asarray(layer.index, dtype=np.int32))
+        return element
+
+    def add_geometry(self, name, positions, indices, normals=None, tangents=None, colors=None, uvs=()):
+        """
+        Add a Geometry object. positions is (N, 3), indices the triangle index
+        buffer, the attributes are LayerData or None and uvs a list of LayerData.
+        Returns the geometry id.
+        """
+        geometry_id = self._new_id()
+        geometry = self.objects.add("Geometry", geometry_id, f"{name}\x00\x01Geometry", "Mesh")
+        geometry.add("Properties70")
+        geometry.add("GeometryVersion", 124)
+        geometry.add("Vertices", np.asarray(positions, dtype=np.float64).ravel())
+        geometry.add("PolygonVertexIndex", polygon_vertex_index(indices))
+
+        layer_entries = []
+        if normals is not None:
+            self._add_layer_element(geometry, "LayerElementNormal", "Normals", normals, 0, 3, "NormalsIndex")
+            layer_entries.append(("LayerElementNormal", 0))
+        if tangents is not None:
+            element = self._add_layer_element(geometry, "LayerElementTangent", "Tangents", tangents, 0, 3,
+                                              "TangentsIndex")
+            values = np.asarray(tangents.values, dtype=np.float64)
+            w = values[:, 3] if values.shape[1] > 3 else np.ones(len(values))
+            element.add("TangentsW", np.ascontiguousarray(w))
+            layer_entries.append(("LayerElementTangent", 0))
+        if colors is not None:
+            self._add_layer_element(geometry, "LayerElementColor", "Colors", colors, 0, 4, "ColorIndex")
+            layer_entries.append(("LayerElementColor", 0))
+        uv_entries = []
+        for uv_index, uv in enumerate(uvs):
+            self._add_layer_element(geometry, "LayerElementUV", "UV", uv, uv_index, 2, "UVIndex")
+            uv_entries.append(uv_index)
+
+        # 第 0 层放法线/切线/颜色和第一组 UV，其余 UV 各占一层
+        for layer_index in range(max(1, len(uv_entries))):
+            layer = geometry.add("Layer", layer_index)
+            layer.add("Version", 100)
+            entries = layer_entries if layer_index == 0 else []
+            if layer_index < len(uv_entries):
+                entries = entries + [("LayerElementUV", uv_entries[layer_index])]
+            for type_name, typed_index in entries:
+                layer_element = layer.add("LayerElement")
+                layer_element.add("Type", type_name)
+                layer_element.add("TypedIndex", typed_index)
+
+        self.geometry_count += 1
+        return geometry_id
+
+    def add_model(self, name, geometry_id=None, parent_id=0, translation=None):
+        """Add a mesh Model (node) and connect it under parent_id (0 is the scene root)"""
+        model_id = self._new_id()
+        model = self.objects.add("Model", model_id, f"{name}\x00\x01Model", "Mesh" if geometry_id else "Null")
+        model.add("Version", 232)
+        properties = model.add("Properties70")
+        if translation is not None:
+            x, y, z = (float(v) for v in translation)
+            properties.add_p("Lcl Translation", "Lcl Translation", "", "A", x, y, z)
+        model.add("Shading", True)
+        model.add("Culling", "CullingOff")
+
+        self.connections.add("C", "OO", model_id, np.int64(parent_id))
+        if geometry_id is not None:
+            self.connections.add("C", "OO", np.int64(geometry_id), model_id)
+        self.model_count += 1
+        return model_id
+
+    def add_mesh(self, name, positions, indices, **attributes):
+        """Add a geometry plus the model that instances it; returns the model id"""
+        geometry_id = self.add_geometry(name, positions, indices, **attributes)
+        return self.add_model(name, geometry_id)
+
+    def _header_elements(self):
+        header = FbxElement("FBXHeaderExtension")
+        header.add("FBXHeaderVersion", 1003)
+        header.add("FBXVersion", FBX_VERSION)
+        header.add("EncryptionType", 0)
+        timestamp = header.add("CreationTimeStamp")
+        for key, value in (("Version", 1000), ("Year", 1970), ("Month", 1), ("Day", 1), ("Hour", 10),
+                           ("Minute", 0), ("Second", 0), ("Millisecond", 0)):
+            timestamp.add(key, value)
+        header.add("Creator", self.creator)
+
+        global_settings = FbxElement("GlobalSettings")
+        global_settings.add("Version", 1000)
+        properties = global_settings.add("Properties70")
+        for key, value in (("UpAxis", 1), ("UpAxisSign", 1), ("FrontAxis", 2), ("FrontAxisSign", 1),
+                           ("CoordAxis", 0), ("CoordAxisSign", 1), ("OriginalUpAxis", 1),
+                           ("OriginalUpAxisSign", 1)):
+            properties.add_p(key, "int", "Integer", "", value)
+        properties.add_p("UnitScaleFactor", "double", "Number", "", 1.0)
+        properties.add_p("OriginalUnitScaleFactor", "double", "Number", "", 1.0)
+
+        documents = FbxElement("Documents")
+        documents.add("Count", 1)
+        document = documents.add("Document", self._new_id(), "Scene", "Scene")
+        document.add("Properties70")
+        document.add("RootNode", np.int64(0))
+
+        definitions = FbxElement("Definitions")
+        definitions.add("Version", 100)
+        definitions.add("Count", 1 + self.model_count + self.geometry_count)
+        for type_name, count in (("GlobalSettings", 1), ("Model", self.model_count),
+                                 ("Geometry", self.geometry_count)):
+            if count:
+                definitions.add("ObjectType", type_name).add("Count", count)
+
+        return [header,
+                FbxElement("FileId", _FILE_ID),
+                FbxElement("CreationTime", _TIME_ID),
+                FbxElement("Creator", self.creator),
+                global_settings,
+                documents,
+                FbxElement("References"),
+                definitions]
+
+    def encode(self):
+        takes = FbxElement("Takes")
+        takes.add("Current", "")
+        elements = self._header_elements() + [self.objects, self.connections, takes]
+        return encode_document(elements, self.compress_level, self.workers)
+
+    def save(self, path):
+        data = self.encode()
+        with open(path, "wb") as fbx_file:
+            fbx_file.write(data)
+        return len(data)
+
+
+_SCALAR_CODES = {b"Y": "<h", b"C": "<?", b"I": "<i", b"F": "<f", b"D": "<d", b"L": "<q"}
+_ARRAY_DTYPES = {code: dtype.newbyteorder("<") for dtype, code in _ARRAY_CODES.items()}
+
+# 图层元素 -> (图层键, 数值名, 索引名, 分量数)
+_LAYER_ELEMENTS = {
+    "LayerElementNormal": ("normal", "Normals", "NormalsIndex", 3),
+    "LayerElementTangent": ("tangent", "Tangents", "TangentsIndex", 3),
+    "LayerElementColor": ("color", "Colors", "ColorIndex", 4),
+    "LayerElementUV": ("uv", "UV", "UVIndex", 2),
+}
+_MAPPINGS = {"ByVertice": "ByVertice", "ByVertex": "ByVertice", "ByControlPoint": "ByVertice",
+             "ByPolygonVertex": "ByPolygonVertex"}
+
+
+def _read_property(data, offset):
+    code = data[offset:offset + 1]
+    offset += 1
+    if code in _SCALAR_CODES:
+        fmt = _SCALAR_CODES[code]
+        return struct.unpack_from(fmt, data, offset)[0], offset + struct.calcsize(fmt)
+    if code in _ARRAY_DTYPES:
+        count, encoding, length = struct.unpack_from("<III", data, offset)
+        offset += 12
+        payload = data[offset:offset + length]
+        if encoding == 1:
+            payload = zlib.decompress(payload)
+        return np.frombuffer(payload, dtype=_ARRAY_DTYPES[code], count=count), offset + length
+    if code in (b"S", b"R"):
+        length = struct.unpack_from("<I", data, offset)[0]
+        value = data[offset + 4:offset + 4 + length]
+        return (value.decode("utf-8", "replace") if code == b"S" else value), offset + 4 + length
+    raise ValueError(f"Unsupported FBX property type {code!r} at byte {offset - 1}")
+
+
+def _read_element(data, offset, wide):
+    """(FbxElement or None for the null record that ends a list, offset after it)"""
+    header = "<QQQ" if wide else "<III"
+    end, count, _ = struct.unpack_from(header, data, offset)
+    offset += struct.calcsize(header)
+    name_length = data[offset]
+    if end == 0:
+        return None, offset + 1
+    element = FbxElement(data[offset + 1:offset + 1 + name_length].decode("ascii"))
+    offset += 1 + name_length
+    for _ in range(count):
+        value, offset = _read_property(data, offset)
+        element.props.append(value)
+    while offset < end:
+        child, offset = _read_element(data, offset, wide)
+        if child is None:
+            break
+        element.children.append(child)
+    return element, end
+
+
+def decode_document(data):
+    """Parse binary FBX bytes into (version, top-level FbxElements); the inverse of encode_document"""
+    if not data.startswith(_HEAD_MAGIC):
+        raise ValueError("Not a binary FBX file (ASCII FBX cannot be read back without the SDK)")
+    version = struct.unpack_from("<I", data, len(_HEAD_MAGIC))[0]
+    wide = version >= 7500
+    offset = len(_HEAD_MAGIC) + 4
+    elements = []
+    while offset < len(data):
+        element, offset = _read_element(data, offset, wide)
+        if element is None:
+            break
+        elements.append(element)
+    return version, elements
+
+
+def _object_name(value):
+    return value.split("\x00\x01")[0]
+
+
+def _read_layer(element, data_name, index_name, component_count):
+    values = element.find(data_name)
+    mapping = element.find("MappingInformationType")
+    if values is None or mapping is None or mapping.props[0] not in _MAPPINGS:
+        raise ValueError(f"Unsupported {element.name}: mapping "
+                         f"{mapping.props[0] if mapping is not None else None}")
+    values = values.props[0].reshape(-1, component_count)
+    if element.name == "LayerElementTangent" and element.find("TangentsW") is not None:
+        values = np.hstack([values, element.find("TangentsW").props[0].reshape(-1, 1)])
+    reference = element.find("ReferenceInformationType")
+    index = None
+    if reference is not None and reference.props[0] in ("IndexToDirect", "Index"):
+        index = element.find(index_name).props[0]
+    name = element.find("Name")
+    return LayerData(values, _MAPPINGS[mapping.props[0]], index, name.props[0] if name is not None else "")
+
+
+def read_meshes(path):
+    """
+    Read the triangle meshes of a binary FBX file back into the format of
+    RecordingMeshBuilder.meshes. Returns (meshes, nodes) with nodes a list of
+    (model name, mesh number); instanced geometry appears once in meshes.
+    Polygons other than triangles raise ValueError.
+    """
+    with open(path, "rb") as fbx_file:
+        data = fbx_file.read()
+    _, elements = decode_document(data)
+    objects = next((element for element in elements if element.name == "Objects"), FbxElement("Objects"))
+    connections = next((element for element in elements if element.name == "Connections"),
+                       FbxElement("Connections"))
+
+    meshes = []
+    geometry_numbers = {}
+    model_names = {}
+    for element in objects.children:
+        if element.name == "Model":
+            model_names[element.props[0]] = _object_name(element.props[1])
+        if element.name != "Geometry" or element.props[2] != "Mesh":
+            continue
+        positions = element.find("Vertices").props[0].reshape(-1, 3)
+        polygon_index = element.find("PolygonVertexIndex").props[0]
+        ends = np.flatnonzero(polygon_index < 0)
+        if len(ends) * 3 != len(polygon_index) or np.any(ends % 3 != 2):
+            raise ValueError(f"Geometry '{_object_name(element.props[1])}' has polygons other than triangles")
+        indices = np.where(polygon_index < 0, ~polygon_index, polygon_index).astype(np.int64)
+        layers = {}
+        for child in element.children:
+            if child.name not in _LAYER_ELEMENTS:
+                continue
+            key, data_name, index_name, component_count = _LAYER_ELEMENTS[child.name]
+            layer = _read_layer(child, data_name, index_name, component_count)
+            key = f"uv:{layer.name}" if key == "uv" else key
+            # 同类图层只取第一个（TypedIndex 0），与写入时一致
+            layers.setdefault(key, layer)
+        geometry_numbers[element.props[0]] = len(meshes)
+        meshes.append({"name": _object_name(element.props[1]),
+                       "vertex_count": len(positions),
+                       "positions": positions,
+                       "indices": indices,
+                       "layers": layers})
+
+    nodes = []
+    for connection in connections.children:
+        kind, child, parent = connection.props[:3]
+        if kind == "OO" and child in geometry_numbers and parent in model_names:
+            nodes.append((model_names[parent], geometry_numbers[child]))
+    return meshes, nodes
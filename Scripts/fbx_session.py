@@ -0,0 +1,100 @@
+import atexit
+import contextlib
+
+
+def import_sdk():
+    try:
+        import fbx  # 只有选择 SDK 后端时才加载 FBX SDK
+    except ImportError:
+        raise RuntimeError("The FBX SDK is not installed; use the native backend")
+    return fbx
+
+
+class FbxSession:
+    """
+    One FbxManager with its IOSettings and writer format lookups, reused for
+    many conversions.
+
+    Scenes are handed out fresh for every conversion and destroyed with it,
+    while the manager, IOSettings and the format indices found by scanning the
+    IO plugin registry live as long as the session. Use it as a context
+    manager (or call close()) to destroy the manager even when a conversion
+    raised.
+    """
+
+    def __init__(self, sdk=None):
+        self.fbx = sdk or import_sdk()
+        self.manager = self.fbx.FbxManager.Create()
+        self.io_settings = self.fbx.FbxIOSettings.Create(self.manager, self.fbx.IOSROOT)
+        self.manager.SetIOSettings(self.io_settings)
+        self.writer_formats = {}
+        self.scenes_created = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def writer_format(self, as_ascii=False):
+        """Writer format index for ASCII or binary FBX, looked up in the registry once"""
+        if as_ascii not in self.writer_formats:
+            formatIndex = -1  # -1: 按扩展名选择默认的二进制 FBX 写入器
+            if as_ascii:
+                registry = self.manager.GetIOPluginRegistry()
+                formatIndex = registry.GetNativeWriterFormat()
+                for i in range(0, registry.GetWriterFormatCount()):
+                    if registry.WriterIsFBX(i):
+                        description = registry.GetWriterFormatDescription(i)
+                        if 'ascii' in description:
+                            formatIndex = i
+                            break
+            self.writer_formats[as_ascii] = formatIndex
+        return self.writer_formats[as_ascii]
+
+    def create_scene(self, name="My Scene"):
+        self.scenes_created += 1
+        return self.fbx.FbxScene.Create(self.manager, name)
+
+    @contextlib.contextmanager
+    def scene(self, name="My Scene"):
+        """A fresh scene that is destroyed (with everything in it) when the block exits"""
+        scene = self.create_scene(name)
+        try:
+            yield scene
+        finally:
+            scene.Destroy()
+
+    def export(self, scene, path, as_ascii=False):
+        exporter = self.fbx.FbxExporter.Create(self.manager, '')
+        try:
+            if not exporter.Initialize(path, self.writer_format(as_ascii), self.io_settings):
+                raise Exception(f'Exporter failed to initialize. Error: {exporter.GetStatus().GetErrorString()}')
+            exporter.Export(scene)
+        finally:
+            exporter.Destroy()
+
+    def close(self):
+        if self.manager is not None:
+            self.manager.Destroy()
+            self.manager = None
+
+
+# 每个进程（批处理中即每个工作进程）每种 SDK 模块一个会话
+_sessions = {}
+
+
+def get_session(sdk=None):
+    """The calling process's shared session for sdk (default: the fbx module)"""
+    sdk = sdk or import_sdk()
+    session = _sessions.get(sdk.__name__)
+    if session is None or session.manager is None:
+        session = _sessions[sdk.__name__] = FbxSession(sdk)
+    return session
+
+
+@atexit.register
+def close_sessions():
+    for session in _sessions.values():
+        session.close()
+    _sessions.clear()
@@ -0,0 +1,316 @@
+"""
+SDK-independent writer for GLB (binary glTF 2.0) files of static meshes.
+
+Takes the same arrays the FBX backends get and writes them straight from
+memory: every vertex attribute is a float32 accessor, either planar (one
+bufferView per attribute) or interleaved (one structured array with a
+byteStride, filled column by column), and the triangle index buffer is
+uint16 or uint32. The JSON chunk is laid out first, so the binary chunk is
+written array by array without being assembled in memory.
+
+Values are written as captured, without an axis or UV flip, like the FBX
+output. Normals and tangent directions are normalized because glTF requires
+unit vectors.
+"""
+import json
+import struct
+
+import numpy as np
+
+from fbx_binary import LayerData
+
+GLB_MAGIC = b"glTF"
+GLB_VERSION = 2
+_CHUNK_JSON = 0x4E4F534A
+_CHUNK_BIN = 0x004E4942
+
+_FLOAT = 5126
+_UNSIGNED_SHORT = 5123
+_UNSIGNED_INT = 5125
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+_TRIANGLES = 4
+_TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4"}
+_COMPONENT_DTYPES = {5121: np.uint8, 5123: np.uint16, _UNSIGNED_INT: np.uint32, _FLOAT: np.float32}
+# 读回时的属性 -> RecordingMeshBuilder 的图层键
+_LAYER_KEYS = {"NORMAL": "normal", "TANGENT": "tangent", "COLOR_0": "color"}
+
+LAYOUTS = ("interleaved", "planar")
+
+
+def _padded(size):
+    return (size + 3) // 4 * 4
+
+
+def _vertex_values(layer, indices, vertex_count):
+    """
+    One value of layer per vertex, or None when a per-polygon-vertex layer
+    gives the corners of one vertex different values.
+    """
+    values = np.asarray(layer.values)
+    if layer.mapping == "ByVertice":
+        return values if layer.index is None else values[layer.index]
+    corner = values if layer.index is None else values[layer.index]
+    # 每个顶点取它的某一个角的值，再检查所有角是否一致
+    corner_of = np.zeros(vertex_count, dtype=np.int64)
+    corner_of[indices] = np.arange(len(indices))
+    per_vertex = corner[corner_of]
+    return per_vertex if np.array_equal(per_vertex[indices], corner) else None
+
+
+def _unit(vectors):
+    """vectors scaled to unit length; zero vectors stay zero. Already normalized input is not copied"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    lengths = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+    if np.all(np.abs(lengths - 1) <= 1e-4):
+        return vectors
+    return vectors / np.where(lengths > 0, lengths, 1)[:, None]
+
+
+def _tangents4(tangents):
+    """glTF TANGENT: unit xyz plus the handedness w = +/-1 (1 when the capture has no w)"""
+    tangents = np.asarray(tangents, dtype=np.float32)
+    result = np.empty((len(tangents), 4), dtype=np.float32)
+    result[:, :3] = _unit(tangents[:, :3])
+    result[:, 3] = np.where(tangents[:, 3] < 0, -1, 1) if tangents.shape[1] > 3 else 1
+    return result
+
+
+def _colors4(colors):
+    colors = np.asarray(colors, dtype=np.float32)
+    if colors.shape[1] >= 4:
+        return colors[:, :4]
+    return np.hstack([colors, np.ones((len(colors), 1), dtype=np.float32)])
+
+
+class GlbWriter:
+    """
+    Collects meshes with add_mesh() (one node each, more with add_instance())
+    and writes them as one GLB scene with save().
+
+    layout is "interleaved" (one vertex buffer per mesh, best for GPU upload)
+    or "planar" (one buffer per attribute, which lets float32 arrays be
+    written without any copy).
+    """
+
+    def __init__(self, layout="interleaved", generator="CSV2FBX_Tool"):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown glTF buffer layout '{layout}' (expected one of {', '.join(LAYOUTS)})")
+        self.layout = layout
+        self.generator = generator
+        # (名称, [(语义, 数组)], 三角形索引)
+        self.meshes = []
+        # (节点名称, 网格编号)
+        self.nodes = []
+
+    def add_mesh(self, name, positions, indices, normals=None, tangents=None, colors=None, uvs=()):
+        """
+        Add a mesh. positions is (N, 3), indices the triangle index buffer and
+        the attributes LayerData (as for BinaryFbxWriter) or None. Indexed or
+        per-polygon-vertex layers are expanded to one value per vertex; when
+        the corners of a vertex disagree, every corner becomes its own vertex.
+        """
+        positions = np.asarray(positions)
+        indices = np.asarray(indices)
+        indices = indices[:len(indices) // 3 * 3]
+        semantics = []
+        layers = []
+        for semantic, layer in [("NORMAL", normals), ("TANGENT", tangents), ("COLOR_0", colors)] + \
+                [(f"TEXCOORD_{i}", uv) for i, uv in enumerate(uvs)]:
+            if layer is not None:
+                semantics.append(semantic)
+                layers.append(layer)
+
+        values = [_vertex_values(layer, indices, len(positions)) for layer in layers]
+        if any(value is None for value in values):
+            # UV 在同一顶点的不同角取不同的值：按角拆分顶点
+            values = [layer.at_corners(indices) for layer in layers]
+            positions = positions[indices]
+            indices = np.arange(len(indices))
+
+        attributes = [("POSITION", positions[:, :3])]
+        for semantic, value in zip(semantics, values):
+            if semantic == "NORMAL":
+                value = _unit(value[:, :3])
+            elif semantic == "TANGENT":
+                value = _tangents4(value)
+            elif semantic == "COLOR_0":
+                value = _colors4(value)
+            else:
+                value = value[:, :2]
+            attributes.append((semantic, value))
+        self.meshes.append((name, attributes, indices))
+        self.nodes.append((name, len(self.meshes) - 1))
+        return len(self.meshes) - 1
+
+    def add_instance(self, name, mesh):
+        """Add another node that shares mesh (the number add_mesh returned)"""
+        self.nodes.append((name, mesh))
+
+    def _plan(self):
+        """The glTF document plus the arrays of the binary chunk, in order"""
+        document = {
+            "asset": {"version": "2.0", "generator": self.generator},
+            "scene": 0,
+            "scenes": [{"nodes": []}],
+            "nodes": [],
+            "meshes": [],
+            "accessors": [],
+            "bufferViews": [],
+        }
+        blobs = []
+        offset = 0
+
+        def add_view(array, target, stride=None):
+            nonlocal offset
+            view = {"buffer": 0, "byteOffset": offset, "byteLength": array.nbytes, "target": target}
+            if stride:
+                view["byteStride"] = stride
+            document["bufferViews"].append(view)
+            blobs.append(array)
+            offset += _padded(array.nbytes)
+            return len(document["bufferViews"]) - 1
+
+        def add_accessor(view, byte_offset, component_type, count, width, bounds=None):
+            accessor = {"bufferView": view, "componentType": component_type, "count": count,
+                        "type": _TYPES[width]}
+            if byte_offset:
+                accessor["byteOffset"] = byte_offset
+            if bounds is not None:
+                accessor["min"], accessor["max"] = bounds
+            document["accessors"].append(accessor)
+            return len(document["accessors"]) - 1
+
+        # 网格编号 -> 文档中的网格编号，空网格不写出
+        written = {}
+        for number, (name, attributes, indices) in enumerate(self.meshes):
+            count = len(attributes[0][1])
+            if not count or not len(indices):
+                continue
+            widths = [values.shape[1] for _, values in attributes]
+            if self.layout == "interleaved":
+                vertex_type = np.dtype([(semantic, np.float32, (width,))
+                                        for (semantic, _), width in zip(attributes, widths)])
+                vertices = np.empty(count, dtype=vertex_type)
+                for semantic, values in attributes:
+                    vertices[semantic] = values
+                view = add_view(vertices, _ARRAY_BUFFER, vertex_type.itemsize)
+                columns = [(view, vertex_type.fields[semantic][1], vertices[semantic])
+                           for semantic, _ in attributes]
+            else:
+                columns = []
+                for _, values in attributes:
+                    values = np.ascontiguousarray(values, dtype=np.float32)
+                    columns.append((add_view(values, _ARRAY_BUFFER), 0, values))
+
+            primitive = {"attributes": {}, "mode": _TRIANGLES}
+            for (semantic, _), width, (view, byte_offset, values) in zip(attributes, widths, columns):
+                bounds = None
+                if semantic == "POSITION":
+                    # POSITION 必须带包围盒
+                    bounds = (values.min(axis=0).tolist(), values.max(axis=0).tolist())
+                primitive["attributes"][semantic] = add_accessor(view, byte_offset, _FLOAT, count, width, bounds)
+
+            # 各分量类型的最大值保留给图元重启，不能作为索引
+            index_type, component_type = ((np.uint16, _UNSIGNED_SHORT) if count < 0xFFFF
+                                          else (np.uint32, _UNSIGNED_INT))
+            index_array = np.ascontiguousarray(indices, dtype=index_type)
+            view = add_view(index_array, _ELEMENT_ARRAY_BUFFER)
+            primitive["indices"] = add_accessor(view, 0, component_type, len(index_array), 1)
+
+            document["meshes"].append({"name": name, "primitives": [primitive]})
+            written[number] = len(document["meshes"]) - 1
+
+        for name, number in self.nodes:
+            if number in written:
+                document["nodes"].append({"name": name, "mesh": written[number]})
+                document["scenes"][0]["nodes"].append(len(document["nodes"]) - 1)
+
+        if offset:
+            document["buffers"] = [{"byteLength": offset}]
+        for key in ("nodes", "meshes", "accessors", "bufferViews"):
+            if not document[key]:
+                del document[key]
+        if "nodes" not in document:
+            del document["scenes"][0]["nodes"]
+        return document, blobs, offset
+
+    def save(self, path):
+        document, blobs, bin_length = self._plan()
+        text = json.dumps(document, separators=(",", ":")).encode("utf-8")
+        text += b" " * (_padded(len(text)) - len(text))
+        total = 12 + 8 + len(text) + (8 + bin_length if bin_length else 0)
+        if total >= 1 << 32:
+            raise ValueError(f"GLB files are limited to 4 GB ({total} bytes needed)")
+        with open(path, "wb") as glb_file:
+            glb_file.write(struct.pack("<4sII", GLB_MAGIC, GLB_VERSION, total))
+            glb_file.write(struct.pack("<II", len(text), _CHUNK_JSON))
+            glb_file.write(text)
+            if bin_length:
+                glb_file.write(struct.pack("<II", bin_length, _CHUNK_BIN))
+                for array in blobs:
+                    # 直接写出数组内存，不经过 bytes 拷贝
+                    glb_file.write(array.reshape(-1).view(np.uint8))
+                    glb_file.write(b"\x00" * (_padded(array.nbytes) - array.nbytes))
+        return total
+
+
+def _read_accessor(document, binary, number):
+    accessor = document["accessors"][number]
+    view = document["bufferViews"][accessor["bufferView"]]
+    if accessor["componentType"] not in _COMPONENT_DTYPES or view.get("buffer", 0) != 0:
+        raise ValueError(f"Unsupported glTF accessor {number}")
+    dtype = np.dtype(_COMPONENT_DTYPES[accessor["componentType"]]).newbyteorder("<")
+    width = {name: count for count, name in _TYPES.items()}[accessor["type"]]
+    count = accessor["count"]
+    stride = view.get("byteStride", width * dtype.itemsize)
+    start = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+    # 交错缓冲按步长取出各列，平面缓冲步长就是元素大小
+    raw = np.frombuffer(binary, dtype=np.uint8, count=(count - 1) * stride + width * dtype.itemsize if count else 0,
+                        offset=start)
+    rows = np.lib.stride_tricks.as_strided(raw, shape=(count, width * dtype.itemsize), strides=(stride, 1))
+    values = np.ascontiguousarray(rows).view(dtype)
+    return values if width > 1 else values.ravel()
+
+
+def read_glb(path):
+    """
+    Read the triangle meshes of a GLB file back into the format of
+    RecordingMeshBuilder.meshes: (meshes, nodes) with nodes a list of
+    (node name, mesh number). Only the first primitive of each mesh is read;
+    TEXCOORD_n becomes the layer "uv:TEXCOORD_n".
+    """
+    with open(path, "rb") as glb_file:
+        data = glb_file.read()
+    magic, version, _ = struct.unpack_from("<4sII", data, 0)
+    if magic != GLB_MAGIC or version != GLB_VERSION:
+        raise ValueError("Not a GLB 2.0 file")
+    json_length, _ = struct.unpack_from("<II", data, 12)
+    document = json.loads(data[20:20 + json_length])
+    binary = b""
+    if 20 + json_length < len(data):
+        bin_length, _ = struct.unpack_from("<II", data, 20 + json_length)
+        binary = data[28 + json_length:28 + json_length + bin_length]
+
+    meshes = []
+    for number, mesh in enumerate(document.get("meshes", [])):
+        primitive = mesh["primitives"][0]
+        if primitive.get("mode", _TRIANGLES) != _TRIANGLES:
+            raise ValueError(f"Mesh {number} is not a triangle list")
+        attributes = primitive["attributes"]
+        positions = _read_accessor(document, binary, attributes["POSITION"])
+        if "indices" in primitive:
+            indices = _read_accessor(document, binary, primitive["indices"]).astype(np.int64)
+        else:
+            indices = np.arange(len(positions))
+        layers = {}
+        for semantic, accessor in attributes.items():
+            if semantic in _LAYER_KEYS or semantic.startswith("TEXCOORD_"):
+                key = _LAYER_KEYS.get(semantic, f"uv:{semantic}")
+                layers[key] = LayerData(_read_accessor(document, binary, accessor), "ByVertice", None, semantic)
+        meshes.append({"name": mesh.get("name", f"mesh{number}"), "vertex_count": len(positions),
+                       "positions": positions, "indices": indices, "layers": layers})
+
+    nodes = [(node.get("name", f"node{number}"), node["mesh"])
+             for number, node in enumerate(document.get("nodes", [])) if "mesh" in node]
+    return meshes, nodes
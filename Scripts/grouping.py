@@ -0,0 +1,30 @@
+import numpy as np
+
+
+class RowGroup:
+    """Rows of a capture sharing one value of the grouping column (draw, material or submesh ID)"""
+
+    def __init__(self, key, rows):
+        self.key = key
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def partition_rows(keys):
+    """
+    Partition row numbers by key in one pass.
+
+    A stable argsort brings equal keys together without reordering rows within
+    a group, so each group keeps the original triangle order. Groups are
+    returned in ascending key order.
+    """
+    keys = np.asarray(keys)
+    if not len(keys):
+        return []
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+    ends = np.append(starts[1:], len(keys))
+    return [RowGroup(int(sorted_keys[start]), order[start:end]) for start, end in zip(starts, ends)]
@@ -0,0 +1,480 @@
+import importlib.util
+import os
+import threading
+import time
+from tkinter import *
+from tkinter import filedialog, messagebox, ttk
+from converter import CSV2FBXConverter
+from instrumentation import write_report
+from mesh_builder import OUTPUT_FORMATS
+from progress import ProgressEstimator, ProgressQueue
+
+class CSV2FBXGUI(CSV2FBXConverter):
+    # 界面每隔 POLL_MS 毫秒从队列取一次日志和进度
+    POLL_MS = 100
+
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+        self.events = ProgressQueue()
+        self.estimator = None
+        self.progress_callback = self.events.progress
+        self.root.title("CSV to FBX Converter")
+        self.root.geometry("750x820")  # 增加高度以容纳新选项
+        self.root.resizable(True, True)
+
+        # Create style for ttk widgets
+        self.style = ttk.Style()
+        self.style.configure("TButton", padding=6, relief="flat", background="#ccc")
+        self.style.configure("TLabel", padding=6)
+        self.style.configure("TFrame", padding=10)
+
+        # Create main frames
+        self.main_frame = ttk.Frame(self.root)
+        self.main_frame.pack(fill=BOTH, expand=True, padx=10, pady=10)
+
+        # Path selection frame
+        self.path_frame = ttk.LabelFrame(self.main_frame, text="File Paths")
+        self.path_frame.pack(fill=X, padx=5, pady=5)
+
+        # CSV input
+        self.csv_frame = ttk.Frame(self.path_frame)
+        self.csv_frame.pack(fill=X, padx=5, pady=5)
+
+        ttk.Label(self.csv_frame, text="CSV File:").pack(side=LEFT, padx=5)
+        self.csv_path_var = StringVar()
+        self.csv_path_entry = ttk.Entry(self.csv_frame, textvariable=self.csv_path_var, width=50)
+        self.csv_path_entry.pack(side=LEFT, fill=X, expand=True, padx=5)
+        ttk.Button(self.csv_frame, text="Browse...", command=self.browse_csv).pack(side=LEFT, padx=5)
+
+        # FBX output
+        self.fbx_frame = ttk.Frame(self.path_frame)
+        self.fbx_frame.pack(fill=X, padx=5, pady=5)
+
+        ttk.Label(self.fbx_frame, text="FBX Output:").pack(side=LEFT, padx=5)
+        self.fbx_path_var = StringVar()
+        self.fbx_path_entry = ttk.Entry(self.fbx_frame, textvariable=self.fbx_path_var, width=50)
+        self.fbx_path_entry.pack(side=LEFT, fill=X, expand=True, padx=5)
+        ttk.Button(self.fbx_frame, text="Browse...", command=self.browse_fbx).pack(side=LEFT, padx=5)
+
+        # Options frame
+        self.options_frame = ttk.LabelFrame(self.main_frame, text="Column Mapping")
+        self.options_frame.pack(fill=X, padx=5, pady=5)
+
+        # Create column mapping options
+        self.options_grid = ttk.Frame(self.options_frame)
+        self.options_grid.pack(fill=X, padx=5, pady=5)
+
+        # Column headers
+        ttk.Label(self.options_grid, text="Data Type").grid(row=0, column=0, sticky=W, padx=5, pady=5)
+        ttk.Label(self.options_grid, text="Start Column").grid(row=0, column=1, sticky=W, padx=5, pady=5)
+        ttk.Label(self.options_grid, text="Enabled").grid(row=0, column=2, sticky=W, padx=5, pady=5)
+
+        # ===== Basic column mapping =====
+        # Vertex ID
+        ttk.Label(self.options_grid, text="Vertex ID:").grid(row=1, column=0, sticky=W, padx=5, pady=5)
+        self.vtx_id_var = IntVar(value=0)
+        self.vtx_id_spinbox = ttk.Spinbox(self.options_grid, from_=0, to=50, textvariable=self.vtx_id_var, width=5)
+        self.vtx_id_spinbox.grid(row=1, column=1, sticky=W, padx=5, pady=5)
+        self.vtx_enabled_var = BooleanVar(value=True)
+        self.vtx_check = ttk.Checkbutton(self.options_grid, variable=self.vtx_enabled_var,
+                                         command=self.toggle_vtx_id)
+        self.vtx_check.grid(row=1, column=2, sticky=W, padx=5, pady=5)
+
+        # Vertex Position
+        ttk.Label(self.options_grid, text="Position (X,Y,Z):").grid(row=2, column=0, sticky=W, padx=5, pady=5)
+        self.vertex_id_var = IntVar(value=2)
+        self.vertex_id_spinbox = ttk.Spinbox(self.options_grid, from_=0, to=50, textvariable=self.vertex_id_var, width=5)
+        self.vertex_id_spinbox.grid(row=2, column=1, sticky=W, padx=5, pady=5)
+        self.position_enabled_var = BooleanVar(value=True)
+        self.position_check = ttk.Checkbutton(self.options_grid, variable=self.position_enabled_var,
+                                              command=self.toggle_position, state=DISABLED)
+        self.position_check.grid(row=2, column=2, sticky=W, padx=5, pady=5)
+
+        # Normal
+        ttk.Label(self.options_grid, text="Normal (X,Y,Z):").grid(row=3, column=0, sticky=W, padx=5, pady=5)
+        self.normal_id_var = IntVar(value=6)
+        self.normal_id_spinbox = ttk.Spinbox(self.options_grid, from_=0, to=50, textvariable=self.normal_id_var, width=5)
+        self.normal_id_spinbox.grid(row=3, column=1, sticky=W, padx=5, pady=5)
+        self.normal_enabled_var = BooleanVar(value=True)
+        self.normal_check = ttk.Checkbutton(self.options_grid, variable=self.normal_enabled_var,
+                                            command=self.toggle_normal)
+        self.normal_check.grid(row=3, column=2, sticky=W, padx=5, pady=5)
+
+        # UV1
+        ttk.Label(self.options_grid, text="UV1 (U,V):").grid(row=4, column=0, sticky=W, padx=5, pady=5)
+        self.uv_id_var = IntVar(value=18)
+        self.uv_id_spinbox = ttk.Spinbox(self.options_grid, from_=0, to=50, textvariable=self.uv_id_var, width=5)
+        self.uv_id_spinbox.grid(row=4, column=1, sticky=W, padx=5, pady=5)
+        self.uv1_enabled_var = BooleanVar(value=True)
+        self.uv1_check = ttk.Checkbutton(self.options_grid, variable=self.uv1_enabled_var,
+                                         command=self.toggle_uv1)
+        self.uv1_check.grid(row=4, column=2, sticky=W, padx=5, pady=5)
+
+        # ===== Advanced column mapping =====
+        # 创建一个分隔器
+        ttk.Separator(self.options_grid, orient=HORIZONTAL).grid(row=5, column=0, columnspan=3, sticky=EW, pady=10)
+
+        # Tangent
+        ttk.Label(self.options_grid, text="Tangent (X,Y,Z):").grid(row=6, column=0, sticky=W, padx=5, pady=5)
+        self.tangent_id_var = IntVar(value=10)
+        self.tangent_id_spinbox = ttk.Spinbox(self.options_grid, from_=0, to=50, textvariable=self.tangent_id_var, width=5)
+        self.tangent_id_spinbox.grid(row=6, column=1, sticky=W, padx=5, pady=5)
+        self.tangent_enabled_var = BooleanVar(value=False)
+        self.tangent_check = ttk.Checkbutton(self.options_grid, variable=self.tangent_enabled_var,
+                                             command=self.toggle_tangent)
+        self.tangent_check.grid(row=6, column=2, sticky=W, padx=5, pady=5)
+        self.toggle_tangent()  # Initialize state
+
+        # Vertex Color
+        ttk.Label(self.options_grid, text="Vertex Color (R,G,B,A):").grid(row=7, column=0, sticky=W, padx=5, pady=5)
+        self.color_id_var = IntVar(value=14)
+        self.color_id_spinbox = ttk.Spinbox(self.options_grid, from_=0, to=50, textvariable=self.color_id_var, width=5)
+        self.color_id_spinbox.grid(row=7, column=1, sticky=W, padx=5, pady=5)
+        self.color_enabled_var = BooleanVar(value=False)
+        self.color_check = ttk.Checkbutton(self.options_grid, variable=self.color_enabled_var,
+                                           command=self.toggle_color)
+        self.color_check.grid(row=7, column=2, sticky=W, padx=5, pady=5)
+        self.toggle_color()  # Initialize state
+
+        # UV2
+        ttk.Label(self.options_grid, text="UV2 (U,V):").grid(row=8, column=0, sticky=W, padx=5, pady=5)
+        self.uv2_id_var = IntVar(value=20)
+        self.uv2_id_spinbox = ttk.Spinbox(self.options_grid, from_=0, to=50, textvariable=self.uv2_id_var, width=5)
+        self.uv2_id_spinbox.grid(row=8, column=1, sticky=W, padx=5, pady=5)
+        self.uv2_enabled_var = BooleanVar(value=False)
+        self.uv2_check = ttk.Checkbutton(self.options_grid, variable=self.uv2_enabled_var,
+                                         command=self.toggle_uv2)
+        self.uv2_check.grid(row=8, column=2, sticky=W, padx=5, pady=5)
+        self.toggle_uv2()  # Initialize state
+
+        # Group ID：按绘制/材质/子网格编号拆分为多个节点
+        ttk.Label(self.options_grid, text="Group ID (Draw/Submesh):").grid(row=9, column=0, sticky=W, padx=5, pady=5)
+        self.group_id_var = IntVar(value=1)
+        self.group_id_spinbox = ttk.Spinbox(self.options_grid, from_=0, to=50, textvariable=self.group_id_var, width=5)
+        self.group_id_spinbox.grid(row=9, column=1, sticky=W, padx=5, pady=5)
+        self.group_enabled_var = BooleanVar(value=False)
+        self.group_check = ttk.Checkbutton(self.options_grid, variable=self.group_enabled_var,
+                                           command=self.toggle_group)
+        self.group_check.grid(row=9, column=2, sticky=W, padx=5, pady=5)
+        self.toggle_group()  # Initialize state
+
+        # Format options
+        self.format_frame = ttk.Frame(self.options_frame)
+        self.format_frame.pack(fill=X, padx=5, pady=5)
+
+        self.ascii_var = BooleanVar(value=True)
+        self.ascii_check = ttk.Checkbutton(self.format_frame, text="Export as ASCII (readable format)",
+                                           variable=self.ascii_var)
+        self.ascii_check.pack(side=LEFT, padx=5, pady=5)
+
+        ttk.Label(self.format_frame, text="Exporter:").pack(side=LEFT, padx=5)
+        self.backend_var = StringVar(value="sdk" if importlib.util.find_spec("fbx") else "native")
+        self.backend_combo = ttk.Combobox(self.format_frame, textvariable=self.backend_var,
+                                          values=("sdk", "native"), state="readonly", width=8)
+        self.backend_combo.pack(side=LEFT, padx=5, pady=5)
+
+        ttk.Label(self.format_frame, text="Format:").pack(side=LEFT, padx=5)
+        self.format_var = StringVar(value="fbx")
+        self.format_combo = ttk.Combobox(self.format_frame, textvariable=self.format_var,
+                                         values=tuple(OUTPUT_FORMATS), state="readonly", width=5)
+        self.format_combo.pack(side=LEFT, padx=5, pady=5)
+        self.format_combo.bind("<<ComboboxSelected>>", self.change_format)
+
+        # 法线/切线列未勾选时由几何计算
+        self.derive_var = BooleanVar(value=False)
+        self.derive_check = ttk.Checkbutton(self.format_frame, text="Derive missing normals/tangents",
+                                            variable=self.derive_var)
+        self.derive_check.pack(side=LEFT, padx=5, pady=5)
+
+        # Conversion button
+        self.convert_frame = ttk.Frame(self.main_frame)
+        self.convert_frame.pack(fill=X, padx=5, pady=10)
+
+        self.convert_button = ttk.Button(self.convert_frame, text="Convert CSV to FBX",
+                                         command=self.start_conversion)
+        self.convert_button.pack(side=TOP, fill=X, padx=5, pady=5)
+
+        # Progress indicator
+        self.progress_var = DoubleVar()
+        self.progress = ttk.Progressbar(self.convert_frame, variable=self.progress_var, maximum=100)
+        self.progress.pack(fill=X, padx=5, pady=5)
+
+        self.status_var = StringVar(value="Ready")
+        ttk.Label(self.convert_frame, textvariable=self.status_var).pack(fill=X, padx=5)
+
+        # Log frame
+        self.log_frame = ttk.LabelFrame(self.main_frame, text="Log")
+        self.log_frame.pack(fill=BOTH, expand=True, padx=5, pady=5)
+
+        self.log_text = Text(self.log_frame, height=10, width=80, wrap=WORD)
+        self.log_text.pack(fill=BOTH, expand=True, side=LEFT, padx=5, pady=5)
+
+        self.log_scroll = ttk.Scrollbar(self.log_frame, command=self.log_text.yview)
+        self.log_scroll.pack(fill=Y, side=RIGHT, padx=0, pady=5)
+        self.log_text.config(yscrollcommand=self.log_scroll.set)
+
+        # Bottom buttons
+        self.bottom_frame = ttk.Frame(self.main_frame)
+        self.bottom_frame.pack(fill=X, padx=5, pady=5)
+
+        self.clear_log_button = ttk.Button(self.bottom_frame, text="Clear Log", command=self.clear_log)
+        self.clear_log_button.pack(side=LEFT, padx=5)
+
+        self.report_button = ttk.Button(self.bottom_frame, text="Save Report...", command=self.save_report)
+        self.report_button.pack(side=LEFT, padx=5)
+
+        self.about_button = ttk.Button(self.bottom_frame, text="About", command=self.show_about)
+        self.about_button.pack(side=RIGHT, padx=5)
+
+        # Initialize with welcome message
+        self.log_message("Welcome to CSV to FBX Converter (Extended)!\n")
+        self.log_message("Please select a CSV file and an output path, then configure the column mappings.")
+        self.log_message("Column indices start at 0. For position, normal, UV, etc., specify the starting column.")
+        self.root.after(self.POLL_MS, self.poll_events)
+
+    def toggle_vtx_id(self):
+        """启用/禁用顶点ID设置"""
+        if self.vtx_enabled_var.get():
+            self.vtx_id_spinbox.config(state=NORMAL)
+        else:
+            self.vtx_id_spinbox.config(state=DISABLED)
+
+    def toggle_position(self):
+        """位置数据必须启用，所以此函数不做任何事"""
+        # Position is required, cannot be disabled
+        pass
+
+    def toggle_normal(self):
+        """启用/禁用法线设置"""
+        if self.normal_enabled_var.get():
+            self.normal_id_spinbox.config(state=NORMAL)
+        else:
+            self.normal_id_spinbox.config(state=DISABLED)
+
+    def toggle_uv1(self):
+        """启用/禁用UV1设置"""
+        if self.uv1_enabled_var.get():
+            self.uv_id_spinbox.config(state=NORMAL)
+        else:
+            self.uv_id_spinbox.config(state=DISABLED)
+
+    def toggle_tangent(self):
+        """启用/禁用切线设置"""
+        if self.tangent_enabled_var.get():
+            self.tangent_id_spinbox.config(state=NORMAL)
+        else:
+            self.tangent_id_spinbox.config(state=DISABLED)
+
+    def toggle_color(self):
+        """启用/禁用顶点色设置"""
+        if self.color_enabled_var.get():
+            self.color_id_spinbox.config(state=NORMAL)
+        else:
+            self.color_id_spinbox.config(state=DISABLED)
+
+    def toggle_uv2(self):
+        """启用/禁用UV2设置"""
+        if self.uv2_enabled_var.get():
+            self.uv2_id_spinbox.config(state=NORMAL)
+        else:
+            self.uv2_id_spinbox.config(state=DISABLED)
+
+    def toggle_group(self):
+        """启用/禁用分组列设置"""
+        if self.group_enabled_var.get():
+            self.group_id_spinbox.config(state=NORMAL)
+        else:
+            self.group_id_spinbox.config(state=DISABLED)
+
+    def browse_csv(self):
+        filename = filedialog.askopenfilename(
+            title="Select CSV File",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if filename:
+            self.csv_path_var.set(filename)
+            # Auto-update FBX path if empty
+            if not self.fbx_path_var.get():
+                fbx_filename = os.path.splitext(filename)[0] + OUTPUT_FORMATS[self.format_var.get()]
+                self.fbx_path_var.set(fbx_filename)
+
+    def browse_fbx(self):
+        output_format = self.format_var.get()
+        extension = OUTPUT_FORMATS[output_format]
+        filename = filedialog.asksaveasfilename(
+            title=f"Save {output_format.upper()} File",
+            filetypes=[(f"{output_format.upper()} files", "*" + extension), ("All files", "*.*")],
+            defaultextension=extension
+        )
+        if filename:
+            self.fbx_path_var.set(filename)
+
+    def change_format(self, event=None):
+        # 输出路径使用另一种格式的扩展名时随格式切换
+        root, extension = os.path.splitext(self.fbx_path_var.get())
+        if extension.lower() in OUTPUT_FORMATS.values():
+            self.fbx_path_var.set(root + OUTPUT_FORMATS[self.format_var.get()])
+
+    def start_conversion(self):
+        # Get all parameters
+        csv_path = self.csv_path_var.get()
+        fbx_path = self.fbx_path_var.get()
+
+        # Validate inputs
+        if not csv_path or not os.path.exists(csv_path):
+            messagebox.showerror("Error", "Please select a valid CSV file.")
+            return
+
+        if not fbx_path:
+            messagebox.showerror("Error", "Please specify an output file path.")
+            return
+
+        # Disable UI during conversion
+        self.convert_button.config(state="disabled")
+        self.progress_var.set(0)
+        self.clear_log()
+        self.estimator = ProgressEstimator()
+        self.status_var.set(self.estimator.describe())
+
+        # Get basic parameters
+        vtx_id = self.vtx_id_var.get()
+        vertex_id = self.vertex_id_var.get()
+        normal_id = self.normal_id_var.get()
+        uv_id = self.uv_id_var.get()
+
+        # Get optional parameters
+        tangent_id = self.tangent_id_var.get() if self.tangent_enabled_var.get() else None
+        color_id = self.color_id_var.get() if self.color_enabled_var.get() else None
+        uv2_id = self.uv2_id_var.get() if self.uv2_enabled_var.get() else None
+        group_id = self.group_id_var.get() if self.group_enabled_var.get() else None
+
+        # Get enabled flags
+        use_vtx_id = self.vtx_enabled_var.get()
+        use_position = self.position_enabled_var.get()  # Always True
+        use_normal = self.normal_enabled_var.get()
+        use_uv1 = self.uv1_enabled_var.get()
+
+        as_ascii = self.ascii_var.get()
+        backend = self.backend_var.get()
+        derive = self.derive_var.get()
+        output_format = self.format_var.get()
+
+        # Start conversion in a separate thread
+        self.conversion_thread = threading.Thread(
+            target=self.run_conversion,
+            args=(csv_path, fbx_path, vtx_id, vertex_id, normal_id, uv_id,
+                  tangent_id, color_id, uv2_id, as_ascii,
+                  use_vtx_id, use_position, use_normal, use_uv1, backend, group_id, derive, output_format),
+            daemon=True
+        )
+        self.conversion_thread.start()
+
+    def run_conversion(self, csv_path, fbx_path, vtx_id, vertex_id, normal_id, uv_id,
+                       tangent_id, color_id, uv2_id, as_ascii,
+                       use_vtx_id, use_position, use_normal, use_uv1, backend="sdk", group_id=None,
+                       derive=False, output_format="fbx"):
+        # Run the conversion
+        success = self.csv_to_fbx(
+            csv_path,
+            fbx_path,
+            vtx_id=vtx_id,
+            vertex_id=vertex_id,
+            normal_id=normal_id,
+            uv_id=uv_id,
+            tangent_id=tangent_id,
+            color_id=color_id,
+            uv2_id=uv2_id,
+            as_ascii=as_ascii,
+            use_vtx_id=use_vtx_id,
+            use_position=use_position,
+            use_normal=use_normal,
+            use_uv1=use_uv1,
+            backend=backend,
+            group_id=group_id,
+            derive_normals="missing" if derive else None,
+            derive_tangents="missing" if derive else None,
+            output_format=output_format
+        )
+
+        # 结果提示和恢复界面由 poll_events 在界面线程中完成
+        self.events.finished(success)
+
+    def poll_events(self):
+        """Drain the event queue on the Tk thread: batch log lines and update progress/ETA"""
+        lines = []
+        finished = None
+        for event in self.events.drain():
+            if event[0] == "log":
+                lines.append(event[1])
+            elif event[0] == "progress" and self.estimator is not None:
+                self.estimator.update(*event[1:])
+            elif event[0] == "finished":
+                finished = event[1]
+
+        if lines:
+            self.log_text.insert(END, "".join(lines))
+            self.log_text.see(END)
+        if self.estimator is not None:
+            self.progress_var.set(self.estimator.fraction * 100)
+            self.status_var.set(self.estimator.describe())
+
+        if finished is not None:
+            self.estimator = None
+            self.convert_button.config(state="normal")
+            self.progress_var.set(100)
+            if finished:
+                self.status_var.set("Done")
+                messagebox.showinfo("Success", "Conversion completed successfully!")
+            else:
+                self.status_var.set("Failed")
+                messagebox.showerror("Error", "Conversion failed. Check the log for details.")
+
+        self.root.after(self.POLL_MS, self.poll_events)
+
+    def log_message(self, message):
+        # Add timestamp
+        timestamp = time.strftime("%H:%M:%S", time.localtime())
+        formatted_message = f"[{timestamp}] {message}\n"
+
+        # 可能在转换线程中调用：只入队，由 poll_events 批量写入
+        self.events.log(formatted_message)
+
+    def save_report(self):
+        """把最近一次转换的分阶段计时保存为 JSON 或 CSV"""
+        if self.last_profile is None:
+            messagebox.showinfo("Report", "Run a conversion first.")
+            return
+        filename = filedialog.asksaveasfilename(
+            title="Save Stage Report",
+            filetypes=[("JSON files", "*.json"), ("CSV files", "*.csv")],
+            defaultextension=".json"
+        )
+        if filename:
+            write_report(self.last_profile.to_dict()["stages"], filename)
+
+    def clear_log(self):
+        self.log_text.delete(1.0, END)
+
+    def show_about(self):
+        about_text = """CSV to FBX Converter (Extended) v1.2
+
+This tool converts CSV mesh data to FBX format with support for:
+- Positions (required), Vertex ID, Normals, UVs (optional)
+- Tangents, Vertex Colors, UV2 (optional)
+
+CSV Format:
+- First row is header (skipped)
+- Columns should include all necessary mesh data
+- Specify the starting column index for each data type
+
+Developed by: skyliness1
+Date: 2025-07-15
+        """
+        messagebox.showinfo("About", about_text)
+
+
+def main():
+    root = Tk()
+    app = CSV2FBXGUI(root)
+    root.mainloop()
@@ -0,0 +1,92 @@
+"""
+Geometry instancing for one scene merged from many captures.
+
+The same prop drawn many times gives CSVs with identical vertex data.
+InstancingRecorder collects the meshes of every capture and keeps one copy
+of each distinct geometry: a finished mesh whose fingerprint matches a kept
+one is dropped and recorded as another node of that mesh. replay() then
+builds the kept meshes and the instance nodes into the real builder, so the
+output size and export time follow the unique geometry, not the draw count.
+"""
+import hashlib
+
+import numpy as np
+
+from mesh_builder import RecordingMeshBuilder
+
+
+def _update(digest, array):
+    array = np.ascontiguousarray(array)
+    digest.update(f"{array.dtype.str}{array.shape}".encode("ascii"))
+    digest.update(array.reshape(-1).view(np.uint8))
+
+
+def mesh_fingerprint(mesh):
+    """Hex digest of a recorded mesh's positions, indices and layers; the name is not part of it"""
+    digest = hashlib.blake2b(digest_size=16)
+    _update(digest, mesh["positions"])
+    _update(digest, mesh["indices"])
+    for key in sorted(mesh["layers"]):
+        layer = mesh["layers"][key]
+        digest.update(f"|{key}|{layer.mapping}|{layer.name}|".encode("utf-8"))
+        _update(digest, layer.values)
+        if layer.index is not None:
+            _update(digest, layer.index)
+    return digest.hexdigest()
+
+
+class InstancingRecorder(RecordingMeshBuilder):
+    """
+    RecordingMeshBuilder that keeps each distinct mesh once. With instance
+    set to False every mesh is kept (a plain merge).
+
+    nodes lists (node name, mesh number) of every mesh built or instanced,
+    in order.
+    """
+
+    def __init__(self, log=print, instance=True):
+        super().__init__(log)
+        self.instance = instance
+        # 指纹 -> 网格编号
+        self.fingerprints = {}
+        self.nodes = []
+
+    def end_mesh(self):
+        number = len(self.meshes) - 1
+        if self.instance:
+            fingerprint = mesh_fingerprint(self.current)
+            number = self.fingerprints.setdefault(fingerprint, number)
+        if number != len(self.meshes) - 1:
+            # 与已有网格完全相同：丢弃数组，只记录一个共用该网格的节点
+            mesh = self.meshes.pop()
+            self.add_instance(mesh["name"], number)
+        else:
+            self.nodes.append((self.current["name"], number))
+
+    def add_instance(self, name, mesh):
+        super().add_instance(name, mesh)
+        self.nodes.append((name, mesh))
+
+    def replay(self, builder):
+        """Build the kept meshes into builder, then their instance nodes"""
+        if isinstance(builder, RecordingMeshBuilder):
+            # 原生 / GLB 后端本身就保存数组：直接交出，不再复制
+            builder.meshes.extend(self.meshes)
+            builder.instances.extend(self.instances)
+            return
+        for mesh in self.meshes:
+            builder.begin_mesh(mesh["name"], mesh["vertex_count"])
+            builder.set_control_points(mesh["positions"])
+            for key, layer in mesh["layers"].items():
+                if key == "normal":
+                    builder.set_normals(layer.values, 0, layer.index)
+                elif key == "tangent":
+                    builder.set_tangents(layer.values, 0, layer.index)
+                elif key == "color":
+                    builder.set_colors(layer.values, 0, layer.index)
+                else:
+                    builder.set_uvs(layer.values, layer.name, 0, layer.index)
+            builder.set_polygons(mesh["indices"])
+            builder.end_mesh()
+        for name, mesh in self.instances:
+            builder.add_instance(name, mesh)
@@ -0,0 +1,128 @@
+import contextlib
+import cProfile
+import csv
+import json
+import time
+
+from memory_guard import current_rss_mb, peak_rss_mb
+
+
+class StageStats:
+    """Accumulated measurements of one conversion stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rss_delta_mb = 0.0
+        self.peak_rss_delta_mb = 0.0
+        self.elements = 0
+
+    def to_dict(self):
+        return {
+            "stage": self.name,
+            "calls": self.calls,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cpu_seconds": round(self.cpu_seconds, 6),
+            "rss_delta_mb": round(self.rss_delta_mb, 3),
+            "peak_rss_delta_mb": round(self.peak_rss_delta_mb, 3),
+            "elements": self.elements,
+        }
+
+
+class ConversionProfile:
+    """
+    Per-stage wall time, CPU time, memory and element counts of a conversion.
+
+    Stages are timed with "with profile.stage(name, count):"; a stage entered
+    several times (e.g. once per streamed chunk) accumulates into one record.
+    Hooks attached with add_hook() wrap every entry of their stage, which is
+    how cProfile or a sampling profiler is pointed at a single stage.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.hooks = {}
+        self.started = time.perf_counter()
+        self.total_seconds = None
+
+    def add_hook(self, stage_name, hook):
+        """hook(stage_name) must return a context manager that wraps the stage"""
+        self.hooks.setdefault(stage_name, []).append(hook)
+
+    @contextlib.contextmanager
+    def stage(self, name, count=None):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name)
+
+        with contextlib.ExitStack() as hooks:
+            for hook in self.hooks.get(name, ()):
+                hooks.enter_context(hook(name))
+            rss_before = current_rss_mb() or 0.0
+            peak_before = peak_rss_mb() or 0.0
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            try:
+                yield stats
+            finally:
+                stats.wall_seconds += time.perf_counter() - wall_start
+                stats.cpu_seconds += time.process_time() - cpu_start
+                stats.rss_delta_mb += (current_rss_mb() or 0.0) - rss_before
+                stats.peak_rss_delta_mb += (peak_rss_mb() or 0.0) - peak_before
+                stats.calls += 1
+                if count is not None:
+                    stats.elements += int(count)
+
+    def finish(self):
+        self.total_seconds = time.perf_counter() - self.started
+
+    def to_dict(self):
+        return {
+            "total_seconds": None if self.total_seconds is None else round(self.total_seconds, 6),
+            "stages": [stats.to_dict() for stats in self.stages.values()],
+        }
+
+    def format_table(self):
+        lines = [f"{'Stage':<24}{'Wall s':>10}{'CPU s':>10}{'Peak MB':>10}{'Elements':>12}"]
+        for stats in self.stages.values():
+            lines.append(f"{stats.name:<24}{stats.wall_seconds:>10.3f}{stats.cpu_seconds:>10.3f}"
+                         f"{stats.peak_rss_delta_mb:>10.1f}{stats.elements:>12}")
+        return "\n".join(lines)
+
+
+def write_report(rows, path):
+    """
+    Write stage rows to path as JSON or CSV (chosen by extension).
+
+    rows is a list of dicts as produced by StageStats.to_dict(), optionally
+    with extra keys such as "input".
+    """
+    if path.lower().endswith(".csv"):
+        fieldnames = []
+        for row in rows:
+            fieldnames.extend(key for key in row if key not in fieldnames)
+        with open(path, "w", newline="", encoding="utf-8") as report_file:
+            writer = csv.DictWriter(report_file, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w", encoding="utf-8") as report_file:
+            json.dump(rows, report_file, indent=2)
+
+
+def cprofile_hook(output_path):
+    """Hook that runs cProfile over every entry of its stage and dumps the stats to output_path"""
+    profiler = cProfile.Profile()
+
+    @contextlib.contextmanager
+    def hook(stage_name):
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output_path)
+
+    return hook
@@ -0,0 +1,191 @@
+"""
+LOD generation by quadric-error (Garland-Heckbert) half-edge collapse.
+
+Collapses are applied in vectorized passes instead of one at a time from a
+priority queue: every vertex finds its cheapest neighbour to collapse into,
+and an independent set of the cheapest ones (no two sharing a triangle) is
+collapsed together, so each pass is a handful of NumPy scatters and gathers
+over the whole mesh.
+
+Vertices on a boundary of the welded index buffer never move. UV and normal
+seams are such boundaries (the vertices on either side carry different
+attributes), so seams and open borders keep their exact shape, and because
+a collapse moves a vertex onto an existing one, every remaining vertex keeps
+its original UVs, normal and color.
+"""
+import numpy as np
+
+
+def plane_quadrics(positions, triangles):
+    """Area-weighted plane quadric of every vertex as (V, 10) upper-triangle coefficients"""
+    corners = positions[triangles]
+    normal = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    area = np.linalg.norm(normal, axis=1)
+    normal = normal / np.maximum(area, 1e-30)[:, None]
+    a, b, c = normal.T
+    d = -np.einsum("ij,ij->i", normal, corners[:, 0])
+    # 面积加权，避免细碎三角形主导误差
+    planes = np.stack([a * a, a * b, a * c, a * d, b * b, b * c, b * d, c * c, c * d, d * d], axis=1)
+    planes *= (area * 0.5)[:, None]
+
+    quadrics = np.zeros((len(positions), 10), dtype=np.float64)
+    for corner in range(3):
+        for k in range(10):
+            quadrics[:, k] += np.bincount(triangles[:, corner], planes[:, k], minlength=len(positions))
+    return quadrics
+
+
+def quadric_error(quadrics, points):
+    """v^T Q v for every row, with v = (x, y, z, 1)"""
+    x, y, z = points.T
+    q = quadrics.T
+    return (x * (q[0] * x + 2 * (q[1] * y + q[2] * z + q[3]))
+            + y * (q[4] * y + 2 * (q[5] * z + q[6]))
+            + z * (q[7] * z + 2 * q[8]) + q[9])
+
+
+def boundary_vertices(triangles, vertex_count):
+    """Vertices on an edge used by anything but exactly two triangles (borders, seams, non-manifold)"""
+    a = triangles[:, [0, 1, 2]].ravel()
+    b = triangles[:, [1, 2, 0]].ravel()
+    keys = np.minimum(a, b) * vertex_count + np.maximum(a, b)
+    _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    locked = np.zeros(vertex_count, dtype=bool)
+    open_edges = first[counts != 2]
+    locked[a[open_edges]] = True
+    locked[b[open_edges]] = True
+    return locked
+
+
+def _cheapest_collapses(triangles, positions, quadrics, locked):
+    """For every movable vertex: (cost, target) of collapsing it into its cheapest neighbour"""
+    vertex_count = len(positions)
+    # 流形内部边在两侧三角形中方向相反，按一个方向取三条边即覆盖所有有向边
+    source = triangles.ravel()
+    target = triangles[:, [1, 2, 0]].ravel()
+    movable = ~locked[source]
+    source, target = source[movable], target[movable]
+    # Q_b(p_a) + Q_a(p_a)：后一项每个顶点只算一次
+    own_error = quadric_error(quadrics, positions)
+    cost = quadric_error(quadrics[source], positions[target]) + own_error[target]
+
+    best_cost = np.full(vertex_count, np.inf)
+    np.minimum.at(best_cost, source, cost)
+    best_target = np.full(vertex_count, -1, dtype=np.int64)
+    cheapest = cost == best_cost[source]
+    best_target[source[cheapest]] = target[cheapest]
+    return best_cost, best_target
+
+
+def _independent_set(triangles, best_cost, rounds=4):
+    """
+    Vertices to collapse together: no two share a triangle, so no target
+    moves and every triangle changes by at most one corner.
+
+    Each round takes the eligible vertices whose cost is lower than that of
+    every eligible vertex around them, then rules out their neighbours.
+    """
+    vertex_count = len(best_cost)
+    rank = np.empty(vertex_count, dtype=np.int64)
+    rank[np.argsort(best_cost, kind="stable")] = np.arange(vertex_count)
+    eligible = np.isfinite(best_cost)
+    chosen = np.zeros(vertex_count, dtype=bool)
+    for _ in range(rounds):
+        corner_rank = np.where(eligible, rank, vertex_count)[triangles]
+        neighbour = np.full(vertex_count, vertex_count, dtype=np.int64)
+        for corner in range(3):
+            others = np.minimum(corner_rank[:, (corner + 1) % 3], corner_rank[:, (corner + 2) % 3])
+            np.minimum.at(neighbour, triangles[:, corner], others)
+        picked = eligible & (rank < neighbour)
+        if not picked.any():
+            break
+        chosen |= picked
+        # 已选顶点及其一环邻域本轮不再参与
+        touched = picked[triangles].any(axis=1)
+        eligible[triangles[touched].ravel()] = False
+    return np.flatnonzero(chosen)
+
+
+def _flipped(triangles, positions, target):
+    """Collapsing vertices that would turn one of their triangles over"""
+    moved = target[triangles] >= 0
+    affected = moved.any(axis=1)
+    tris = triangles[affected]
+    corner = np.argmax(moved[affected], axis=1)
+    mover = tris[np.arange(len(tris)), corner]
+    destination = target[mover]
+    # 同时包含起点和终点的三角形会退化并被删除，不需要检查
+    keep = ~(tris == destination[:, None]).any(axis=1)
+    tris, mover, destination, corner = tris[keep], mover[keep], destination[keep], corner[keep]
+
+    before = positions[tris]
+    after = before.copy()
+    after[np.arange(len(tris)), corner] = positions[destination]
+    normal_before = np.cross(before[:, 1] - before[:, 0], before[:, 2] - before[:, 0])
+    normal_after = np.cross(after[:, 1] - after[:, 0], after[:, 2] - after[:, 0])
+    # 法线转过 60 度以上视为翻转（多次坍缩会累积旋转）
+    cosine = np.einsum("ij,ij->i", normal_before, normal_after)
+    flipped = cosine <= 0.5 * np.linalg.norm(normal_before, axis=1) * np.linalg.norm(normal_after, axis=1)
+    return np.unique(mover[flipped])
+
+
+def decimate(positions, indices, target_triangles, quadrics=None, locked=None, max_passes=64):
+    """
+    Collapse edges until at most target_triangles remain or nothing can move.
+
+    Returns (index buffer into the original vertices, quadrics); pass the
+    quadrics back in to continue from this level to the next LOD.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    triangles = np.asarray(indices, dtype=np.int64)[:len(indices) // 3 * 3].reshape(-1, 3)
+    if quadrics is None:
+        quadrics = plane_quadrics(positions, triangles)
+    if locked is None:
+        locked = boundary_vertices(triangles, len(positions))
+
+    for _ in range(max_passes):
+        excess = len(triangles) - target_triangles
+        if excess <= 0:
+            break
+        best_cost, best_target = _cheapest_collapses(triangles, positions, quadrics, locked)
+        moving = _independent_set(triangles, best_cost)
+        # 一次内部坍缩约删除两个三角形，按代价从低到高只取需要的数量
+        moving = moving[np.argsort(best_cost[moving], kind="stable")][:(excess + 1) // 2]
+
+        target = np.full(len(positions), -1, dtype=np.int64)
+        target[moving] = best_target[moving]
+        rejected = _flipped(triangles, positions, target)
+        target[rejected] = -1
+        moving = moving[target[moving] >= 0]
+        if not len(moving):
+            break
+
+        np.add.at(quadrics, target[moving], quadrics[moving])
+        remap = np.arange(len(positions), dtype=np.int64)
+        remap[moving] = target[moving]
+        triangles = remap[triangles]
+        degenerate = ((triangles[:, 0] == triangles[:, 1]) | (triangles[:, 1] == triangles[:, 2])
+                      | (triangles[:, 0] == triangles[:, 2]))
+        triangles = triangles[~degenerate]
+    return triangles.ravel(), quadrics
+
+
+def generate_lods(positions, indices, count, ratio=0.5):
+    """
+    Index buffers of LOD1..LODcount, each targeting ratio times the triangles
+    of the level before and decimated from it. Every buffer indexes the
+    original vertices.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    indices = np.asarray(indices, dtype=np.int64)[:len(indices) // 3 * 3]
+    triangles = indices.reshape(-1, 3)
+    quadrics = plane_quadrics(positions, triangles)
+    locked = boundary_vertices(triangles, len(positions))
+
+    lods = []
+    target = len(triangles)
+    for _ in range(count):
+        target = max(1, int(target * ratio))
+        indices, quadrics = decimate(positions, indices, target, quadrics.copy(), locked)
+        lods.append(indices)
+    return lods
@@ -0,0 +1,145 @@
+import glob
+import hashlib
+import inspect
+import json
+import os
+import uuid
+
+from csv_cache import content_hash
+
+TOOL_VERSION = "1.3"
+DEFAULT_MANIFEST = "csv2fbx_manifest.json"
+
+# 只影响运行方式、不影响输出内容的选项，不计入清单
+RUNTIME_OPTIONS = ("profile", "use_cache", "memory_limit_mb", "stream", "chunk_rows", "group_jobs", "cache_stats")
+
+_tool_fingerprint = None
+
+
+def tool_fingerprint():
+    """TOOL_VERSION plus a digest of the converter sources, so editing the tool invalidates outputs"""
+    global _tool_fingerprint
+    if _tool_fingerprint is None:
+        digest = hashlib.sha1()
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+            with open(path, "rb") as source:
+                digest.update(source.read())
+        _tool_fingerprint = f"{TOOL_VERSION}+{digest.hexdigest()[:12]}"
+    return _tool_fingerprint
+
+
+def resolve_options(converter_class, options):
+    """Every csv_to_fbx option that shapes the output, with defaults filled in"""
+    parameters = inspect.signature(converter_class.csv_to_fbx).parameters
+    resolved = {name: parameter.default for name, parameter in parameters.items()
+                if parameter.default is not inspect.Parameter.empty and name not in RUNTIME_OPTIONS}
+    resolved.update((name, value) for name, value in options.items() if name not in RUNTIME_OPTIONS)
+    return resolved
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def input_fingerprint(csv_path):
+    """Stat and hash of an input, taken before converting it so later edits are noticed"""
+    return {"input_stat": _stat_key(csv_path), "input_hash": content_hash(csv_path)}
+
+
+def fingerprint_files(csv_path, fbx_path, fingerprint=None):
+    """Complete an input fingerprint with the stat and hash of the converted output"""
+    fingerprint = dict(fingerprint or input_fingerprint(csv_path))
+    fingerprint.update(output_stat=_stat_key(fbx_path), output_hash=content_hash(fbx_path))
+    return fingerprint
+
+
+class Manifest:
+    """
+    Records which CSV produced which FBX with which options.
+
+    Each entry is keyed by output path and stores the input's content hash and
+    stat, the resolved csv_to_fbx options, the tool fingerprint and the
+    output's content hash and stat. Up-to-date checks compare stats first and
+    only hash a file whose size or mtime changed (or always, with
+    verify_content), so a no-op rerun over a large directory costs a stat per
+    file.
+    """
+
+    def __init__(self, path=DEFAULT_MANIFEST, verify_content=False):
+        self.path = path
+        self.verify_content = verify_content
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path=DEFAULT_MANIFEST, verify_content=False):
+        manifest = cls(path, verify_content)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as manifest_file:
+                data = json.load(manifest_file)
+            if data.get("version") == 1:
+                manifest.entries = data.get("entries", {})
+        return manifest
+
+    def save(self):
+        if not self.dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump({"version": 1, "entries": self.entries}, manifest_file, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+    def _same_content(self, path, record):
+        """True when path still has the recorded content; refreshes the recorded stat if only it changed"""
+        try:
+            stat = _stat_key(path)
+        except OSError:
+            return False
+        if stat == record["stat"] and not self.verify_content:
+            return True
+        if content_hash(path) != record["hash"]:
+            return False
+        if stat != record["stat"]:
+            # 内容未变、只是修改时间变了（如重新检出），更新记录避免下次再哈希
+            record["stat"] = stat
+            self.dirty = True
+        return True
+
+    def is_up_to_date(self, csv_path, fbx_path, options):
+        entry = self.entries.get(os.path.abspath(fbx_path))
+        up_to_date = (entry is not None
+                      and entry["tool"] == tool_fingerprint()
+                      and entry["options"] == json.loads(json.dumps(options))
+                      and entry["input"]["path"] == os.path.abspath(csv_path)
+                      and self._same_content(csv_path, entry["input"])
+                      and self._same_content(fbx_path, entry["output"]))
+        if up_to_date:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return up_to_date
+
+    def record(self, csv_path, fbx_path, options, fingerprint=None):
+        """
+        Store a successful conversion. fingerprint is the dict returned by
+        fingerprint_files() in the worker; without it the files are hashed here.
+        """
+        fingerprint = fingerprint or fingerprint_files(csv_path, fbx_path)
+        self.entries[os.path.abspath(fbx_path)] = {
+            "input": {"path": os.path.abspath(csv_path), "stat": fingerprint["input_stat"],
+                      "hash": fingerprint["input_hash"]},
+            "output": {"stat": fingerprint["output_stat"], "hash": fingerprint["output_hash"]},
+            "options": json.loads(json.dumps(options)),
+            "tool": tool_fingerprint(),
+        }
+        self.dirty = True
+
+    def forget(self, fbx_path):
+        if self.entries.pop(os.path.abspath(fbx_path), None) is not None:
+            self.dirty = True
@@ -0,0 +1,81 @@
+import os
+import sys
+
+
+class MemoryLimitExceeded(Exception):
+    pass
+
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    class _PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    def _memory_counters():
+        counters = _PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters
+
+    def current_rss_mb():
+        counters = _memory_counters()
+        return counters.WorkingSetSize / (1024 * 1024) if counters else None
+
+    def peak_rss_mb():
+        counters = _memory_counters()
+        return counters.PeakWorkingSetSize / (1024 * 1024) if counters else None
+
+else:
+    import resource
+
+    def current_rss_mb():
+        try:
+            with open("/proc/self/statm") as statm:
+                pages = int(statm.read().split()[1])
+            return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        except (OSError, ValueError, IndexError):
+            # 没有 /proc（如 macOS）时退回到峰值
+            return peak_rss_mb()
+
+    def peak_rss_mb():
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 返回 KB，macOS 返回字节
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class MemoryGuard:
+    """
+    Track resident memory during a conversion and enforce an optional ceiling.
+
+    check() is called between chunks/stages; it raises MemoryLimitExceeded as
+    soon as the process RSS goes over limit_mb so a batch worker fails with a
+    report instead of being OOM-killed.
+    """
+
+    def __init__(self, limit_mb=None):
+        self.limit_mb = limit_mb
+        self.baseline_mb = current_rss_mb()
+        self.peak_mb = self.baseline_mb
+
+    def check(self, stage):
+        rss = current_rss_mb()
+        if rss is None:
+            return None
+        self.peak_mb = max(self.peak_mb or 0.0, rss)
+        if self.limit_mb is not None and rss > self.limit_mb:
+            raise MemoryLimitExceeded(f"Memory usage {rss:.0f} MB exceeded the {self.limit_mb} MB limit "
+                                      f"during {stage}")
+        return rss
@@ -0,0 +1,332 @@
+import numpy as np
+
+from fbx_binary import BinaryFbxWriter, LayerData
+from fbx_session import get_session
+from gltf import GlbWriter
+
+# 输出格式 -> 文件扩展名
+OUTPUT_FORMATS = {"fbx": ".fbx", "glb": ".glb"}
+
+
+class MeshBuilder:
+    """
+    Backend-neutral interface used by csv_to_fbx to build meshes from arrays.
+
+    Every setter takes a whole attribute array (or a chunk of it written at
+    offset, for streaming) so a backend can fill it in bulk. Per-vertex layers
+    are sized to the vertex count given to begin_mesh; when index is given the
+    values are a direct array referenced through that index array instead.
+    UV index arrays are per polygon vertex; UVs without one are per vertex.
+    """
+
+    def begin_mesh(self, name, vertex_count):
+        raise NotImplementedError
+
+    def set_control_points(self, positions, offset=0):
+        raise NotImplementedError
+
+    def set_polygons(self, indices):
+        raise NotImplementedError
+
+    def set_normals(self, normals, offset=0, index=None):
+        raise NotImplementedError
+
+    def set_tangents(self, tangents, offset=0, index=None):
+        raise NotImplementedError
+
+    def set_colors(self, colors, offset=0, index=None):
+        raise NotImplementedError
+
+    def set_uvs(self, uvs, uv_name, offset=0, index=None):
+        raise NotImplementedError
+
+    def end_mesh(self):
+        pass
+
+    def add_instance(self, name, mesh):
+        """Add a node named name that shares the mesh-th mesh (in begin_mesh order) instead of a copy"""
+        raise NotImplementedError
+
+    def save(self, path, as_ascii=False):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+class SdkMeshBuilder(MeshBuilder):
+    """
+    Builds an FbxScene through the Autodesk FBX SDK.
+
+    The scene comes from an FbxSession (by default the process-wide one), so
+    the FbxManager, IOSettings and writer format lookups are shared between
+    conversions and close() only destroys this builder's scene. sdk replaces
+    the `fbx` module (the benchmarks pass sdk_standin to run without the SDK).
+    """
+
+    def __init__(self, log=print, session=None, sdk=None):
+        self.session = session or get_session(sdk)
+        self.fbx = self.session.fbx
+        self.log = log
+        self.scene = self.session.create_scene("My Scene")
+        self.mesh = None
+        self.meshes = []
+        self.vertex_count = 0
+        self.layers = {}
+
+    def begin_mesh(self, name, vertex_count):
+        fbx = self.fbx
+        self.mesh = fbx.FbxMesh.Create(self.scene, name)
+        self.meshes.append(self.mesh)
+        node = fbx.FbxNode.Create(self.scene, name)
+        node.SetNodeAttribute(self.mesh)
+        self.scene.GetRootNode().AddChild(node)
+
+        self.mesh.InitControlPoints(vertex_count)
+        self.vertex_count = vertex_count
+        self.layers = {}
+        return node
+
+    def set_control_points(self, positions, offset=0):
+        set_point = self.mesh.SetControlPointAt
+        vector = self.fbx.FbxVector4
+        for i, (x, y, z) in enumerate(positions.tolist(), offset):
+            set_point(vector(x, y, z), i)
+
+    def set_polygons(self, indices):
+        mesh = self.mesh
+        begin, add, end = mesh.BeginPolygon, mesh.AddPolygon, mesh.EndPolygon
+        triangles = indices[:len(indices) // 3 * 3].reshape(-1, 3).tolist()
+        for i, (a, b, c) in enumerate(triangles):
+            begin(i)
+            add(a)
+            add(b)
+            add(c)
+            end()
+
+    def _init_layer(self, element, mapping, values, index):
+        EMappingMode = self.fbx.FbxLayerElement.EMappingMode
+        EReferenceMode = self.fbx.FbxLayerElement.EReferenceMode
+        element.SetMappingMode(getattr(EMappingMode, mapping))
+        if index is None:
+            # 没有索引数组时每个控制点一个值，不写恒等索引
+            element.SetMappingMode(EMappingMode.eByControlPoint)
+            element.SetReferenceMode(EReferenceMode.eDirect)
+            element.GetDirectArray().Resize(self.vertex_count)
+        else:
+            element.SetReferenceMode(EReferenceMode.eIndexToDirect)
+            element.GetDirectArray().Resize(len(values))
+            index_array = element.GetIndexArray()
+            index_array.Resize(len(index))
+            set_index = index_array.SetAt
+            for i, value in enumerate(index.tolist()):
+                set_index(i, value)
+
+    def _fill(self, element, rows, offset, make):
+        set_value = element.GetDirectArray().SetAt
+        for i, row in enumerate(rows.tolist(), offset):
+            set_value(i, make(*row))
+
+    def set_normals(self, normals, offset=0, index=None):
+        element = self.layers.get("normal")
+        if element is None:
+            element = self.mesh.CreateElementNormal()
+            if self.mesh.GetElementNormalCount() > 1:
+                self.mesh.RemoveElementNormal(self.mesh.GetElementNormal(0))
+            self._init_layer(element, "eByControlPoint", normals, index)
+            self.layers["normal"] = element
+            self.log(f"Current mesh's normalLayerCount: {self.mesh.GetElementNormalCount()}")
+        self._fill(element, normals, offset, self.fbx.FbxVector4)
+
+    def set_tangents(self, tangents, offset=0, index=None):
+        element = self.layers.get("tangent")
+        if element is None:
+            element = self.mesh.CreateElementTangent()
+            self._init_layer(element, "eByControlPoint", tangents, index)
+            self.layers["tangent"] = element
+            self.log(f"Setting tangents for {self.vertex_count} vertices")
+        if tangents.shape[1] == 3:
+            tangents = np.hstack([tangents, np.ones((len(tangents), 1), dtype=tangents.dtype)])
+        self._fill(element, tangents, offset, self.fbx.FbxVector4)
+
+    def set_colors(self, colors, offset=0, index=None):
+        element = self.layers.get("color")
+        if element is None:
+            element = self.mesh.CreateElementVertexColor()
+            self._init_layer(element, "eByControlPoint", colors, index)
+            self.layers["color"] = element
+            self.log(f"Setting vertex colors for {self.vertex_count} vertices")
+        self._fill(element, colors, offset, self.fbx.FbxColor)
+
+    def set_uvs(self, uvs, uv_name, offset=0, index=None):
+        key = "uv:" + uv_name
+        element = self.layers.get(key)
+        if element is None:
+            uv_index = sum(1 for name in self.layers if name.startswith("uv:"))
+            element = self.mesh.CreateElementUV(uv_name)
+            self._init_layer(element, "eByPolygonVertex", uvs, index)
+            self.layers[key] = element
+
+            # 将 UV 层添加到适当的层
+            if uv_index > 0:
+                layer = self.mesh.GetLayer(0)
+                if not layer:
+                    self.mesh.CreateLayer()
+                    layer = self.mesh.GetLayer(0)
+
+                layer.SetUVs(element, self.fbx.FbxLayerElement.EType.eTextureDiffuse)
+
+            self.log(f"UV set '{uv_name}' added at layer {uv_index}")
+        self._fill(element, uvs, offset, self.fbx.FbxVector2)
+
+    def add_instance(self, name, mesh):
+        # 多个节点共用同一个 FbxMesh，文件中只写一份几何
+        node = self.fbx.FbxNode.Create(self.scene, name)
+        node.SetNodeAttribute(self.meshes[mesh])
+        self.scene.GetRootNode().AddChild(node)
+        return node
+
+    def save(self, path, as_ascii=False):
+        self.session.export(self.scene, path, as_ascii)
+
+    def close(self):
+        # 场景中的网格、节点和图层元素随场景一起销毁
+        if self.scene is not None:
+            self.scene.Destroy()
+            self.scene = None
+
+
+class RecordingMeshBuilder(MeshBuilder):
+    """
+    Keeps every mesh as plain NumPy arrays in self.meshes instead of exporting.
+
+    Used as the in-memory backend for tests and benchmarks, and as the storage
+    behind NativeMeshBuilder.
+    """
+
+    def __init__(self, log=print):
+        self.log = log
+        self.meshes = []
+        # (节点名称, 网格编号)：共用已有网格的节点
+        self.instances = []
+        self.saved_path = None
+
+    @property
+    def current(self):
+        return self.meshes[-1]
+
+    def begin_mesh(self, name, vertex_count):
+        mesh = {"name": name,
+                "vertex_count": vertex_count,
+                "positions": np.empty((vertex_count, 3), dtype=np.float64),
+                "indices": None,
+                "layers": {}}
+        self.meshes.append(mesh)
+        return mesh
+
+    def set_control_points(self, positions, offset=0):
+        self.current["positions"][offset:offset + len(positions)] = positions
+
+    def set_polygons(self, indices):
+        self.current["indices"] = np.asarray(indices)
+
+    def _set_layer(self, key, values, offset, index, mapping, name=""):
+        layers = self.current["layers"]
+        layer = layers.get(key)
+        if layer is None:
+            if index is None:
+                shape = (self.current["vertex_count"],) + values.shape[1:]
+                layer = LayerData(np.empty(shape, dtype=values.dtype), "ByVertice", None, name)
+            else:
+                layer = LayerData(np.array(values), mapping, np.asarray(index), name)
+            layers[key] = layer
+        if index is None:
+            layer.values[offset:offset + len(values)] = values
+
+    def set_normals(self, normals, offset=0, index=None):
+        self._set_layer("normal", normals, offset, index, "ByVertice")
+
+    def set_tangents(self, tangents, offset=0, index=None):
+        self._set_layer("tangent", tangents, offset, index, "ByVertice")
+
+    def set_colors(self, colors, offset=0, index=None):
+        self._set_layer("color", colors, offset, index, "ByVertice")
+
+    def set_uvs(self, uvs, uv_name, offset=0, index=None):
+        self._set_layer("uv:" + uv_name, uvs, offset, index, "ByPolygonVertex", uv_name)
+
+    def add_instance(self, name, mesh):
+        self.instances.append((name, mesh))
+
+    def save(self, path, as_ascii=False):
+        self.saved_path = path
+
+    @staticmethod
+    def mesh_attributes(mesh):
+        """Layer keyword arguments of a recorded mesh for BinaryFbxWriter / GlbWriter.add_mesh"""
+        layers = mesh["layers"]
+        return {"normals": layers.get("normal"), "tangents": layers.get("tangent"), "colors": layers.get("color"),
+                "uvs": [layer for key, layer in layers.items() if key.startswith("uv:")]}
+
+
+class NativeMeshBuilder(RecordingMeshBuilder):
+    """Writes the recorded meshes with the SDK-independent binary FBX writer"""
+
+    def save(self, path, as_ascii=False):
+        if as_ascii:
+            self.log("The native backend writes binary FBX only; ignoring ASCII option")
+        writer = BinaryFbxWriter()
+        geometry_ids = []
+        for mesh in self.meshes:
+            geometry_ids.append(writer.add_geometry(mesh["name"], mesh["positions"], mesh["indices"],
+                                                   **self.mesh_attributes(mesh)))
+            writer.add_model(mesh["name"], geometry_ids[-1])
+        for name, mesh in self.instances:
+            writer.add_model(name, geometry_ids[mesh])
+        size = writer.save(path)
+        self.saved_path = path
+        self.log(f"Wrote {size} bytes")
+
+
+class GltfMeshBuilder(RecordingMeshBuilder):
+    """Writes the recorded meshes as a GLB (binary glTF 2.0) file, with interleaved or planar buffers"""
+
+    def __init__(self, log=print, layout="interleaved"):
+        super().__init__(log)
+        # 布局在创建时检查，而不是等到保存
+        self.writer = GlbWriter(layout)
+
+    def save(self, path, as_ascii=False):
+        for mesh in self.meshes:
+            self.writer.add_mesh(mesh["name"], mesh["positions"], mesh["indices"], **self.mesh_attributes(mesh))
+        for name, mesh in self.instances:
+            self.writer.add_instance(name, mesh)
+        size = self.writer.save(path)
+        self.saved_path = path
+        self.log(f"Wrote {size} bytes")
+
+
+BACKENDS = {
+    "sdk": SdkMeshBuilder,
+    "native": NativeMeshBuilder,
+    "memory": RecordingMeshBuilder,
+}
+
+
+def create_mesh_builder(backend, log=print, session=None, output_format="fbx", gltf_layout="interleaved"):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown export backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}' (expected one of {', '.join(OUTPUT_FORMATS)})")
+    if output_format == "glb" and backend != "memory":
+        # glTF 不经过 FBX SDK，backend 只决定 FBX 的写法
+        return GltfMeshBuilder(log, gltf_layout)
+    if backend == "sdk":
+        return SdkMeshBuilder(log, session)
+    return BACKENDS[backend](log)
@@ -0,0 +1,99 @@
+import queue
+import time
+
+# 各阶段在整体进度中占的区间；流式模式边解析边写入，覆盖 parse 到 build
+STAGE_SPANS = {
+    "parse": (0.0, 0.44),
+    "validate": (0.44, 0.45),
+    "weld": (0.45, 0.5),
+    "group": (0.45, 0.5),
+    "derive": (0.5, 0.55),
+    "lod": (0.55, 0.6),
+    "optimize": (0.6, 0.65),
+    "build": (0.65, 0.8),
+    "stream": (0.0, 0.8),
+    "save": (0.8, 1.0),
+}
+
+STAGE_LABELS = {
+    "parse": "Parsing",
+    "validate": "Validating",
+    "weld": "Welding",
+    "group": "Splitting groups",
+    "derive": "Deriving normals and tangents",
+    "lod": "Generating LODs",
+    "optimize": "Optimizing triangle order",
+    "build": "Building mesh",
+    "stream": "Streaming",
+    "save": "Saving",
+}
+
+
+class ProgressQueue:
+    """
+    Thread-safe channel from the conversion thread to the GUI.
+
+    The worker only puts events; the Tk thread drains them on a timer, so no
+    widget is touched from the worker and a burst of log lines costs one
+    Text insert per tick instead of one event-loop callback per line.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def progress(self, stage, done, total):
+        self.queue.put(("progress", stage, done, total))
+
+    def log(self, line):
+        self.queue.put(("log", line))
+
+    def finished(self, success):
+        self.queue.put(("finished", success))
+
+    def drain(self, limit=5000):
+        """Return up to limit pending events without blocking"""
+        events = []
+        try:
+            while len(events) < limit:
+                events.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+
+class ProgressEstimator:
+    """Maps (stage, done, total) reports to an overall fraction and an ETA"""
+
+    def __init__(self, spans=STAGE_SPANS):
+        self.spans = spans
+        self.started = time.perf_counter()
+        self.fraction = 0.0
+        self.stage = None
+        self.done = 0
+        self.total = 0
+
+    def update(self, stage, done, total):
+        start, end = self.spans.get(stage, (self.fraction, self.fraction))
+        part = min(done / total, 1.0) if total else 0.0
+        # 进度只增不减，跳过的阶段直接越过
+        self.fraction = max(self.fraction, start + (end - start) * part)
+        self.stage, self.done, self.total = stage, done, total
+
+    def eta_seconds(self):
+        """Remaining seconds extrapolated from the overall rate, None until there is a rate"""
+        elapsed = time.perf_counter() - self.started
+        if self.fraction < 0.01 or elapsed < 0.5:
+            return None
+        return elapsed * (1.0 - self.fraction) / self.fraction
+
+    def describe(self):
+        if self.stage is None:
+            return "Starting..."
+        text = STAGE_LABELS.get(self.stage, self.stage)
+        if self.total > 1:
+            text += f" {self.done:,}/{self.total:,} rows"
+        eta = self.eta_seconds()
+        if eta is not None and self.fraction < 1.0:
+            minutes, seconds = divmod(int(eta + 0.5), 60)
+            text += f"  -  ETA {minutes}:{seconds:02d}"
+        return text
@@ -0,0 +1,231 @@
+"""
+In-memory stand-in for the parts of the Autodesk `fbx` module used by
+SdkMeshBuilder. Every call is a real Python call that stores its argument, so
+benchmarks on machines without the SDK (e.g. Linux) still pay a per-element
+call cost comparable in shape to the Python/C++ crossings of the real SDK.
+Nothing is written to disk by FbxExporter.Export.
+"""
+
+
+class _Enum:
+    def __init__(self, *names):
+        for name in names:
+            setattr(self, name, name)
+
+
+class FbxLayerElement:
+    EMappingMode = _Enum("eNone", "eByControlPoint", "eByPolygonVertex", "eByPolygon", "eAllSame")
+    EReferenceMode = _Enum("eDirect", "eIndex", "eIndexToDirect")
+    EType = _Enum("eTextureDiffuse")
+
+
+class _LayerArray:
+    def __init__(self):
+        self.values = []
+
+    def Resize(self, count):
+        self.values = [None] * count
+
+    def SetAt(self, index, value):
+        self.values[index] = value
+
+    def GetAt(self, index):
+        return self.values[index]
+
+    def GetCount(self):
+        return len(self.values)
+
+
+class _LayerElement:
+    def __init__(self, name=""):
+        self.name = name
+        self.mapping = None
+        self.reference = None
+        self.direct = _LayerArray()
+        self.index = _LayerArray()
+
+    def SetMappingMode(self, mode):
+        self.mapping = mode
+
+    def SetReferenceMode(self, mode):
+        self.reference = mode
+
+    def GetDirectArray(self):
+        return self.direct
+
+    def GetIndexArray(self):
+        return self.index
+
+
+class _Layer:
+    def SetUVs(self, element, element_type):
+        self.uvs = element
+
+
+class _Object:
+    def Destroy(self):
+        pass
+
+
+class _Registry:
+    def GetWriterFormatCount(self):
+        return 2
+
+    def GetNativeWriterFormat(self):
+        return 0
+
+    def WriterIsFBX(self, index):
+        return True
+
+    def GetWriterFormatDescription(self, index):
+        return ("FBX binary (*.fbx)", "FBX ascii (*.fbx)")[index]
+
+
+class FbxManager(_Object):
+    @staticmethod
+    def Create():
+        return FbxManager()
+
+    def GetIOPluginRegistry(self):
+        return _Registry()
+
+    def GetIOSettings(self):
+        return None
+
+    def SetIOSettings(self, settings):
+        pass
+
+
+IOSROOT = "IOSRoot"
+
+
+class FbxIOSettings(_Object):
+    @staticmethod
+    def Create(manager, name):
+        return FbxIOSettings()
+
+
+class FbxNode(_Object):
+    def __init__(self, name=""):
+        self.name = name
+        self.children = []
+        self.attribute = None
+
+    @staticmethod
+    def Create(scene, name):
+        return FbxNode(name)
+
+    def AddChild(self, node):
+        self.children.append(node)
+
+    def SetNodeAttribute(self, attribute):
+        self.attribute = attribute
+
+    def GetName(self):
+        return self.name
+
+
+class FbxScene(_Object):
+    def __init__(self):
+        self.root = FbxNode("RootNode")
+
+    @staticmethod
+    def Create(manager, name):
+        return FbxScene()
+
+    def GetRootNode(self):
+        return self.root
+
+
+class FbxMesh(_Object):
+    def __init__(self):
+        self.control_points = []
+        self.polygons = []
+        self.normals = []
+        self.elements = []
+        self.layers = []
+
+    @staticmethod
+    def Create(scene, name):
+        return FbxMesh()
+
+    def InitControlPoints(self, count):
+        self.control_points = [None] * count
+
+    def SetControlPointAt(self, point, index):
+        self.control_points[index] = point
+
+    def BeginPolygon(self, material=-1):
+        self.polygons.append([])
+
+    def AddPolygon(self, index):
+        self.polygons[-1].append(index)
+
+    def EndPolygon(self):
+        pass
+
+    def CreateElementNormal(self):
+        element = _LayerElement()
+        self.normals.append(element)
+        return element
+
+    def GetElementNormalCount(self):
+        return len(self.normals)
+
+    def GetElementNormal(self, index):
+        return self.normals[index]
+
+    def RemoveElementNormal(self, element):
+        self.normals.remove(element)
+
+    def _create_element(self, name=""):
+        element = _LayerElement(name)
+        self.elements.append(element)
+        return element
+
+    def CreateElementUV(self, name):
+        return self._create_element(name)
+
+    def CreateElementTangent(self):
+        return self._create_element()
+
+    def CreateElementVertexColor(self):
+        return self._create_element()
+
+    def GetLayer(self, index):
+        return self.layers[index] if index < len(self.layers) else None
+
+    def CreateLayer(self):
+        self.layers.append(_Layer())
+
+
+class _Status:
+    def GetErrorString(self):
+        return ""
+
+
+class FbxExporter(_Object):
+    @staticmethod
+    def Create(manager, name):
+        return FbxExporter()
+
+    def Initialize(self, path, file_format=-1, settings=None):
+        return True
+
+    def Export(self, scene):
+        return True
+
+    def GetStatus(self):
+        return _Status()
+
+
+def FbxVector4(x=0.0, y=0.0, z=0.0, w=1.0):
+    return (x, y, z, w)
+
+
+def FbxVector2(x=0.0, y=0.0):
+    return (x, y)
+
+
+def FbxColor(r=0.0, g=0.0, b=0.0, a=1.0):
+    return (r, g, b, a)
@@ -0,0 +1,434 @@
+"""
+Local HTTP conversion service.
+
+A long-running process that keeps a warm pool of converter workers (each
+with its FbxManager created at start-up, as in batch) and takes jobs over
+HTTP, so tools that need CSV -> FBX no longer pay for interpreter start-up
+and SDK initialization on every call.
+
+    POST   /jobs                 {"input": "capture.csv", "options": {...}, "output": "out.fbx"}
+                                 or a raw CSV body (Content-Type: text/csv, ?name=capture)
+    GET    /jobs                 all known jobs
+    GET    /jobs/<id>            status and, once finished, the result record
+    GET    /jobs/<id>/result     the converted file
+    POST   /jobs/<id>/cancel     cancel a queued job (a running one is discarded when it ends)
+    DELETE /jobs/<id>            cancel and forget the job, removing files the service owns
+    GET    /health               liveness plus queue and worker counts
+    GET    /metrics              job counters and conversion latencies
+
+Job options are csv_to_fbx keyword arguments layered over the service
+defaults. At most max_queue jobs may be waiting or running; more are refused
+with 503 so callers can back off. The service binds to localhost only by
+default; inputs and outputs are paths on this machine.
+
+Every route but /health needs "Authorization: Bearer <token>" with the
+token of this instance (printed at start-up and written to <work_dir>/token),
+and POST bodies must be application/json or text/csv: a web page can make
+neither request without a CORS preflight, so it cannot drive the service.
+Outputs must lie in the work directory or a directory given with
+--allow-output-dir; relative outputs are taken relative to the work
+directory. Only files the service created are ever removed.
+"""
+import argparse
+import collections
+import hmac
+import json
+import os
+import secrets
+import shutil
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from batch import _init_worker, convert_one, load_mapping, mapping_keys, output_extension, output_path_for
+
+DEFAULT_PORT = 8765
+TOKEN_FILE = "token"
+# 浏览器不经 CORS 预检无法发送这两种以外的类型
+BODY_TYPES = ("application/json", "text/csv")
+
+
+class ServiceError(Exception):
+    """Request error with the HTTP status to answer with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Job:
+    """One submitted conversion and, once finished, its result record"""
+
+    def __init__(self, job_id, csv_path, fbx_path, options, work_dir=None, owns_output=True):
+        self.id = job_id
+        self.csv_path = csv_path
+        self.fbx_path = fbx_path
+        self.options = options
+        # 服务自己创建的目录（上传的 CSV、默认输出），删除任务时一并清理
+        self.work_dir = work_dir
+        # 提交时输出文件已存在则不属于服务，取消任务时不删除
+        self.owns_output = owns_output
+        self.submitted = time.time()
+        self.finished = None
+        self.cancelled = False
+        self.future = None
+        self.result = None
+
+    @property
+    def state(self):
+        if self.cancelled:
+            return "cancelled"
+        if self.result is not None:
+            return "done" if self.result["ok"] else "failed"
+        if self.future is not None and self.future.running():
+            return "running"
+        return "queued"
+
+    @property
+    def active(self):
+        return self.result is None and not (self.cancelled and self.future is not None and self.future.done())
+
+    def to_dict(self):
+        record = {"id": self.id, "state": self.state, "input": self.csv_path, "output": self.fbx_path,
+                  "submitted": self.submitted, "finished": self.finished}
+        if self.result is not None:
+            record["result"] = self.result
+        return record
+
+
+class ConversionService:
+    """
+    Job registry in front of a warm process pool.
+
+    token authorizes requests (a random one when omitted); output_dirs are
+    the directories besides work_dir that job outputs may be written to.
+    """
+
+    def __init__(self, work_dir, jobs=None, backend="sdk", options=None, max_queue=256, keep_jobs=1000,
+                 token=None, output_dirs=()):
+        self.work_dir = os.path.realpath(work_dir)
+        self.token = token or secrets.token_urlsafe(24)
+        self.output_dirs = [self.work_dir] + [os.path.realpath(path) for path in output_dirs]
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.backend = backend
+        self.options = dict(options or {})
+        self.options.setdefault("backend", backend)
+        self.max_queue = max_queue
+        self.keep_jobs = keep_jobs
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.registry = collections.OrderedDict()
+        self.counters = collections.Counter()
+        self.latencies = collections.deque(maxlen=1000)
+        self.executor = None
+
+    def start(self):
+        os.makedirs(self.work_dir, exist_ok=True)
+        # 本机工具从这里读取令牌；只有当前用户可读
+        token_path = os.path.join(self.work_dir, TOKEN_FILE)
+        descriptor = os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w", encoding="ascii") as token_file:
+            token_file.write(self.token)
+        self.executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker,
+                                            initargs=(self.backend,))
+        # 提前拉起所有工作进程，让第一个任务不必等待进程启动和 SDK 初始化
+        for future in [self.executor.submit(os.getpid) for _ in range(self.jobs)]:
+            future.result()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def authorized(self, header):
+        """Whether an Authorization header value carries this instance's token"""
+        scheme, _, token = (header or "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(token.strip().encode(), self.token.encode())
+
+    def _output_path(self, output):
+        """Absolute output path, refused unless it lies in an allowed directory"""
+        fbx_path = os.path.realpath(os.path.join(self.work_dir, output))
+        if not any(os.path.commonpath([fbx_path, directory]) == directory for directory in self.output_dirs):
+            raise ServiceError(403, f"Output outside the allowed directories: {output}")
+        return fbx_path
+
+    def _check_options(self, options):
+        if not isinstance(options, dict):
+            raise ServiceError(400, "options must be a JSON object")
+        # profile 不是 JSON 可表示的选项
+        unknown = sorted(set(options) - (set(mapping_keys()) - {"profile"}))
+        if unknown:
+            raise ServiceError(400, f"Unknown options: {', '.join(unknown)}")
+        return dict(self.options, **options)
+
+    def submit(self, csv_path=None, options=None, output=None, upload=None, name="upload"):
+        """
+        Queue a conversion of csv_path, or of upload (CSV bytes) saved under
+        the job's directory. Returns the Job; raises ServiceError when the
+        request is invalid or the queue is full.
+        """
+        options = self._check_options(options or {})
+        extension = output_extension(options)
+        fbx_path = self._output_path(output) if output else None
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = None
+        if upload is not None:
+            job_dir = os.path.join(self.work_dir, job_id)
+            os.makedirs(job_dir, exist_ok=True)
+            csv_path = os.path.join(job_dir, os.path.basename(name) + ".csv")
+            with open(csv_path, "wb") as csv_file:
+                csv_file.write(upload)
+        elif not csv_path or not os.path.isfile(csv_path):
+            raise ServiceError(400, f"Input not found: {csv_path}")
+        csv_path = os.path.abspath(csv_path)
+        if fbx_path:
+            os.makedirs(os.path.dirname(fbx_path), exist_ok=True)
+        else:
+            job_dir = job_dir or os.path.join(self.work_dir, job_id)
+            os.makedirs(job_dir, exist_ok=True)
+            fbx_path = output_path_for(csv_path, job_dir, extension)
+
+        job = Job(job_id, csv_path, fbx_path, options, job_dir, not os.path.exists(fbx_path))
+        with self.lock:
+            if sum(1 for other in self.registry.values() if other.active) >= self.max_queue:
+                self._remove_files(job)
+                raise ServiceError(503, f"Queue is full ({self.max_queue} jobs)")
+            self.registry[job_id] = job
+            self.counters["submitted"] += 1
+            job.future = self.executor.submit(convert_one, csv_path, fbx_path, options)
+        job.future.add_done_callback(lambda future: self._finished(job, future))
+        return job
+
+    def _finished(self, job, future):
+        # 在进程池的管理线程中调用
+        if future.cancelled():
+            result = None
+        else:
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"input": job.csv_path, "output": job.fbx_path, "ok": False, "seconds": None,
+                          "messages": [f"Error: worker failed: {e}"], "stages": []}
+        with self.lock:
+            job.finished = time.time()
+            if job.cancelled or result is None:
+                # 取消时已在运行的任务：结果作废，删除输出
+                job.cancelled = True
+                self.counters["cancelled"] += 1
+                self._remove_output(job)
+            else:
+                job.result = result
+                self.counters["succeeded" if result["ok"] else "failed"] += 1
+                self.latencies.append(job.finished - job.submitted)
+            if job.id not in self.registry:
+                # 运行中被删除的任务，结束后再清理文件
+                self._remove_files(job)
+            self._evict()
+
+    def _evict(self):
+        finished = [job for job in self.registry.values() if not job.active]
+        for job in finished[:max(0, len(finished) - self.keep_jobs)]:
+            del self.registry[job.id]
+            self._remove_files(job)
+
+    def _remove_output(self, job):
+        if job.owns_output and os.path.exists(job.fbx_path):
+            os.remove(job.fbx_path)
+
+    def _remove_files(self, job):
+        if job.work_dir is not None:
+            shutil.rmtree(job.work_dir, ignore_errors=True)
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.registry.get(job_id)
+        if job is None:
+            raise ServiceError(404, f"No such job: {job_id}")
+        return job
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        with self.lock:
+            if job.active:
+                job.cancelled = True
+        # 排队中的任务直接取消；已在运行的由 _finished 丢弃结果
+        job.future.cancel()
+        return job
+
+    def remove(self, job_id):
+        job = self.cancel(job_id)
+        with self.lock:
+            self.registry.pop(job.id, None)
+            if not job.active:
+                self._remove_files(job)
+        return job
+
+    def list(self):
+        with self.lock:
+            return [job.to_dict() for job in self.registry.values()]
+
+    def health(self):
+        with self.lock:
+            states = collections.Counter(job.state for job in self.registry.values())
+        return {"status": "ok", "workers": self.jobs, "backend": self.backend,
+                "queued": states["queued"], "running": states["running"],
+                "max_queue": self.max_queue, "uptime_seconds": round(time.time() - self.started, 1)}
+
+    def metrics(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            metrics = dict(self.counters)
+        for name in ("submitted", "succeeded", "failed", "cancelled"):
+            metrics.setdefault(name, 0)
+        if latencies:
+            metrics["latency_p50_seconds"] = round(latencies[len(latencies) // 2], 3)
+            metrics["latency_p95_seconds"] = round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 3)
+            metrics["latency_max_seconds"] = round(latencies[-1], 3)
+        metrics.update(self.health())
+        return metrics
+
+
+def make_handler(service, max_body_mb=1024):
+    """BaseHTTPRequestHandler subclass serving the routes in the module docstring"""
+
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "csv2fbx-service"
+
+        def log_message(self, format, *args):
+            pass  # 每个请求一行的访问日志对轮询的客户端太吵
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > max_body_mb * 1024 * 1024:
+                raise ServiceError(413, f"Request body exceeds {max_body_mb} MB")
+            return self.rfile.read(length)
+
+        def _route(self, method):
+            url = urlparse(self.path)
+            parts = [part for part in url.path.split("/") if part]
+            query = parse_qs(url.query)
+            try:
+                if method == "GET" and parts == ["health"]:
+                    return self._send_json(200, service.health())
+                if not service.authorized(self.headers.get("Authorization")):
+                    raise ServiceError(401, "Missing or wrong token (Authorization: Bearer <token>)")
+                if method == "GET" and parts == ["metrics"]:
+                    return self._send_json(200, service.metrics())
+                if parts == ["jobs"]:
+                    if method == "GET":
+                        return self._send_json(200, {"jobs": service.list()})
+                    if method == "POST":
+                        return self._send_json(202, self._submit(query).to_dict())
+                if len(parts) >= 2 and parts[0] == "jobs":
+                    job_id = parts[1]
+                    if method == "GET" and len(parts) == 2:
+                        return self._send_json(200, service.get(job_id).to_dict())
+                    if method == "GET" and parts[2:] == ["result"]:
+                        return self._send_result(service.get(job_id))
+                    if method == "POST" and parts[2:] == ["cancel"]:
+                        return self._send_json(200, service.cancel(job_id).to_dict())
+                    if method == "DELETE" and len(parts) == 2:
+                        return self._send_json(200, service.remove(job_id).to_dict())
+                raise ServiceError(404, f"No route for {method} {url.path}")
+            except ServiceError as e:
+                self._send_json(e.status, {"error": str(e)})
+            except (ValueError, OSError) as e:
+                self._send_json(400, {"error": str(e)})
+
+        def _submit(self, query):
+            content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type not in BODY_TYPES:
+                raise ServiceError(415, f"Content-Type must be one of {', '.join(BODY_TYPES)}")
+            body = self._body()
+            if content_type == "text/csv":
+                options = json.loads(query["options"][0]) if "options" in query else {}
+                return service.submit(options=options, upload=body, name=query.get("name", ["upload"])[0],
+                                      output=query.get("output", [None])[0])
+            request = json.loads(body or b"{}")
+            return service.submit(request.get("input"), request.get("options"), request.get("output"))
+
+        def _send_result(self, job):
+            if job.state != "done" or not os.path.isfile(job.fbx_path):
+                raise ServiceError(409 if job.active else 404, f"Job {job.id} has no result ({job.state})")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(os.path.getsize(job.fbx_path)))
+            self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(job.fbx_path)}"')
+            self.end_headers()
+            with open(job.fbx_path, "rb") as result_file:
+                shutil.copyfileobj(result_file, self.wfile)
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+        def do_DELETE(self):
+            self._route("DELETE")
+
+    return Handler
+
+
+def serve(service, host="127.0.0.1", port=DEFAULT_PORT, max_body_mb=1024):
+    """Start the pool and serve until interrupted"""
+    service.start()
+    server = ThreadingHTTPServer((host, port), make_handler(service, max_body_mb))
+    server.daemon_threads = True
+    print(f"Serving on http://{host}:{server.server_address[1]} with {service.jobs} workers "
+          f"({service.backend} backend)")
+    print(f"Token: {service.token} (also in {os.path.join(service.work_dir, TOKEN_FILE)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="csv2fbx serve", description="Local HTTP CSV to FBX conversion service")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default {DEFAULT_PORT})")
+    parser.add_argument("-j", "--jobs", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--backend", choices=("sdk", "native"), default="sdk", help="Export backend")
+    parser.add_argument("-c", "--config", help="JSON file with default csv_to_fbx options for every job")
+    parser.add_argument("--work-dir", default="csv2fbx_service", help="Where uploads and default outputs go")
+    parser.add_argument("--max-queue", type=int, default=256, help="Jobs that may wait or run at once (default 256)")
+    parser.add_argument("--keep-jobs", type=int, default=1000, help="Finished jobs kept for status and download")
+    parser.add_argument("--max-body-mb", type=int, default=1024, help="Largest accepted upload")
+    parser.add_argument("--token", default=os.environ.get("CSV2FBX_SERVICE_TOKEN"),
+                        help="Token clients must send (default: $CSV2FBX_SERVICE_TOKEN, else a random one)")
+    parser.add_argument("--allow-output-dir", action="append", default=[], metavar="DIR",
+                        help="Also allow job outputs under this directory (repeatable; default: work dir only)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        options = load_mapping(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    service = ConversionService(args.work_dir, args.jobs, args.backend, options, args.max_queue, args.keep_jobs,
+                                args.token, args.allow_output_dir)
+    serve(service, args.host, args.port, args.max_body_mb)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Validation and sanitization of parsed capture data.
+
+Runs once over the parsed columns, before any mesh or scene is built, so a
+bad capture fails (or is repaired) in a few vectorized passes instead of
+deep inside a set_mesh_* loop. Row numbers in reports count data rows from
+0, the first line after the header (file line = row + 2 without blank lines).
+
+Errors (short rows, non-numeric or non-finite cells, invalid IDs) are handled
+by the policy:
+
+    fail    report and stop the conversion
+    drop    remove every triangle that uses a bad row
+    clamp   NaN -> 0, +/-inf -> the largest / smallest finite value of the column
+    zero    every bad value -> 0
+
+Invalid vertex IDs cannot be repaired by value; clamp and zero give those rows
+fresh IDs so that they weld with nothing. Incomplete and degenerate triangles
+are warnings: drop removes them, the other policies only report them.
+"""
+import numpy as np
+
+from csv_ingest import ID_ATTRIBUTES
+from grouping import partition_rows
+
+POLICIES = ("fail", "drop", "clamp", "zero")
+
+# 问题类型 -> (级别, 说明)
+ISSUE_KINDS = {
+    "short_row": ("error", "rows with fewer columns than mapped"),
+    "non_numeric": ("error", "rows with non-numeric cells"),
+    "non_finite": ("error", "rows with NaN or infinite values"),
+    "invalid_id": ("error", "rows with a negative or missing ID"),
+    "incomplete_triangle": ("warning", "rows left over after the last full triangle"),
+    "degenerate_triangle": ("warning", "degenerate triangles (zero area or a repeated vertex)"),
+}
+
+
+class ValidationReport:
+    """Issues found in one capture: kind and attribute -> data row numbers"""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.row_count = 0
+        self.dropped_rows = 0
+        self.repaired_rows = 0
+        self._rows = {}
+
+    def add(self, kind, rows, attribute=None):
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows):
+            self._rows.setdefault((kind, attribute), []).append(rows)
+
+    def rows(self, kind, attribute=None):
+        found = self._rows.get((kind, attribute))
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    @property
+    def issues(self):
+        """(kind, attribute, rows) in ISSUE_KINDS order"""
+        order = list(ISSUE_KINDS)
+        keys = sorted(self._rows, key=lambda key: (order.index(key[0]), key[1] or ""))
+        return [(kind, attribute, self.rows(kind, attribute)) for kind, attribute in keys]
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if ISSUE_KINDS[issue[0]][0] == "error"]
+
+    @property
+    def warnings(self):
+        return [issue for issue in self.issues if ISSUE_KINDS[issue[0]][0] == "warning"]
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def describe(self, limit=10):
+        """
+        Log lines: a summary, then one line per issue with its first rows.
+        Errors are logged as "Error:" only under "fail"; the other policies
+        handled them, so they are warnings there.
+        """
+        lines = [f"Validation ({self.policy}): {self.row_count} rows, {len(self.errors)} errors, "
+                 f"{len(self.warnings)} warnings"]
+        for kind, attribute, rows in self.issues:
+            severity, text = ISSUE_KINDS[kind]
+            label = "Error" if severity == "error" and self.policy == "fail" else "Warning"
+            shown = ", ".join(str(row) for row in rows[:limit])
+            more = f" and {len(rows) - limit} more" if len(rows) > limit else ""
+            where = f" in '{attribute}'" if attribute else ""
+            lines.append(f"{label}: {len(rows)} {text}{where} (rows {shown}{more})")
+        if self.dropped_rows:
+            lines.append(f"Dropped {self.dropped_rows} rows")
+        if self.repaired_rows:
+            lines.append(f"Repaired {self.repaired_rows} rows ({self.policy})")
+        return lines
+
+    def to_dict(self, limit=1000):
+        return {
+            "policy": self.policy,
+            "rows": self.row_count,
+            "ok": self.ok,
+            "dropped_rows": self.dropped_rows,
+            "repaired_rows": self.repaired_rows,
+            "issues": [{"kind": kind, "severity": ISSUE_KINDS[kind][0], "attribute": attribute,
+                        "count": len(rows), "rows": rows[:limit].tolist()}
+                       for kind, attribute, rows in self.issues],
+        }
+
+
+def _bad_row_masks(csv_data):
+    """Attribute name -> bool mask of rows with an error in that attribute"""
+    masks = {}
+    for name, values in csv_data.arrays.items():
+        if name in ID_ATTRIBUTES:
+            masks[name] = values < 0
+        elif values.ndim == 2:
+            masks[name] = ~np.isfinite(values).all(axis=1)
+        else:
+            masks[name] = ~np.isfinite(values)
+    return masks
+
+
+def triangle_rows(csv_data):
+    """
+    (T, 3) row numbers of every triangle, as the converter assembles them:
+    consecutive rows, within each group when the capture has a group column.
+    """
+    count = len(csv_data)
+    group = csv_data.group
+    if group is None:
+        return np.arange(count // 3 * 3, dtype=np.int64).reshape(-1, 3)
+    parts = [rows[:len(rows) // 3 * 3] for rows in (g.rows for g in partition_rows(group))]
+    rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+    return rows.astype(np.int64).reshape(-1, 3)
+
+
+def degenerate_triangles(positions, triangles, vtx_id=None, relative_area=1e-12):
+    """
+    Triangles (as rows of positions) with a repeated vertex ID or an area
+    below relative_area times their squared longest edge; triangles with
+    non-finite corners are not reported here.
+    """
+    corners = positions[triangles].astype(np.float64)
+    edge1 = corners[:, 1] - corners[:, 0]
+    edge2 = corners[:, 2] - corners[:, 0]
+    edge3 = corners[:, 2] - corners[:, 1]
+    with np.errstate(invalid="ignore", over="ignore"):
+        area = np.linalg.norm(np.cross(edge1, edge2), axis=1)
+        longest = np.max(np.stack([np.einsum("ij,ij->i", e, e) for e in (edge1, edge2, edge3)]), axis=0)
+        degenerate = area <= relative_area * longest
+    if vtx_id is not None:
+        ids = vtx_id[triangles]
+        degenerate |= (ids[:, 0] == ids[:, 1]) | (ids[:, 1] == ids[:, 2]) | (ids[:, 0] == ids[:, 2])
+    return degenerate & np.isfinite(corners).all(axis=(1, 2))
+
+
+def _repair(csv_data, masks, policy):
+    """Copy of the columns with the bad values of every masked row replaced according to policy"""
+    arrays = dict(csv_data.arrays)
+    for name, mask in masks.items():
+        if not mask.any():
+            continue
+        values = arrays[name].copy()
+        if name == "vtx_id":
+            # 无效编号换成新的唯一编号，不与任何顶点焊接
+            start = int(values[~mask].max()) + 1 if (~mask).any() else 0
+            values[mask] = np.arange(start, start + int(mask.sum()))
+        elif name in ID_ATTRIBUTES:
+            values[mask] = 0
+        else:
+            bad = values[mask]
+            if policy == "clamp":
+                finite = np.isfinite(values)
+                high = np.where(finite, values, -np.inf).max(axis=0)
+                low = np.where(finite, values, np.inf).min(axis=0)
+                bad = np.where(np.isposinf(bad), high, np.where(np.isneginf(bad), low, bad))
+            bad[~np.isfinite(bad)] = 0
+            values[mask] = bad
+        arrays[name] = values
+    return type(csv_data)(arrays, len(csv_data))
+
+
+def validate_columns(csv_data, policy="fail", check_triangles=True, row_offset=0, report=None):
+    """
+    Check csv_data (a CsvColumns) and apply policy. Returns (csv_data, report).
+
+    With "fail" the data is returned unchanged and report.ok tells whether to
+    go on. check_triangles=False skips the triangle checks, for chunks that do
+    not start and end on triangle boundaries; row_offset numbers the rows of
+    such a chunk and report collects several chunks into one report.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown validation policy: {policy}")
+    if report is None:
+        report = ValidationReport(policy)
+    count = len(csv_data)
+    report.row_count += count
+
+    # 解析阶段读成 NaN 的行只按解析问题报告一次
+    parse_bad = np.zeros(count, dtype=bool)
+    for kind, rows in csv_data.issues.items():
+        report.add(kind, rows + row_offset)
+        parse_bad[rows] = True
+    masks = _bad_row_masks(csv_data)
+    bad = parse_bad.copy()
+    for name, mask in masks.items():
+        kind = "invalid_id" if name in ID_ATTRIBUTES else "non_finite"
+        report.add(kind, np.flatnonzero(mask & ~parse_bad) + row_offset, name)
+        bad |= mask
+
+    if policy in ("clamp", "zero") and bad.any():
+        csv_data = _repair(csv_data, masks, policy)
+        report.repaired_rows += int(bad.sum())
+
+    if not check_triangles:
+        return csv_data, report
+
+    triangles = triangle_rows(csv_data)
+    covered = np.zeros(count, dtype=bool)
+    covered[triangles.ravel()] = True
+    report.add("incomplete_triangle", np.flatnonzero(~covered) + row_offset)
+    degenerate = np.zeros(len(triangles), dtype=bool)
+    if csv_data.position is not None and len(triangles):
+        degenerate = degenerate_triangles(csv_data.position, triangles, csv_data.vtx_id)
+        report.add("degenerate_triangle", triangles[degenerate, 0] + row_offset)
+
+    if policy == "drop":
+        keep = ~(degenerate | bad[triangles].any(axis=1))
+        rows = np.sort(triangles[keep].ravel())
+        report.dropped_rows += count - len(rows)
+        if len(rows) != count:
+            csv_data = csv_data.take(rows)
+    return csv_data, report
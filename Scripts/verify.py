@@ -0,0 +1,367 @@
+"""
+Round-trip verification of an exported file against its source CSV.
+
+The written file is read back, through our own binary FBX / GLB readers (no
+SDK needed) or through the FBX SDK (FbxCommon.LoadScene), and the position,
+normal, tangent, color and UVs at every triangle corner are compared with
+the CSV row the corner came from, per attribute tolerance, in a few
+vectorized gathers. The sampled mode checks a random subset of triangles;
+with the parse cache warm, verification then costs little more than reading
+the written file back.
+
+Rows are lined up with the export the way csv_to_fbx builds it: one part
+per group of the grouping column, the validation policy applied, corner i
+of a mesh coming from row i of its part (welding keeps the triangle order).
+With optimize the triangles are reordered, so they are matched by their
+exact corner positions instead. Only LOD0 of generated LODs is checked and
+derived ("always") normals / tangents are not compared.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from fbx_binary import LayerData, read_meshes
+from grouping import partition_rows
+
+# 属性 -> 绝对容差；另加 1e-6 的相对容差，覆盖 GLB 的 float32 舍入
+DEFAULT_TOLERANCES = {
+    "position": 1e-5,
+    "normal": 1e-3,
+    "tangent": 1e-3,
+    "color": 1e-3,
+    "uv0": 1e-5,
+    "uv1": 1e-5,
+}
+RELATIVE_TOLERANCE = 1e-6
+
+# 导出后的图层键 -> 比较的分量数
+_WIDTHS = {"position": 3, "normal": 3, "tangent": 3, "color": 4, "uv0": 2, "uv1": 2}
+_PROBLEMS = {
+    "missing_mesh": "meshes missing from the file",
+    "triangle_count": "meshes with a different triangle count",
+    "missing_layer": "layers missing from the file",
+    "unmatched_triangle": "meshes with triangles that match no CSV triangle",
+}
+
+
+class VerifyReport:
+    """Per-attribute differences between an exported file and its CSV"""
+
+    def __init__(self, path, sample=None):
+        self.path = path
+        self.sample = sample
+        self.meshes = 0
+        self.triangles = 0
+        self.checked_triangles = 0
+        self.skipped = []
+        # 问题类型 -> [说明]
+        self.problems = {}
+        # 属性 -> {checked, mismatched, max_error, tolerance, where}
+        self.attributes = {}
+
+    def problem(self, kind, text):
+        self.problems.setdefault(kind, []).append(text)
+
+    def record(self, attribute, tolerance, errors, bad, where):
+        stats = self.attributes.setdefault(attribute, {"checked": 0, "mismatched": 0, "max_error": 0.0,
+                                                       "tolerance": tolerance, "where": []})
+        stats["checked"] += len(errors)
+        stats["mismatched"] += int(bad.sum())
+        if len(errors):
+            stats["max_error"] = max(stats["max_error"], float(errors.max()))
+        stats["where"].extend(where)
+
+    @property
+    def ok(self):
+        return not self.problems and not any(stats["mismatched"] for stats in self.attributes.values())
+
+    def describe(self, limit=5):
+        sampled = f"{self.sample:.0%} sample, " if self.sample else ""
+        lines = [f"Verify {self.path}: {self.meshes} meshes, {sampled}{self.checked_triangles} of "
+                 f"{self.triangles} triangles checked, {'OK' if self.ok else 'MISMATCH'}"]
+        for kind, texts in self.problems.items():
+            more = f" and {len(texts) - limit} more" if len(texts) > limit else ""
+            lines.append(f"Error: {len(texts)} {_PROBLEMS[kind]} ({', '.join(texts[:limit])}{more})")
+        for attribute, stats in self.attributes.items():
+            if stats["mismatched"]:
+                where = ", ".join(stats["where"][:limit])
+                lines.append(f"Error: '{attribute}' differs at {stats['mismatched']} of {stats['checked']} corners "
+                             f"(max error {stats['max_error']:.3g} > {stats['tolerance']:g}; {where})")
+            else:
+                lines.append(f"{attribute}: {stats['checked']} corners within {stats['tolerance']:g} "
+                             f"(max error {stats['max_error']:.3g})")
+        for text in self.skipped:
+            lines.append(f"Skipped {text}")
+        return lines
+
+    def to_dict(self, limit=100):
+        return {
+            "path": self.path,
+            "ok": self.ok,
+            "sample": self.sample,
+            "meshes": self.meshes,
+            "triangles": self.triangles,
+            "checked_triangles": self.checked_triangles,
+            "problems": {kind: texts[:limit] for kind, texts in self.problems.items()},
+            "attributes": {attribute: dict(stats, where=stats["where"][:limit])
+                           for attribute, stats in self.attributes.items()},
+            "skipped": self.skipped,
+        }
+
+
+def read_scene_sdk(path, session=None):
+    """read_meshes() through the FBX SDK, for ASCII files and files written by other tools"""
+    import FbxCommon  # 只有用 SDK 读取时才加载
+    from fbx_session import get_session
+
+    session = session or get_session()
+    meshes = []
+    nodes = []
+    numbers = {}
+    with session.scene("Verify") as scene:
+        if not FbxCommon.LoadScene(session.manager, scene, path):
+            raise ValueError(f"The FBX SDK could not load {path}")
+        pending = [scene.GetRootNode()]
+        while pending:
+            node = pending.pop()
+            pending.extend(node.GetChild(i) for i in reversed(range(node.GetChildCount())))
+            mesh = node.GetMesh()
+            if mesh is None:
+                continue
+            key = mesh.GetUniqueID()
+            if key not in numbers:
+                numbers[key] = len(meshes)
+                meshes.append(_sdk_mesh(session.fbx, mesh))
+            nodes.append((node.GetName(), numbers[key]))
+    return meshes, nodes
+
+
+def _sdk_mesh(fbx, mesh):
+    if any(mesh.GetPolygonSize(i) != 3 for i in range(mesh.GetPolygonCount())):
+        raise ValueError(f"Mesh '{mesh.GetName()}' has polygons other than triangles")
+    positions = np.array([[point[0], point[1], point[2]] for point in mesh.GetControlPoints()],
+                         dtype=np.float64).reshape(-1, 3)
+    indices = np.array(mesh.GetPolygonVertices(), dtype=np.int64)
+
+    EMappingMode = fbx.FbxLayerElement.EMappingMode
+    EReferenceMode = fbx.FbxLayerElement.EReferenceMode
+
+    def layer(element, width, convert):
+        direct = element.GetDirectArray()
+        values = np.array([convert(direct.GetAt(i)) for i in range(direct.GetCount())],
+                          dtype=np.float64).reshape(-1, width)
+        mode = element.GetMappingMode()
+        if mode == EMappingMode.eByControlPoint:
+            mapping = "ByVertice"
+        elif mode == EMappingMode.eByPolygonVertex:
+            mapping = "ByPolygonVertex"
+        else:
+            raise ValueError(f"Unsupported mapping mode of '{element.GetName()}'")
+        index = None
+        if element.GetReferenceMode() != EReferenceMode.eDirect:
+            index_array = element.GetIndexArray()
+            index = np.array([index_array.GetAt(i) for i in range(index_array.GetCount())], dtype=np.int64)
+        return LayerData(values, mapping, index, element.GetName())
+
+    vector3 = lambda v: (v[0], v[1], v[2])
+    vector4 = lambda v: (v[0], v[1], v[2], v[3])
+    layers = {}
+    if mesh.GetElementNormalCount():
+        layers["normal"] = layer(mesh.GetElementNormal(0), 3, vector3)
+    if mesh.GetElementTangentCount():
+        layers["tangent"] = layer(mesh.GetElementTangent(0), 4, vector4)
+    if mesh.GetElementVertexColorCount():
+        layers["color"] = layer(mesh.GetElementVertexColor(0), 4,
+                                lambda c: (c.mRed, c.mGreen, c.mBlue, c.mAlpha))
+    for i in range(mesh.GetElementUVCount()):
+        uv = layer(mesh.GetElementUV(i), 2, lambda v: (v[0], v[1]))
+        layers[f"uv:{uv.name}"] = uv
+    return {"name": mesh.GetName(), "vertex_count": len(positions), "positions": positions,
+            "indices": indices, "layers": layers}
+
+
+def read_exported(path, reader="native"):
+    """(meshes, nodes) of a written .fbx / .glb file; reader "sdk" loads FBX through the FBX SDK"""
+    if os.path.splitext(path)[1].lower() == ".glb":
+        from gltf import read_glb  # 只有校验 GLB 时才需要
+
+        return read_glb(path)
+    if reader == "sdk":
+        return read_scene_sdk(path)
+    return read_meshes(path)
+
+
+def expected_parts(csv_data, mesh_name, options):
+    """Node name -> (CsvColumns of its rows, attributes to compare), as csv_to_fbx names the nodes"""
+    attributes = ["position"] + [name for name in ("normal", "tangent", "color", "uv0", "uv1")
+                                 if csv_data.get(name) is not None]
+    for name, mode in (("normal", options.get("derive_normals")), ("tangent", options.get("derive_tangents"))):
+        if mode == "always" and name in attributes:
+            attributes.remove(name)
+    suffix = "_LOD0" if options.get("lod_count") else ""
+    if options.get("group_id") is not None and csv_data.group is not None:
+        return {f"{mesh_name}_{group.key}{suffix}": (csv_data.take(group.rows), attributes)
+                for group in partition_rows(csv_data.group)}
+    return {mesh_name + suffix: (csv_data, attributes)}
+
+
+def _tolerances(options, tolerances=None):
+    result = dict(DEFAULT_TOLERANCES)
+    # 按属性焊接和图层去重会把容差以内的值合并
+    welded = options.get("weld") == "attributes" or (options.get("lod_count") and not options.get("weld"))
+    slack = max(options.get("weld_tolerance") or 0 if welded else 0,
+                options.get("dedup_tolerance") or 0 if options.get("dedup_layers") else 0)
+    for name in result:
+        result[name] = max(result[name], slack)
+    result.update(tolerances or {})
+    return result
+
+
+def _exported_layers(mesh, attributes):
+    """Attribute name -> LayerData of the mesh; UV layers are taken in order (uv0 first)"""
+    layers = {name: mesh["layers"][name] for name in ("normal", "tangent", "color") if name in mesh["layers"]}
+    uvs = [layer for key, layer in mesh["layers"].items() if key.startswith("uv:")]
+    for name, layer in zip([name for name in ("uv0", "uv1") if name in attributes], uvs):
+        layers[name] = layer
+    return layers
+
+
+def _match_triangles(source_positions, exported_positions):
+    """Source triangle of every exported triangle (rows of 3 corners), -1 when none has the same corners"""
+    dtype = exported_positions.dtype
+    source = np.ascontiguousarray(source_positions.astype(dtype).reshape(-1, 9)) + dtype.type(0)
+    exported = np.ascontiguousarray(exported_positions.reshape(-1, 9)) + dtype.type(0)
+    row_type = np.dtype((np.void, 9 * dtype.itemsize))
+    source_keys = source.view(row_type).ravel()
+    exported_keys = exported.view(row_type).ravel()
+    order = np.argsort(source_keys)
+    found = np.minimum(np.searchsorted(source_keys[order], exported_keys), len(order) - 1)
+    matched = source_keys[order][found] == exported_keys
+    return np.where(matched, order[found], -1)
+
+
+def verify_scene(csv_data, meshes, nodes, mesh_name, options, path="", sample=None, seed=0, tolerances=None,
+                 unit_vectors=False):
+    """
+    Compare the meshes read back from a file with csv_data (parsed and
+    validated like the conversion did). options are the resolved csv_to_fbx
+    options; sample is the fraction of triangles to check (all when None).
+    unit_vectors compares normal / tangent directions only (GLB normalizes
+    them). Nodes of other captures (a merged scene) are ignored.
+    """
+    report = VerifyReport(path, sample)
+    tolerances = _tolerances(options, tolerances)
+    by_name = dict(nodes)
+    rng = np.random.default_rng(seed)
+    reordered = bool(options.get("optimize"))
+    if options.get("lod_count"):
+        report.skipped.append(f"the decimated levels LOD1..LOD{options['lod_count']}")
+
+    for name, (part, attributes) in expected_parts(csv_data, mesh_name, options).items():
+        if name not in by_name:
+            if len(part) < 3:
+                # 不足一个三角形的组不会写出网格
+                continue
+            report.problem("missing_mesh", name)
+            continue
+        mesh = meshes[by_name[name]]
+        report.meshes += 1
+        indices = np.asarray(mesh["indices"])
+        triangle_count = len(indices) // 3
+        report.triangles += triangle_count
+        if triangle_count != len(part) // 3:
+            report.problem("triangle_count", f"{name}: {triangle_count} instead of {len(part) // 3}")
+            continue
+
+        triangles = np.arange(triangle_count)
+        if sample:
+            size = min(triangle_count, max(1, int(np.ceil(triangle_count * sample))))
+            triangles = np.sort(rng.choice(triangle_count, size=size, replace=False))
+        corners = (triangles[:, None] * 3 + np.arange(3)).ravel()
+        positions = np.asarray(mesh["positions"])
+        exported = {"position": positions[indices[corners]]}
+        layers = _exported_layers(mesh, attributes)
+        for attribute in attributes[1:]:
+            if attribute in layers:
+                exported[attribute] = layers[attribute].at_corners(indices, corners)
+            else:
+                report.problem("missing_layer", f"{name}: {attribute}")
+
+        source_triangles = triangles
+        if reordered:
+            # 三角形顺序已改变：按三个角的位置找到来源三角形
+            source_positions = part.position[:triangle_count * 3]
+            source_triangles = _match_triangles(source_positions, exported["position"])
+            unmatched = source_triangles < 0
+            if unmatched.any():
+                report.problem("unmatched_triangle", f"{name}: {int(unmatched.sum())}")
+            keep = np.repeat(~unmatched, 3)
+            exported = {attribute: values[keep] for attribute, values in exported.items()}
+            triangles, source_triangles = triangles[~unmatched], source_triangles[~unmatched]
+        rows = (source_triangles[:, None] * 3 + np.arange(3)).ravel()
+        report.checked_triangles += len(triangles)
+
+        for attribute, actual in exported.items():
+            width = _WIDTHS[attribute]
+            actual = np.asarray(actual, dtype=np.float64)[:, :width]
+            expected = np.asarray(part.get(attribute), dtype=np.float64)[rows, :width]
+            if unit_vectors and attribute in ("normal", "tangent"):
+                lengths = np.linalg.norm(expected, axis=1, keepdims=True)
+                expected = expected / np.where(lengths > 0, lengths, 1)
+            tolerance = tolerances[attribute]
+            with np.errstate(invalid="ignore"):
+                difference = np.abs(actual - expected)
+                bad = (difference > tolerance + RELATIVE_TOLERANCE * np.abs(expected)).any(axis=1)
+            bad |= np.isnan(difference).any(axis=1) & ~np.isnan(expected).any(axis=1)
+            errors = np.nan_to_num(difference, nan=0.0).max(axis=1) if len(difference) else difference[:, 0]
+            bad_triangles = triangles[np.unique(np.flatnonzero(bad) // 3)[:10]]
+            where = [f"{name} triangle {triangle}" for triangle in bad_triangles]
+            report.record(attribute, tolerance, errors, bad, where)
+    return report
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="csv2fbx verify",
+                                     description="Compare an exported FBX / GLB file with its source CSV")
+    parser.add_argument("csv", help="Source CSV file")
+    parser.add_argument("output", help="Exported .fbx or .glb file")
+    parser.add_argument("-c", "--config", help="JSON file with the csv_to_fbx options used for the conversion")
+    parser.add_argument("--sample", type=float, help="Check only this fraction of the triangles, e.g. 0.05")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the sample (default 0)")
+    parser.add_argument("--sdk", action="store_true", help="Load the FBX file through the FBX SDK")
+    parser.add_argument("--tolerance", action="append", default=[], metavar="ATTRIBUTE=VALUE",
+                        help="Override a tolerance, e.g. position=1e-4 (repeatable)")
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    return parser
+
+
+def main(argv=None):
+    from batch import HeadlessConverter, load_mapping  # batch 依赖转换器，延迟导入
+
+    args = build_parser().parse_args(argv)
+    try:
+        options = load_mapping(args.config)
+        tolerances = {}
+        for item in args.tolerance:
+            name, _, value = item.partition("=")
+            if name not in DEFAULT_TOLERANCES:
+                raise ValueError(f"Unknown attribute '{name}' (expected one of {', '.join(DEFAULT_TOLERANCES)})")
+            tolerances[name] = float(value)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    # 与批量命令行一样使用解析缓存，刚转换过的 CSV 不必重新解析
+    options.setdefault("use_cache", True)
+
+    converter = HeadlessConverter("sdk" if args.sdk else None)
+    report = converter.verify_export(args.csv, args.output, args.sample, args.seed, "sdk" if args.sdk else "native",
+                                     tolerances, **options)
+    for line in converter.lines:
+        print(line)
+    if args.json and report is not None:
+        with open(args.json, "w", encoding="utf-8") as report_file:
+            json.dump(report.to_dict(), report_file, indent=2)
+    return 0 if report is not None and report.ok else 1
@@ -0,0 +1,310 @@
+"""
+Watch-folder daemon: converts CSVs that capture machines drop into shared
+directories, without anyone clicking Convert.
+
+Every poll_interval the watched directories are scanned (a stat per CSV).
+A new or changed file is only queued once its size and mtime have not moved
+for settle_seconds and it can be opened, so files still being written are
+left alone. Queued files go to one process pool; at most max_in_flight are
+submitted at a time and the rest wait in an ordered, de-duplicated queue,
+so a burst of hundreds of files costs memory for their paths only.
+
+Each directory may hold a csv2fbx.json with its own column mapping and
+export options (the same keys as batch -c), layered over the global ones.
+Conversions are recorded in the incremental-build manifest of the output
+directory, so restarting the daemon does not reconvert what is up to date.
+"""
+import collections
+import json
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from batch import _init_worker, convert_one, expand_inputs, load_mapping, output_extension, output_path_for
+from converter import CSV2FBXConverter
+from manifest import DEFAULT_MANIFEST, Manifest, resolve_options
+
+WATCH_CONFIG = "csv2fbx.json"
+
+
+class WatchedDirectory:
+    """
+    One watched directory: its options (global + csv2fbx.json), output
+    directory and manifest. Directories writing to the same output directory
+    must share one manifest: pass the same manifests dict (path -> Manifest)
+    to all of them.
+    """
+
+    def __init__(self, path, options=None, output_dir=None, recursive=False, use_manifest=True, manifests=None):
+        self.path = os.path.abspath(path)
+        self.options = dict(options or {})
+        config_path = os.path.join(self.path, WATCH_CONFIG)
+        if os.path.exists(config_path):
+            self.options.update(load_mapping(config_path))
+        self.output_dir = output_dir
+        self.recursive = recursive
+        self.resolved = resolve_options(CSV2FBXConverter, self.options)
+        self.extension = output_extension(self.options)
+        self.manifest = None
+        if use_manifest:
+            manifests = {} if manifests is None else manifests
+            manifest_path = os.path.abspath(os.path.join(output_dir or self.path, DEFAULT_MANIFEST))
+            if manifest_path not in manifests:
+                try:
+                    manifests[manifest_path] = Manifest.load(manifest_path)
+                except (OSError, ValueError):
+                    manifests[manifest_path] = Manifest(manifest_path)
+            self.manifest = manifests[manifest_path]
+
+    def output_for(self, csv_path):
+        return output_path_for(csv_path, self.output_dir, self.extension)
+
+    def scan(self):
+        """{csv path: (size, mtime_ns)} of every CSV currently in the directory"""
+        found = {}
+        for path in expand_inputs([self.path], self.recursive):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # 扫描期间被删除或改名
+            found[path] = (stat.st_size, stat.st_mtime_ns)
+        return found
+
+
+class WatchStats:
+    """Queue depth, throughput and latency counters of a watcher"""
+
+    def __init__(self, window_seconds=60.0, samples=1000):
+        self.window_seconds = window_seconds
+        self.started = time.monotonic()
+        self.queued = 0
+        self.converted = 0
+        self.failed = 0
+        self.finished_at = collections.deque()
+        # 就绪（文件稳定）到转换完成的秒数，以及其中排队等待的秒数
+        self.latencies = collections.deque(maxlen=samples)
+        self.waits = collections.deque(maxlen=samples)
+
+    def record(self, ok, ready_at, submitted_at, now):
+        if ok:
+            self.converted += 1
+        else:
+            self.failed += 1
+        self.finished_at.append(now)
+        self.latencies.append(now - ready_at)
+        self.waits.append(submitted_at - ready_at)
+
+    def throughput(self, now):
+        """Files finished per second over the last window_seconds"""
+        while self.finished_at and self.finished_at[0] < now - self.window_seconds:
+            self.finished_at.popleft()
+        span = min(self.window_seconds, now - self.started)
+        return len(self.finished_at) / span if span > 0 else 0.0
+
+    @staticmethod
+    def _percentile(values, fraction):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+    def snapshot(self, queue_depth, in_flight, now=None):
+        now = time.monotonic() if now is None else now
+        return {
+            "uptime_seconds": round(now - self.started, 1),
+            "queue_depth": queue_depth,
+            "in_flight": in_flight,
+            "queued_total": self.queued,
+            "converted": self.converted,
+            "failed": self.failed,
+            "throughput_per_second": round(self.throughput(now), 3),
+            "latency_p50_seconds": self._percentile(self.latencies, 0.5),
+            "latency_p95_seconds": self._percentile(self.latencies, 0.95),
+            "latency_max_seconds": round(max(self.latencies), 3) if self.latencies else None,
+            "wait_p95_seconds": self._percentile(self.waits, 0.95),
+        }
+
+    def describe(self, queue_depth, in_flight):
+        stats = self.snapshot(queue_depth, in_flight)
+        latency = "-"
+        if stats["latency_p50_seconds"] is not None:
+            latency = f"p50 {stats['latency_p50_seconds']}s p95 {stats['latency_p95_seconds']}s"
+        return (f"Watch: {stats['queue_depth']} queued, {stats['in_flight']} converting, "
+                f"{stats['converted']} converted, {stats['failed']} failed, "
+                f"{stats['throughput_per_second']:.2f} files/s, latency {latency}")
+
+
+class FolderWatcher:
+    """
+    Debounces the files of the watched directories and converts them on a
+    bounded process pool. run() blocks until stopped.
+    """
+
+    def __init__(self, directories, jobs=None, settle_seconds=2.0, poll_interval=1.0, max_in_flight=None,
+                 on_result=None, log=print):
+        self.directories = directories
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        # 提交给进程池的任务上限：够每个进程排一个后备，其余留在本地队列
+        self.max_in_flight = max_in_flight or self.jobs * 2
+        self.on_result = on_result
+        self.log = log
+        self.stats = WatchStats()
+        # path -> [stat, 最近一次变化的时间]
+        self.seen = {}
+        # path -> 已提交转换时的 stat，变化后才再次转换
+        self.done = {}
+        # path -> (目录, stat, 就绪时间)，按就绪顺序
+        self.pending = collections.OrderedDict()
+        # future -> (path, 目录, stat, 就绪时间, 提交时间)
+        self.running = {}
+
+    @property
+    def queue_depth(self):
+        return len(self.pending)
+
+    def prime(self):
+        """Mark files whose manifest entry is still up to date as done, so a restart skips them"""
+        for directory in self.directories:
+            if directory.manifest is None:
+                continue
+            for path, stat in directory.scan().items():
+                if directory.manifest.is_up_to_date(path, directory.output_for(path), directory.resolved):
+                    self.done[path] = stat
+
+    def scan(self, now):
+        """
+        Queue every file that changed since its last conversion and has been
+        still for settle_seconds. Files that left the watched directories are
+        forgotten, so a drop folder emptied after conversion keeps no state.
+        """
+        active = {path for path, *_ in self.running.values()}
+        present = set()
+        for directory in self.directories:
+            files = directory.scan()
+            present.update(files)
+            for path, stat in files.items():
+                entry = self.seen.get(path)
+                if entry is None or entry[0] != stat:
+                    self.seen[path] = [stat, now]
+                    continue
+                if (now - entry[1] < self.settle_seconds or self.done.get(path) == stat
+                        or path in active or path in self.pending):
+                    continue
+                if not _readable(path):
+                    continue  # 写入方仍占用文件（Windows 上的独占打开）
+                self.pending[path] = (directory, stat, now)
+                self.stats.queued += 1
+        # 已移走或删除的文件：丢弃去抖和已转换记录，以及尚未提交的排队项
+        for table in (self.seen, self.done, self.pending):
+            for path in [path for path in table if path not in present]:
+                del table[path]
+
+    def submit(self, executor):
+        while self.pending and len(self.running) < self.max_in_flight:
+            path, (directory, stat, ready_at) = self.pending.popitem(last=False)
+            fingerprint = directory.manifest is not None
+            future = executor.submit(convert_one, path, directory.output_for(path), directory.options,
+                                     None, fingerprint)
+            self.running[future] = (path, directory, stat, ready_at, time.monotonic())
+            # 提交时就记下 stat：转换期间文件又变化时会再次排队
+            self.done[path] = stat
+
+    def collect(self, timeout):
+        """Wait up to timeout for running conversions and record the finished ones"""
+        if not self.running:
+            time.sleep(timeout)
+            return
+        finished, _ = wait(list(self.running), timeout=timeout, return_when=FIRST_COMPLETED)
+        now = time.monotonic()
+        manifests = set()
+        for future in finished:
+            path, directory, stat, ready_at, submitted_at = self.running.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # 工作进程崩溃时也记录该文件；文件再次变化时会重试
+                result = {"input": path, "output": directory.output_for(path), "ok": False,
+                          "seconds": None, "messages": [f"Error: worker failed: {e}"], "stages": []}
+            self.stats.record(result["ok"], ready_at, submitted_at, now)
+            if directory.manifest is not None:
+                if result["ok"] and "fingerprint" in result:
+                    directory.manifest.record(path, result["output"], directory.resolved, result.pop("fingerprint"))
+                else:
+                    directory.manifest.forget(result["output"])
+                manifests.add(directory.manifest)
+            if self.on_result is not None:
+                self.on_result(result)
+        for manifest in manifests:
+            manifest.save()
+
+    def run(self, stop=None, duration=None, status_path=None, status_interval=10.0):
+        """
+        Watch until stop (a threading.Event) is set, duration seconds have
+        passed or KeyboardInterrupt. Every status_interval seconds the counters
+        are logged (when anything happened) and written to status_path.
+        """
+        backend = "sdk" if any(d.options.get("backend", "sdk") == "sdk" for d in self.directories) else "native"
+        for directory in self.directories:
+            if directory.output_dir:
+                os.makedirs(directory.output_dir, exist_ok=True)
+        self.prime()
+        self.log(f"Watching {len(self.directories)} directories with {self.jobs} workers "
+                 f"(settle {self.settle_seconds}s, poll {self.poll_interval}s)")
+
+        start = time.monotonic()
+        next_scan = next_status = start
+        last_reported = None
+        with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_watch_worker,
+                                 initargs=(backend,)) as executor:
+            try:
+                while not (stop is not None and stop.is_set()):
+                    now = time.monotonic()
+                    if duration is not None and now - start >= duration:
+                        break
+                    if now >= next_scan:
+                        self.scan(now)
+                        next_scan = now + self.poll_interval
+                    self.submit(executor)
+                    if now >= next_status:
+                        counters = (self.stats.queued, self.stats.converted + self.stats.failed)
+                        if counters != last_reported:
+                            self.log(self.stats.describe(self.queue_depth, len(self.running)))
+                            last_reported = counters
+                        if status_path:
+                            self.write_status(status_path)
+                        next_status = now + status_interval
+                    self.collect(max(0.0, min(next_scan, next_status) - time.monotonic()))
+            except KeyboardInterrupt:
+                self.log("Stopping: waiting for running conversions")
+            # 已提交的转换完成后再退出，队列中剩余的文件下次启动时重新发现
+            while self.running:
+                self.collect(self.poll_interval)
+        if status_path:
+            self.write_status(status_path)
+        self.log(self.stats.describe(self.queue_depth, len(self.running)))
+        return self.stats
+
+    def write_status(self, status_path):
+        status = self.stats.snapshot(self.queue_depth, len(self.running))
+        status["directories"] = [directory.path for directory in self.directories]
+        temp_path = f"{status_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as status_file:
+            json.dump(status, status_file, indent=2)
+        os.replace(temp_path, status_path)
+
+
+def _init_watch_worker(backend):
+    # Ctrl+C 只由主进程处理：它等正在进行的转换完成后再退出
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _init_worker(backend)
+
+
+def _readable(path):
+    try:
+        with open(path, "rb"):
+            return True
+    except OSError:
+        return False
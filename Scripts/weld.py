@@ -0,0 +1,124 @@
+import numpy as np
+
+
+class WeldResult:
+    """
+    Outcome of a welding pass over N CSV rows.
+
+    source_rows[k] is the CSV row that supplies the attributes of welded vertex k
+    (the first row it was seen on), and indices[i] is the welded vertex used by
+    CSV row i, i.e. the index buffer of the mesh.
+    """
+
+    def __init__(self, source_rows, indices):
+        self.source_rows = source_rows
+        self.indices = indices
+
+    @property
+    def input_count(self):
+        return len(self.indices)
+
+    @property
+    def vertex_count(self):
+        return len(self.source_rows)
+
+    @property
+    def ratio(self):
+        """输入行数 / 焊接后顶点数"""
+        return self.input_count / self.vertex_count if self.vertex_count else 1.0
+
+    def describe(self):
+        return (f"Welded {self.input_count} rows into {self.vertex_count} vertices "
+                f"(dedup ratio {self.ratio:.2f}x)")
+
+
+def _first_occurrence_order(first, inverse):
+    # np.unique 按键排序编号；改为按首次出现的顺序编号，保持原始三角形的访问局部性
+    order = np.argsort(first, kind="stable")
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order), dtype=np.int64)
+    return WeldResult(first[order], rank[inverse.ravel()])
+
+
+def weld_by_vertex_id(vtx_ids):
+    """Fast path: rows sharing a Vertex ID value become one vertex"""
+    _, first, inverse = np.unique(vtx_ids, return_index=True, return_inverse=True)
+    return _first_occurrence_order(first, inverse)
+
+
+def quantize(values, tolerance):
+    """Snap values onto a grid of size tolerance as int64 keys"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    return np.round(values / tolerance).astype(np.int64)
+
+
+def hash_rows(keys):
+    """Vectorized 64-bit hash of each row of an int64 key matrix (FNV-1a style mixing)"""
+    h = np.full(len(keys), 0xcbf29ce484222325, dtype=np.uint64)
+    prime = np.uint64(0x100000001b3)
+    with np.errstate(over="ignore"):
+        for column in keys.T:
+            h ^= column.astype(np.uint64)
+            h *= prime
+            h ^= h >> np.uint64(29)
+    return h
+
+
+def _unique_rows(keys):
+    # 把每行看作一个定长字节串，一维排序比 np.unique(axis=0) 快得多
+    keys = np.ascontiguousarray(keys)
+    rows = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+    _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+    return first, inverse.ravel()
+
+
+def weld_by_attributes(arrays, tolerance=1e-6):
+    """
+    Hash path: rows whose quantized attribute tuples are equal become one vertex.
+
+    arrays is a list of per-row attribute arrays (position, normal, UVs, ...);
+    each is quantized with tolerance and the rows are bucketed by a 64-bit hash.
+    Hash collisions are detected by comparing the full keys and resolved exactly.
+    """
+    return _weld_keys(np.hstack([quantize(values, tolerance) for values in arrays]))
+
+
+def _weld_keys(keys):
+    hashes = hash_rows(keys)
+    _, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+
+    collided = np.any(keys != keys[first[inverse]], axis=1)
+    if collided.any():
+        # 极少出现：对冲突的桶做精确去重
+        first, inverse = _unique_rows(keys)
+    return _first_occurrence_order(first, inverse)
+
+
+def dedup_values(values, tolerance=None):
+    """
+    Deduplicate the rows of one layer element's values.
+
+    With tolerance=None rows must match bit for bit (-0.0 counts as 0.0),
+    otherwise they are quantized onto a grid of size tolerance. The unique
+    values are values[result.source_rows], result.indices maps every row to one.
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, None]
+    if tolerance:
+        keys = quantize(values, tolerance)
+    else:
+        normalized = np.ascontiguousarray(values + values.dtype.type(0))
+        keys = normalized.view(np.dtype(f"i{values.dtype.itemsize}")).astype(np.int64)
+    return _weld_keys(keys)
+
+
+def max_deviation(values, weld_result):
+    """Largest difference between a row and the welded vertex that replaced it"""
+    if values is None or not len(values):
+        return 0.0
+    welded = values[weld_result.source_rows][weld_result.indices]
+    return float(np.abs(values - welded).max())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 工具的模块是 Scripts 目录下的平铺模块
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Scripts"))
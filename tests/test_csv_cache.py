@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+
+from converter import CSV2FBXConverter
+from csv_cache import CsvCache
+from csv_ingest import build_column_map, read_csv_columns
+
+MAPPING = build_column_map(vtx_id=0, vertex_id=1, uv_id=4)
+
+
+def write_capture(path, offset=0.0, bad_cell=False):
+    rows = ["VTX, x, y, z, u, v"]
+    for i in range(6):
+        x = "abc" if bad_cell and i == 2 else f"{i + offset:.1f}"
+        rows.append(f"{i}, {x}, {i * 2 + offset:.1f}, 0.0, 0.5, 0.25")
+    with open(path, "w") as csv_file:
+        csv_file.write("\n".join(rows) + "\n")
+    return str(path)
+
+
+def assert_same(data, expected):
+    assert sorted(data.arrays) == sorted(expected.arrays)
+    for name, values in expected.arrays.items():
+        assert data.arrays[name].dtype == values.dtype
+        np.testing.assert_array_equal(data.arrays[name], values)
+
+
+def test_miss_then_hit(tmp_path):
+    path = write_capture(tmp_path / "a.csv")
+    cache = CsvCache(str(tmp_path / "cache"))
+    first = cache.read(path, MAPPING)
+    second = cache.read(path, MAPPING)
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert_same(first, read_csv_columns(path, MAPPING))
+    assert_same(second, read_csv_columns(path, MAPPING))
+
+
+def test_other_mapping_reuses_shared_columns(tmp_path):
+    path = write_capture(tmp_path / "a.csv")
+    cache = CsvCache(str(tmp_path / "cache"))
+    cache.read(path, build_column_map(vertex_id=1))
+    # 位置列已缓存，只解析新增的 UV 列
+    data = cache.read(path, MAPPING)
+    assert (cache.misses, cache.hits) == (2, 0)
+    assert_same(data, read_csv_columns(path, MAPPING))
+    cache.read(path, MAPPING)
+    assert cache.hits == 1
+
+
+def test_rewrite_with_same_size_is_a_miss(tmp_path):
+    path = write_capture(tmp_path / "a.csv")
+    cache = CsvCache(str(tmp_path / "cache"))
+    cache.read(path, MAPPING)
+    size = os.path.getsize(path)
+    stat = os.stat(path)
+    write_capture(path, offset=1.0)
+    assert os.path.getsize(path) == size
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    data = cache.read(path, MAPPING)
+    assert cache.misses == 2
+    assert_same(data, read_csv_columns(path, MAPPING))
+
+
+def test_verify_content_catches_an_unchanged_mtime(tmp_path):
+    path = write_capture(tmp_path / "a.csv")
+    stat = os.stat(path)
+    CsvCache(str(tmp_path / "cache")).read(path, MAPPING)
+    write_capture(path, offset=1.0)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    cache = CsvCache(str(tmp_path / "cache"), verify_content=True)
+    data = cache.read(path, MAPPING)
+    assert cache.misses == 1
+    assert data.position[0, 0] == 1.0
+
+
+def test_tolerant_parse_with_issues_is_not_stored(tmp_path):
+    path = write_capture(tmp_path / "a.csv", bad_cell=True)
+    cache = CsvCache(str(tmp_path / "cache"))
+    for _ in range(2):
+        data = cache.read(path, MAPPING, tolerant=True)
+        assert data.issues["non_numeric"].tolist() == [2]
+        assert np.isnan(data.position[2, 0])
+    assert (cache.misses, cache.hits) == (2, 0)
+    assert cache.entries() == []
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    first = write_capture(tmp_path / "a.csv")
+    second = write_capture(tmp_path / "b.csv", offset=1.0)
+    cache = CsvCache(str(tmp_path / "cache"))
+    cache.read(first, MAPPING)
+    (_, size, first_entry), = cache.entries()
+    os.utime(first_entry, (1, 1))
+    cache.max_bytes = size
+    cache.read(second, MAPPING)
+    assert not os.path.exists(first_entry)
+    assert len(cache.entries()) == 1
+    cache.read(first, MAPPING)
+    assert cache.misses == 3
+
+
+def test_clear(tmp_path):
+    path = write_capture(tmp_path / "a.csv")
+    cache = CsvCache(str(tmp_path / "cache"))
+    cache.read(path, MAPPING)
+    cache.clear()
+    assert not os.path.exists(cache.cache_dir)
+    cache.read(path, MAPPING)
+    assert cache.misses == 2
+
+
+def test_converter_does_not_cache_by_default(tmp_path, monkeypatch):
+    monkeypatch.setenv("CSV2FBX_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr("csv_cache._default_cache", None)
+    path = write_capture(tmp_path / "a.csv")
+    converter = CSV2FBXConverter()
+    converter.log_message = lambda message: None
+    assert converter.csv_to_fbx(path, str(tmp_path / "a.fbx"), vtx_id=0, vertex_id=1, normal_id=None, uv_id=4,
+                                use_normal=False, backend="native")
+    assert not os.path.exists(tmp_path / "cache")
+    assert converter.csv_to_fbx(path, str(tmp_path / "a.fbx"), vtx_id=0, vertex_id=1, normal_id=None, uv_id=4,
+                                use_normal=False, backend="native", use_cache=True)
+    assert os.path.isdir(tmp_path / "cache")
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from csv_ingest import CsvColumns
+from validation import validate_columns
+
+
+def capture():
+    """Three triangles; row 1 has a NaN normal, row 4 +inf / -inf positions, row 7 an invalid vertex ID"""
+    position = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0],
+                         [2, 0, 0], [np.inf, 0, -np.inf], [2, 1, 0],
+                         [4, 0, 0], [5, 0, 0], [4, 1, 0]], dtype=np.float64)
+    normal = np.tile(np.array([0, 0, 1], dtype=np.float32), (9, 1))
+    normal[1, 1] = np.nan
+    vtx_id = np.arange(9, dtype=np.int64)
+    vtx_id[7] = -1
+    return CsvColumns({"position": position, "normal": normal, "vtx_id": vtx_id}, 9)
+
+
+def test_fail_reports_errors_and_keeps_data():
+    data = capture()
+    result, report = validate_columns(data, "fail")
+    assert result is data
+    assert not report.ok
+    assert report.rows("non_finite", "normal").tolist() == [1]
+    assert report.rows("non_finite", "position").tolist() == [4]
+    assert report.rows("invalid_id", "vtx_id").tolist() == [7]
+    assert report.dropped_rows == 0 and report.repaired_rows == 0
+
+
+def test_drop_removes_triangles_using_bad_rows():
+    result, report = validate_columns(capture(), "drop")
+    # 每个三角形都有一个坏行
+    assert len(result) == 0
+    assert report.dropped_rows == 9
+
+    data = capture()
+    data.arrays["vtx_id"][7] = 7
+    result, report = validate_columns(data, "drop")
+    assert len(result) == 3
+    assert result.position[:, 0].tolist() == [4, 5, 4]
+    assert report.dropped_rows == 6
+
+
+def test_clamp_replaces_nan_and_infinities():
+    result, report = validate_columns(capture(), "clamp")
+    assert report.repaired_rows == 3
+    assert np.isfinite(result.position).all() and np.isfinite(result.normal).all()
+    assert result.normal[1].tolist() == [0, 0, 1]
+    # +inf -> 该列最大的有限值，-inf -> 最小的有限值
+    assert result.position[4].tolist() == [5, 0, 0]
+    # 无效编号换成不与任何顶点重复的新编号
+    assert result.vtx_id[7] >= 0 and len(np.unique(result.vtx_id)) == 9
+
+
+def test_zero_replaces_every_bad_value():
+    result, report = validate_columns(capture(), "zero")
+    assert report.repaired_rows == 3
+    assert result.position[4].tolist() == [0, 0, 0]
+    assert result.normal[1].tolist() == [0, 0, 1]
+    assert len(np.unique(result.vtx_id)) == 9
+
+
+def test_repairs_do_not_modify_the_input():
+    data = capture()
+    validate_columns(data, "zero")
+    assert np.isinf(data.position[4, 0]) and np.isnan(data.normal[1, 1])
+
+
+def test_degenerate_and_incomplete_triangles_are_warnings():
+    position = np.array([[0, 0, 0], [1, 0, 0], [2, 0, 0],
+                         [0, 0, 0], [1, 0, 0], [0, 1, 0],
+                         [9, 9, 9]], dtype=np.float64)
+    data = CsvColumns({"position": position}, 7)
+    _, report = validate_columns(data, "fail")
+    assert report.ok
+    assert report.rows("degenerate_triangle").tolist() == [0]
+    assert report.rows("incomplete_triangle").tolist() == [6]
+
+    result, report = validate_columns(data, "drop")
+    assert result.position.tolist() == position[3:6].tolist()
+    assert report.dropped_rows == 4
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        validate_columns(capture(), "ignore")
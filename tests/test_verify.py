@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from converter import CSV2FBXConverter
+from csv_ingest import build_column_map, read_csv_columns
+from verify import read_exported, verify_scene
+
+COLUMNS = dict(vtx_id=0, vertex_id=1, normal_id=4, uv_id=7)
+
+
+class QuietConverter(CSV2FBXConverter):
+    def log_message(self, message):
+        pass
+
+
+@pytest.fixture
+def capture(tmp_path):
+    """A 4 x 4 quad grid with non-unit normals, one row per triangle corner"""
+    rng = np.random.default_rng(1)
+    grid = np.arange(25).reshape(5, 5)
+    a, b, c, d = grid[:-1, :-1].ravel(), grid[1:, :-1].ravel(), grid[:-1, 1:].ravel(), grid[1:, 1:].ravel()
+    vertices = np.concatenate([np.stack([a, b, c], 1), np.stack([c, b, d], 1)]).ravel()
+    positions = np.stack([vertices % 5, vertices // 5, rng.random(25)[vertices]], 1)
+    normals = rng.normal(size=(25, 3))[vertices] * 3
+    uvs = rng.random((25, 2))[vertices]
+    path = tmp_path / "grid.csv"
+    with open(path, "w") as csv_file:
+        csv_file.write("VTX, x, y, z, nx, ny, nz, u, v\n")
+        for row in zip(vertices, positions, normals, uvs):
+            csv_file.write(", ".join([str(row[0])] + [repr(float(value)) for part in row[1:] for value in part]) + "\n")
+    return str(path)
+
+
+def export(csv_path, output, **options):
+    assert QuietConverter().csv_to_fbx(csv_path, output, backend="native", as_ascii=False, **COLUMNS, **options)
+    return read_exported(output)
+
+
+def parsed(csv_path):
+    return read_csv_columns(csv_path, build_column_map(**COLUMNS))
+
+
+@pytest.mark.parametrize("extension, output_format", [(".fbx", "fbx"), (".glb", "glb")])
+def test_round_trip(capture, tmp_path, extension, output_format):
+    meshes, nodes = export(capture, str(tmp_path / ("grid" + extension)), output_format=output_format)
+    report = verify_scene(parsed(capture), meshes, nodes, "grid", {}, unit_vectors=output_format == "glb")
+    assert report.ok, report.describe()
+    assert report.meshes == 1 and report.checked_triangles == report.triangles == 32
+    assert set(report.attributes) == {"position", "normal", "uv0"}
+    assert all(stats["checked"] == 96 for stats in report.attributes.values())
+
+
+@pytest.mark.parametrize("extension, output_format", [(".fbx", "fbx"), (".glb", "glb")])
+def test_mismatch_is_reported(capture, tmp_path, extension, output_format):
+    meshes, nodes = export(capture, str(tmp_path / ("grid" + extension)), output_format=output_format)
+    data = parsed(capture)
+    data.position[7, 2] += 0.5
+    data.uv0[30] = [2, 2]
+    report = verify_scene(data, meshes, nodes, "grid", {}, unit_vectors=output_format == "glb")
+    assert not report.ok
+    assert report.attributes["position"]["mismatched"] == 1
+    assert report.attributes["position"]["where"] == ["grid triangle 2"]
+    assert report.attributes["uv0"]["mismatched"] == 1
+    assert report.attributes["normal"]["mismatched"] == 0
+
+
+def test_optimized_triangles_are_matched_by_position(capture, tmp_path):
+    options = dict(weld="attributes", optimize="vertex_cache")
+    meshes, nodes = export(capture, str(tmp_path / "grid.fbx"), **options)
+    report = verify_scene(parsed(capture), meshes, nodes, "grid", options)
+    assert report.ok, report.describe()
+    assert report.checked_triangles == 32
+
+
+def test_sample_checks_a_subset(capture, tmp_path):
+    meshes, nodes = export(capture, str(tmp_path / "grid.fbx"))
+    report = verify_scene(parsed(capture), meshes, nodes, "grid", {}, sample=0.25, seed=3)
+    assert report.ok
+    assert report.checked_triangles == 8 and report.attributes["position"]["checked"] == 24
+
+
+def test_missing_mesh(capture, tmp_path):
+    meshes, nodes = export(capture, str(tmp_path / "grid.fbx"))
+    report = verify_scene(parsed(capture), meshes, nodes, "other", {})
+    assert not report.ok
+    assert report.problems == {"missing_mesh": ["other"]}